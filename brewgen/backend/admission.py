@@ -0,0 +1,165 @@
+"""Cost-aware admission to the solver slots.
+
+Each of the envelope's ``CONCURRENCY_LIMIT`` solver slots is split into
+``UNITS_PER_SLOT`` units. A compute request takes as many units as its predicted
+solve time needs. A request predicted to use its whole deadline takes a full
+slot, just as every request did under the flat two-slot gate. A three-grain
+feasibility check predicted to finish in a fraction of that takes one unit, so
+several cheap checks can run beside one expensive generation instead of being
+turned away with a 503. The *predicted* work in flight never exceeds what two
+full-deadline solves could do, but up to ``CONCURRENCY_LIMIT * UNITS_PER_SLOT``
+operations may run at once, so the prediction must come from the hardware the
+server runs on.
+
+The prediction is a per-operation linear model over the brief's size features
+(:data:`FEATURES`). ``scripts/calibrate_admission.py`` fits it from measured
+durations on that hardware and writes ``data/admission-cost.json``. No model is
+shipped: without the file, with a stale or implausible one (a negative
+coefficient), or for an operation it does not cover, every request costs a full
+slot -- the flat two-slot gate. Generation and batch ranges
+(:data:`FULL_SLOT_OPERATIONS`) cost a full slot whatever the model says.
+"""
+
+import json
+import math
+import os
+
+COST_MODEL_VERSION = 1
+UNITS_PER_SLOT = 4               # units a full-deadline solve takes
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+COST_MODEL_PATH = os.path.join(DATA_DIR, "admission-cost.json")
+
+# Brief features the model is linear in, after a per-operation intercept.
+FEATURES = ("grains", "excess_grains", "sensory_bounds", "solves")
+# Focused range: a minimize and a maximize solve per descriptor.
+_SOLVES_PER_DESCRIPTOR = 2
+# Operations that run many solves and always take a full slot, until a fit on
+# the production hardware shows they can share one.
+FULL_SLOT_OPERATIONS = frozenset({"recipes", "sensory_range_batch"})
+
+
+def features(operation, data, max_bills=5):
+    """The model's features for a validated brief, as a tuple in
+    :data:`FEATURES` order.
+
+    ``grains`` is the size of the model (one integer and one binary per grain),
+    ``excess_grains`` how many of them the grain cap forces out (what the
+    binaries have to search), ``sensory_bounds`` the bound rows, and ``solves``
+    the MILP solves the operation runs at most."""
+    grains = len(data.get("fermentable_list") or [])
+    cap = data.get("max_unique_fermentables", 4)
+    if operation == "sensory_range":
+        solves = _SOLVES_PER_DESCRIPTOR
+    elif operation == "sensory_range_batch":
+        solves = _SOLVES_PER_DESCRIPTOR * len(data.get("descriptors") or [])
+    elif operation == "recipes":
+        solves = max_bills
+    else:
+        solves = 1
+    return (grains, max(0, grains - cap), len(data.get("sensory_model") or []),
+            solves)
+
+
+class CostModel:
+    """Predicted solve seconds per operation: ``coefficients`` maps an
+    operation to ``[intercept, *weights]`` over :data:`FEATURES`."""
+
+    def __init__(self, coefficients=None):
+        self.coefficients = dict(coefficients or {})
+
+    @classmethod
+    def load(cls, path=COST_MODEL_PATH):
+        """The calibrated model, or an empty one (every request a full slot) if
+        the file is missing, unreadable, from another model version or fails
+        :func:`implausible`."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if payload.get("version") != COST_MODEL_VERSION \
+                or payload.get("features") != list(FEATURES) \
+                or implausible(payload.get("coefficients")):
+            return cls()
+        return cls(payload["coefficients"])
+
+    def predict(self, operation, data, max_bills=5):
+        """Predicted seconds for ``operation`` on ``data``, or None if the model
+        does not cover the operation."""
+        return self.seconds(operation, features(operation, data, max_bills))
+
+    def seconds(self, operation, values):
+        """Predicted seconds for ``operation`` with the given feature values."""
+        weights = self.coefficients.get(operation)
+        if weights is None:
+            return None
+        return max(0.0, weights[0] + sum(w * v for w, v in zip(weights[1:], values)))
+
+    def units(self, operation, data, deadline, max_bills=5):
+        """Slot units to admit ``operation`` on ``data`` with, given its
+        ``deadline`` in seconds; see :func:`units_for`. Operations in
+        :data:`FULL_SLOT_OPERATIONS` always take a full slot."""
+        if operation in FULL_SLOT_OPERATIONS:
+            return UNITS_PER_SLOT
+        return units_for(self.predict(operation, data, max_bills), deadline)
+
+
+def implausible(coefficients):
+    """Why a fitted ``coefficients`` mapping must not be used, or None.
+
+    Every operation needs an intercept and one weight per feature, none of
+    them negative: a brief can never get cheaper by growing, so a negative
+    weight means the fit has too little or too noisy data."""
+    if not isinstance(coefficients, dict):
+        return "no coefficients"
+    for operation, weights in sorted(coefficients.items()):
+        if not isinstance(weights, list) or len(weights) != len(FEATURES) + 1:
+            return "%s: expected %d coefficients" % (operation, len(FEATURES) + 1)
+        if any(not isinstance(w, (int, float)) or w < 0 for w in weights):
+            return "%s: negative or non-numeric coefficient" % operation
+    return None
+
+
+def units_for(seconds, deadline):
+    """Slot units for a solve predicted to take ``seconds`` of a ``deadline``:
+    its share of the deadline rounded up, between 1 and ``UNITS_PER_SLOT``. No
+    prediction (None) or no deadline costs a full slot."""
+    if seconds is None or deadline <= 0:
+        return UNITS_PER_SLOT
+    return max(1, min(UNITS_PER_SLOT, math.ceil(seconds / deadline * UNITS_PER_SLOT)))
+
+
+def fit(samples, ridge=1e-6):
+    """Least-squares coefficients from ``(operation, features, seconds)``
+    samples, per operation. A small ridge keeps a feature that never varies
+    for an operation (``solves`` outside the batch) from making the normal
+    equations singular; the intercept is not penalized."""
+    by_operation = {}
+    for operation, values, seconds in samples:
+        by_operation.setdefault(operation, []).append(((1.0,) + tuple(values), seconds))
+    coefficients = {}
+    for operation, rows in by_operation.items():
+        size = len(rows[0][0])
+        normal = [[sum(x[i] * x[j] for x, _y in rows) + (ridge if i == j and i else 0.0)
+                   for j in range(size)] for i in range(size)]
+        target = [sum(x[i] * y for x, y in rows) for i in range(size)]
+        coefficients[operation] = [round(w, 6) for w in _solve(normal, target)]
+    return coefficients
+
+
+def _solve(matrix, vector):
+    """Solve ``matrix @ w == vector`` by Gaussian elimination with partial
+    pivoting; the system is tiny (one row per feature)."""
+    size = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(size)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        if rows[col][col] == 0:
+            continue
+        for r in range(size):
+            if r != col and rows[r][col]:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [rows[i][size] / rows[i][i] if rows[i][i] else 0.0 for i in range(size)]
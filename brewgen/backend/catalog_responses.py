@@ -0,0 +1,144 @@
+"""Pre-serialized, conditionally cacheable responses for the static catalog GETs.
+
+The grain, category and style endpoints answer from data that only changes on
+deploy, so re-encoding it through ``jsonify`` on every request is wasted work.
+:class:`CatalogResponses` renders each payload to JSON bytes once -- byte for
+byte what ``jsonify`` would send -- and keeps the bytes with a strong ETag, the
+SHA-256 of the body, in a bounded least-recently-used cache. Each response
+carries ``Cache-Control: public, max-age=CATALOG_MAX_AGE_SECONDS``, and a
+request whose ``If-None-Match`` names the current ETag is answered ``304 Not
+Modified`` with no body. Because the ETag is a hash of the body, a deploy that
+changes the data changes every affected ETag, and revalidation after the
+max-age picks up the new payload.
+
+A payload of at least ``COMPRESS_MIN_BYTES`` is also compressed once, with gzip
+and, when the optional ``Brotli`` package is installed (``pip install
+".[brotli]"``), with brotli. Each request gets the best variant its
+``Accept-Encoding`` allows, with ``Vary: Accept-Encoding`` and an ETag suffixed
+per encoding, so no request spends CPU on serialization or compression. The
+payloads that take no URL argument are pinned at startup with :meth:`pin` and
+never evicted; per-style and per-category payloads are rendered on first request.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip variants are served
+    brotli = None
+
+CATALOG_MAX_AGE_SECONDS = 300   # browsers and the relay reuse a payload this long
+CATALOG_CACHE_SIZE = 256        # lazily rendered payloads kept per container
+COMPRESS_MIN_BYTES = 1024       # smaller bodies are not worth a compressed variant
+
+
+def _compressors():
+    """Content-coding -> compress function, in preference order."""
+    compressors = {}
+    if brotli is not None:
+        compressors["br"] = lambda body: brotli.compress(body, quality=11)
+    # mtime=0 keeps the gzip bytes, and so the ETag, identical across workers.
+    compressors["gzip"] = lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+    return compressors
+
+
+class RenderedPayload:
+    """One payload's JSON bytes, their strong ETag, and compressed variants as
+    ``{content_coding: bytes}`` (only those smaller than the body)."""
+
+    __slots__ = ("body", "etag", "encoded")
+
+    def __init__(self, body, compressors=None):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.encoded = {}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            for coding, compress in (compressors or {}).items():
+                encoded = compress(body)
+                if len(encoded) < len(body):
+                    self.encoded[coding] = encoded
+
+    def negotiate(self, accept_encodings):
+        """Return ``(content_coding, bytes)`` for the best variant the request
+        accepts, or ``(None, body)`` for the identity encoding."""
+        best, best_quality = None, 0
+        for coding in self.encoded:
+            quality = accept_encodings.quality(coding)
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        if best is None:
+            return None, self.body
+        return best, self.encoded[best]
+
+
+class CatalogResponses:
+    """Serve static catalog payloads from a bounded cache of rendered bytes.
+
+    ``respond(key, build)`` returns the response for ``key``, calling ``build()``
+    for the payload only when ``key`` is neither pinned nor cached. Keys must
+    identify the payload completely, e.g. ``('style', slug)``. An exception from
+    ``build`` propagates and nothing is cached."""
+
+    def __init__(self, app, max_entries=CATALOG_CACHE_SIZE,
+                 max_age=CATALOG_MAX_AGE_SECONDS, compressors=None):
+        self.app = app
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.compressors = _compressors() if compressors is None else compressors
+        self._lock = threading.Lock()
+        self._pinned = {}
+        self._entries = OrderedDict()
+
+    def render(self, payload):
+        """Encode ``payload`` exactly as ``jsonify`` would, and compress it."""
+        return RenderedPayload(self.app.json.response(payload).get_data(),
+                               self.compressors)
+
+    def pin(self, key, build):
+        """Render ``key`` now and keep it for the life of the process."""
+        self._pinned[key] = self.render(build())
+
+    def rendered(self, key, build):
+        """Return the :class:`RenderedPayload` for ``key``, rendering it on a miss."""
+        entry = self._pinned.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self.render(build())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, key, build):
+        """Return the conditional ``200``/``304`` response for ``key``, in the best
+        encoding the request accepts."""
+        entry = self.rendered(key, build)
+        coding, body = entry.negotiate(request.accept_encodings)
+        response = self.app.response_class(body, mimetype=self.app.json.mimetype)
+        if entry.encoded:
+            response.vary.add("Accept-Encoding")
+        if coding is None:
+            response.set_etag(entry.etag)
+        else:
+            response.content_encoding = coding
+            response.set_etag("%s-%s" % (entry.etag, coding))
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        return response.make_conditional(request)
+
+    def clear(self):
+        """Drop the lazily rendered payloads; pinned ones stay."""
+        with self._lock:
+            self._entries.clear()
@@ -8,36 +8,60 @@ Every public compute request passes through one shared gate, in a fixed order,
 3. body must parse as JSON                             -> 400
 4. body must satisfy the versioned brief contract      -> 422
 5. the visitor must be within their request budget     -> 429
-6. a solver slot must be free (two, no queue)          -> 503 busy
+6. a repeat of a recently answered brief is served from the result cache
+7. a brief the solver's presolve proves infeasible     -> 422 infeasible
+8. an identical brief already being solved is waited on, not solved again
+9. solver capacity must be free (two cost-weighted slots) -> 503 busy
 
 Only then does the wrapped operation run under the solver's own shared budget,
 and its ``deadline_exceeded``/``infeasible`` outcomes are surfaced as 503/422.
+Each slot is split into units and a request takes the units its predicted
+solve time needs (:mod:`brewgen.backend.admission`), so cheap checks run beside
+an expensive generation. An optional bounded queue (:class:`SlotQueue`) lets a
+request wait for capacity instead of failing at once, but only for as long as
+its deadline can still be met; the wait is then taken out of the operation's
+budget.
+The compute operations are deterministic, so a finished answer that cannot
+change on a retry (``feasible``, ``complete``, ``infeasible``) is cached by a
+canonical hash of the validated brief and replayed without taking a slot.
+Likewise a brief that cheap interval reasoning already proves infeasible is
+rejected before it can occupy a slot, and identical briefs arriving together
+share one solve (:class:`InFlight`).
 
 All failures use ``application/problem+json`` with the locked status codes and
 carry no echoed input. Every request emits one aggregate log line carrying only
-``{timestamp, request_id, operation, outcome, status, duration}`` -- never the
-brief, the client address, or the address hash.
+``{timestamp, request_id, operation, outcome, status, duration, queue_depth,
+queue_wait}`` -- never the brief, the client address, or the address hash.
+The same aggregates, with solver and capacity figures, are counted in
+:mod:`brewgen.backend.metrics` for ``GET /metrics``.
 
 Deployment assumption (see decision-map #10 and the public-launch map #12/#16):
-the API runs as a **single worker process** behind **exactly one trusted proxy
-hop**. The client address is resolved with ``ProxyFix(x_for=1)`` in
-``views.py``; the in-memory rate limit and the two-slot ceiling are therefore
-per-container and correct only under that shape. The deploy must forward exactly
-one hop.
+the API runs behind **exactly one trusted proxy hop**. The client address is
+resolved with ``ProxyFix(x_for=1)`` in ``views.py``, and the deploy must
+forward exactly one hop. By default the rate limit and the two-slot ceiling are
+in-memory and per-process, so they are correct only with a **single worker
+process**. With ``BREWGEN_SHARED_STATE_DIR`` pointing at a memory-backed
+directory they move into :mod:`brewgen.backend.shared_state` and hold across
+every worker on the host (see :func:`new_state`).
 """
 
 import hashlib
 import json
 import logging
 import math
+import os
 import secrets
 import threading
 import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from functools import wraps
 
-from flask import Response, request
+from flask import Response, g, has_request_context, request
+
+from . import admission, metrics, shared_state
+from .solver.fermentables import SolverConfig
 
 # -- locked envelope constants ---------------------------------------------
 
@@ -45,8 +69,17 @@ MAX_BODY_BYTES = 65_536            # 64 KiB body cap
 RATE_LIMIT_PER_MINUTE = 6         # sustained compute requests per visitor
 RATE_LIMIT_BURST = 2              # tokens a fresh visitor may spend at once
 RATE_IDLE_EXPIRY_SECONDS = 600    # drop a visitor's bucket after 10 idle minutes
-CONCURRENCY_LIMIT = 2             # active solver operations per container, no queue
+CONCURRENCY_LIMIT = 2             # full-deadline solver slots per container
+SLOT_QUEUE_DEPTH = 0              # requests that may wait for a slot; 0 is no queue
+SLOT_QUEUE_MIN_RUN_SECONDS = 0.5  # deadline a queued request must keep to run
 LOG_RETENTION_DAYS = 7            # documented retention; enforced by the log sink
+RESULT_CACHE_SIZE = 512           # finished compute answers kept per container
+RESULT_CACHE_TTL_SECONDS = 3600   # a cached answer is dropped after an hour
+MAX_BATCH_DESCRIPTORS = 8         # descriptors one batch range request may name
+
+# Outcomes whose answer is a pure function of the brief and the server config.
+# Deadline-shaped outcomes (``partial``, ``deadline``, ``busy``) are never cached.
+_CACHEABLE_OUTCOMES = frozenset({"feasible", "complete", "infeasible"})
 
 # Stable, input-free titles. These are never shown to the visitor (the frontend
 # renders its own copy from the machine ``outcome`` tag); they only have to stay
@@ -123,12 +156,20 @@ class BriefContract:
     cardinality. :meth:`validate` returns ``None`` when the brief is acceptable
     or a machine outcome tag (always ``"invalid"``) when it is not -- coarse on
     purpose, so a rejection never echoes which value was wrong.
+
+    Validation runs on every compute request, refused ones included, so
+    :meth:`validate` runs a checker compiled once per descriptor requirement
+    (see :func:`_compile_checker`) with the key sets and catalog lookups bound
+    in. :meth:`validate_reference` is the plain statement of the same rules;
+    the two must accept and reject exactly the same briefs. The catalog is read
+    when a checker is compiled, so it must not change after construction.
     """
 
     def __init__(self, slugs, categories, sensory_keywords):
         self.slugs = set(slugs)
         self.categories = set(categories)
         self.sensory_keywords = set(sensory_keywords)
+        self._checkers = {}
 
     @classmethod
     def from_grain_list(cls, grain_list):
@@ -138,14 +179,30 @@ class BriefContract:
             grain_list.get_sensory_keywords(),
         )
 
-    def validate(self, data, *, require_descriptor=False):
-        """Return ``None`` if ``data`` is a valid brief, else ``"invalid"``."""
+    def validate(self, data, *, require_descriptor=False, require_descriptors=False):
+        """Return ``None`` if ``data`` is a valid brief, else ``"invalid"``.
+
+        ``require_descriptor`` demands one known ``descriptor``;
+        ``require_descriptors`` demands a ``descriptors`` list of 1 to
+        ``MAX_BATCH_DESCRIPTORS`` unique known descriptors."""
+        key = (bool(require_descriptor), bool(require_descriptors))
+        checker = self._checkers.get(key)
+        if checker is None:
+            checker = self._checkers[key] = _compile_checker(self, *key)
+        return checker(data)
+
+    def validate_reference(self, data, *, require_descriptor=False,
+                           require_descriptors=False):
+        """:meth:`validate`, written out rule by rule; the specification the
+        compiled checker is tested and benchmarked against."""
         if not isinstance(data, dict):
             return "invalid"
 
         allowed = set(_TOP_KEYS)
         if require_descriptor:
             allowed.add("descriptor")
+        if require_descriptors:
+            allowed.add("descriptors")
         if set(data) - allowed:
             return "invalid"
 
@@ -156,6 +213,8 @@ class BriefContract:
             descriptor = data.get("descriptor")
             if not isinstance(descriptor, str) or descriptor not in self.sensory_keywords:
                 return "invalid"
+        if require_descriptors and self._bad_descriptors(data.get("descriptors")):
+            return "invalid"
 
         if self._bad_fermentables(data.get("fermentable_list")):
             return "invalid"
@@ -185,6 +244,19 @@ class BriefContract:
                 return True
         return item[low_key] > item[high_key]
 
+    def _bad_descriptors(self, descriptors):
+        if not isinstance(descriptors, list) or not descriptors:
+            return True
+        if len(descriptors) > MAX_BATCH_DESCRIPTORS:
+            return True
+        seen = set()
+        for name in descriptors:
+            if not isinstance(name, str) or name not in self.sensory_keywords \
+                    or name in seen:
+                return True
+            seen.add(name)
+        return False
+
     def _bad_fermentables(self, fermentables):
         # At least one grain, capped at catalog cardinality, unique known slugs.
         if not isinstance(fermentables, list) or not fermentables:
@@ -271,6 +343,183 @@ class BriefContract:
         return False
 
 
+_FERMENTABLE_KEYSET = frozenset(_FERMENTABLE_KEYS)
+_CATEGORY_KEYSET = frozenset(_CATEGORY_KEYS)
+_SENSORY_KEYSET = frozenset(_SENSORY_KEYS)
+_EQUIPMENT_KEYSET = frozenset(_EQUIPMENT_KEYS)
+_BEER_KEYSET = frozenset(_BEER_KEYS)
+
+
+def _compile_checker(contract, require_descriptor, require_descriptors):
+    """Build the validation function for one contract and descriptor requirement.
+
+    Everything :meth:`BriefContract.validate_reference` recomputes per call --
+    the allowed top-level keys, the per-section key sets, the catalog lookup
+    sets and the list caps -- is bound once into closure variables. Key checks
+    compare ``dict.keys()`` views against frozensets instead of allocating
+    ``set(item) - KEYS``, and each min/max pair is checked inline. The rules
+    and the order they are applied in are those of ``validate_reference``."""
+    slugs = frozenset(contract.slugs)
+    categories = frozenset(contract.categories)
+    keywords = frozenset(contract.sensory_keywords)
+    max_fermentables = len(slugs)
+    max_categories = len(categories)
+    max_sensory = len(keywords)
+    allowed = set(_TOP_KEYS)
+    if require_descriptor:
+        allowed.add("descriptor")
+    if require_descriptors:
+        allowed.add("descriptors")
+    allowed = frozenset(allowed)
+    finite = _finite_number
+    version = BRIEF_VERSION
+    max_batch = MAX_BATCH_DESCRIPTORS
+    fermentable_keys = _FERMENTABLE_KEYSET
+    category_keys = _CATEGORY_KEYSET
+    sensory_keys = _SENSORY_KEYSET
+    equipment_keys = _EQUIPMENT_KEYSET
+    beer_keys = _BEER_KEYSET
+    # The reference checks values in set order; so does this, so even a value
+    # that makes the check raise (an int too large for a float) fails alike.
+    equipment_order = tuple(_EQUIPMENT_KEYS)
+    beer_order = tuple(_BEER_KEYS)
+
+    # A plain int or float inside the band is a valid number without a call to
+    # _finite_number (NaN fails every comparison); anything else takes the full
+    # check, which raises where the reference does.
+    plain = (int, float)
+    bound = 1e308
+
+    def bad_percent_range(item):
+        low = item.get("min_percent")
+        if not (type(low) in plain and 0 <= low <= 100) \
+                and (not finite(low) or low < 0 or low > 100):
+            return True
+        high = item.get("max_percent")
+        if not (type(high) in plain and 0 <= high <= 100) \
+                and (not finite(high) or high < 0 or high > 100):
+            return True
+        return low > high
+
+    def bad_fermentables(fermentables):
+        if not isinstance(fermentables, list) or not fermentables \
+                or len(fermentables) > max_fermentables:
+            return True
+        seen = set()
+        for item in fermentables:
+            if not isinstance(item, dict) or not item.keys() <= fermentable_keys:
+                return True
+            slug = item.get("slug")
+            if slug not in slugs or slug in seen:
+                return True
+            seen.add(slug)
+            if bad_percent_range(item):
+                return True
+        return False
+
+    def bad_categories(entries):
+        if entries is None:
+            return False
+        if not isinstance(entries, list) or len(entries) > max_categories:
+            return True
+        seen = set()
+        for item in entries:
+            if not isinstance(item, dict) or not item.keys() <= category_keys:
+                return True
+            name = item.get("name")
+            if name not in categories or name in seen:
+                return True
+            seen.add(name)
+            if bad_percent_range(item):
+                return True
+            cap = item.get("unique_fermentable_count")
+            if cap is not None and not finite(cap):
+                return True
+        return False
+
+    def bad_sensory(entries):
+        if entries is None:
+            return False
+        if not isinstance(entries, list) or len(entries) > max_sensory:
+            return True
+        seen = set()
+        for item in entries:
+            if not isinstance(item, dict) or not item.keys() <= sensory_keys:
+                return True
+            name = item.get("name")
+            if name not in keywords or name in seen:
+                return True
+            seen.add(name)
+            low = item.get("min")
+            if not (type(low) in plain and -bound < low < bound) and not finite(low):
+                return True
+            high = item.get("max")
+            if not (type(high) in plain and -bound < high < bound) \
+                    and not finite(high) or low > high:
+                return True
+        return False
+
+    def bad_descriptors(descriptors):
+        if not isinstance(descriptors, list) or not descriptors \
+                or len(descriptors) > max_batch:
+            return True
+        seen = set()
+        for name in descriptors:
+            if not isinstance(name, str) or name not in keywords or name in seen:
+                return True
+            seen.add(name)
+        return False
+
+    def bad_equipment(equipment):
+        if equipment is None:
+            return False
+        if not isinstance(equipment, dict) or not equipment.keys() <= equipment_keys:
+            return True
+        for key in equipment_order:
+            if key in equipment:
+                value = equipment[key]
+                if not finite(value) or value <= 0:
+                    return True
+        return False
+
+    def bad_beer(beer_profile):
+        if beer_profile is None:
+            return False
+        if not isinstance(beer_profile, dict) or not beer_profile.keys() <= beer_keys:
+            return True
+        for key in beer_order:
+            if key in beer_profile and not finite(beer_profile[key]):
+                return True
+        low = beer_profile.get("min_color_srm")
+        high = beer_profile.get("max_color_srm")
+        return low is not None and high is not None and low > high
+
+    def check(data):
+        if not isinstance(data, dict) or not data.keys() <= allowed:
+            return "invalid"
+        get = data.get
+        if "version" in data and data["version"] != version:
+            return "invalid"
+        if require_descriptor:
+            descriptor = get("descriptor")
+            if not isinstance(descriptor, str) or descriptor not in keywords:
+                return "invalid"
+        if require_descriptors and bad_descriptors(get("descriptors")):
+            return "invalid"
+        if bad_fermentables(get("fermentable_list")) \
+                or bad_categories(get("category_model")) \
+                or bad_sensory(get("sensory_model")):
+            return "invalid"
+        max_unique = get("max_unique_fermentables")
+        if max_unique is not None and (not finite(max_unique) or max_unique < 1):
+            return "invalid"
+        if bad_equipment(get("equipment_profile")) or bad_beer(get("beer_profile")):
+            return "invalid"
+        return None
+
+    return check
+
+
 # -- rate limiter -----------------------------------------------------------
 
 class RateLimiter:
@@ -282,6 +531,11 @@ class RateLimiter:
     salt rotates daily so a hash can never be correlated across days. The salt
     and address are held only in memory and are never logged or persisted.
 
+    Buckets are kept in last-seen order (every charge moves its bucket to the
+    end), so expiry pops idle buckets off the front and stops at the first live
+    one: eviction costs O(expired) per request rather than a scan of every
+    visitor under the lock.
+
     Both clocks are injectable: ``clock`` (monotonic) drives refill/expiry and
     ``day_clock`` (wall) drives salt rotation, so behavior is testable without
     real waiting.
@@ -296,7 +550,7 @@ class RateLimiter:
         self._clock = clock
         self._day_clock = day_clock
         self._lock = threading.Lock()
-        self._buckets = {}          # key_hash -> [tokens, last_seen]
+        self._buckets = OrderedDict()   # key_hash -> (tokens, last_seen), oldest first
         self._salt = secrets.token_hex(16)
         self._salt_day = int(day_clock() // 86_400)
 
@@ -307,17 +561,22 @@ class RateLimiter:
             self._rotate_salt_if_needed()
             self._evict_idle(now)
             key = self._hash(address)
-            if key in self._buckets:
-                tokens, last = self._buckets[key]
+            bucket = self._buckets.pop(key, None)
+            if bucket is not None:
+                tokens, last = bucket
                 tokens = min(self._capacity,
                              tokens + (now - last) * self._refill_per_second)
             else:
                 tokens = self._capacity
-            if tokens >= 1:
-                self._buckets[key] = (tokens - 1, now)
-                return True
-            self._buckets[key] = (tokens, now)
-            return False
+            allowed = tokens >= 1
+            # Re-inserting appends, keeping the dict in last-seen order.
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            return allowed
+
+    def bucket_count(self):
+        """Buckets held, idle ones included until the next charge evicts them."""
+        with self._lock:
+            return len(self._buckets)
 
     def _hash(self, address):
         digest = hashlib.sha256()
@@ -335,25 +594,315 @@ class RateLimiter:
 
     def _evict_idle(self, now):
         cutoff = now - self._idle_expiry
-        stale = [key for key, (_t, last) in self._buckets.items() if last < cutoff]
-        for key in stale:
-            del self._buckets[key]
+        buckets = self._buckets
+        while buckets:
+            _tokens, last = next(iter(buckets.values()))
+            if last >= cutoff:
+                break
+            buckets.popitem(last=False)
+
+
+# -- result cache -----------------------------------------------------------
+
+def brief_key(operation, data, context=None):
+    """A canonical hash of one validated brief for ``operation``.
+
+    The solver sorts grains by slug, so the fermentable list is keyed in slug
+    order; every other list keeps its order because it shapes the model. The
+    optional contract ``version`` is dropped (a valid brief either omits it or
+    names the one supported version), and ``context`` -- the server's solver
+    configuration -- is folded in so a config change never replays a stale
+    answer."""
+    canonical = {k: v for k, v in data.items() if k != "version"}
+    canonical["fermentable_list"] = sorted(
+        canonical["fermentable_list"], key=lambda item: item["slug"])
+    payload = json.dumps({"operation": operation, "brief": canonical,
+                          "context": repr(context)},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """A bounded LRU + TTL store of finished compute answers.
+
+    Keyed by :func:`brief_key`; holds the serialized response only, never the
+    brief or anything about the visitor. At most ``max_entries`` answers are
+    kept (least recently used evicted first), each for ``ttl`` seconds. ``hits``
+    and ``misses`` count lookups since the cache was created. The clock is
+    injectable so expiry is testable without real waiting."""
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_SECONDS,
+                 clock=time.monotonic):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires, status, body, mimetype, outcome)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return a fresh ``(response, outcome)`` for ``key``, or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        _expires, status, body, mimetype, outcome = entry
+        return Response(body, status=status, mimetype=mimetype), outcome
+
+    def put(self, key, response, outcome):
+        """Store a finished answer if its outcome is cacheable."""
+        if outcome not in _CACHEABLE_OUTCOMES:
+            return
+        entry = (self._clock() + self._ttl, response.status_code,
+                 response.get_data(), response.mimetype, outcome)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """Aggregate counters only: ``{hits, misses, size}``."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._entries)}
+
+
+# -- single flight ----------------------------------------------------------
+
+class _Flight:
+    """One in-progress solve that followers wait on."""
+
+    __slots__ = ("done", "answer")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.answer = None      # (status, body, mimetype, outcome) once done
+
+    def wait(self, timeout):
+        """The leader's answer as a fresh ``(response, outcome)``, or a 503
+        deadline if it does not arrive within ``timeout`` seconds."""
+        if not self.done.wait(timeout):
+            return problem(503, "deadline")
+        status, body, mimetype, outcome = self.answer
+        return Response(body, status=status, mimetype=mimetype), outcome
+
+
+class InFlight:
+    """Single-flight coalescing of identical compute requests.
+
+    The first request for a :func:`brief_key` becomes the leader and solves; a
+    request for the same key that arrives before the leader finishes becomes a
+    follower and waits for the leader's answer -- whatever it is, ``busy`` and
+    ``deadline`` included -- instead of taking solver capacity and repeating the
+    same solves. Followers wait at most their own deadline, never unbounded,
+    so a hung leader cannot pin them. Flights are per process; ``coalesced``
+    counts the followers served since creation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}      # key -> _Flight
+        self.coalesced = 0
+
+    def join(self, key):
+        """Return ``(flight, leading)`` for ``key``; a leader must later call
+        :meth:`finish` with the same flight."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def finish(self, key, flight, response, outcome):
+        """Publish the leader's answer to its followers and end the flight."""
+        flight.answer = (response.status_code, response.get_data(),
+                         response.mimetype, outcome)
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.done.set()
+
+
+# -- weighted solver slots and the slot queue ---------------------------------
+
+class WeightedSlots:
+    """``limit`` solver slots, each split into ``units_per_slot`` units.
+
+    A drop-in for ``threading.BoundedSemaphore(limit)``: ``acquire`` and
+    ``release`` take or return a full slot unless given ``units``, which the
+    envelope sets from :meth:`admission.CostModel.units`. Releasing more units
+    than are taken raises ``ValueError``, as ``BoundedSemaphore`` does."""
+
+    def __init__(self, limit=CONCURRENCY_LIMIT, units_per_slot=admission.UNITS_PER_SLOT):
+        self.units_per_slot = units_per_slot
+        self.capacity = limit * units_per_slot
+        self._free = self.capacity
+        self._cond = threading.Condition(threading.Lock())
+
+    def acquire(self, blocking=True, timeout=None, units=None):
+        """Take ``units`` (a full slot by default); return False if they do not
+        free up in time."""
+        units = self.units_per_slot if units is None else units
+        with self._cond:
+            if blocking:
+                self._cond.wait_for(lambda: self._free >= units, timeout)
+            if self._free < units:
+                return False
+            self._free -= units
+            return True
+
+    def release(self, units=None):
+        units = self.units_per_slot if units is None else units
+        with self._cond:
+            if self._free + units > self.capacity:
+                raise ValueError("Semaphore released too many times")
+            self._free += units
+            self._cond.notify_all()
+
+    def in_use(self):
+        """Units taken right now."""
+        with self._cond:
+            return self.capacity - self._free
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class SlotQueue:
+    """A bounded wait for a solver slot.
+
+    With ``depth`` 0 (the default) a request that finds every slot taken is
+    refused at once. Otherwise up to ``depth`` requests may wait, each for at
+    most the ``max_wait`` it is given -- what remains of its deadline once it
+    keeps ``SLOT_QUEUE_MIN_RUN_SECONDS`` to run -- and a request beyond the
+    depth, or one whose wait runs out, is refused. ``waiting`` counts the
+    requests waiting right now. The clock is injectable so waits are testable."""
+
+    def __init__(self, depth=SLOT_QUEUE_DEPTH, clock=time.monotonic):
+        self.depth = depth
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.waiting = 0
+
+    def acquire(self, slots, max_wait, units=None):
+        """Take ``units`` of ``slots`` (a full slot when None); return
+        ``(acquired, queue_depth, waited)``.
+
+        ``queue_depth`` is the number of requests waiting, this one included,
+        when it joined the queue, or the number already waiting when a full
+        queue refused it (0 if it never reached the queue); ``waited`` is the
+        seconds it spent there."""
+        size = {} if units is None else {"units": units}
+        if slots.acquire(blocking=False, **size):
+            return True, 0, 0.0
+        if max_wait <= 0:
+            return False, 0, 0.0
+        with self._lock:
+            if self.waiting >= self.depth:
+                return False, self.waiting, 0.0
+            self.waiting += 1
+            depth = self.waiting
+        start = self._clock()
+        try:
+            acquired = slots.acquire(timeout=max_wait, **size)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        return acquired, depth, round(self._clock() - start, 6)
+
+
+def slot_wait():
+    """Seconds the current request waited for its solver slot, to be taken out
+    of the operation's deadline; 0.0 outside a queued compute request."""
+    if not has_request_context():
+        return 0.0
+    return g.get("slot_wait", 0.0)
 
 
 # -- process-wide, monkeypatchable state ------------------------------------
 
-RATE_LIMITER = RateLimiter()
-SLOTS = threading.BoundedSemaphore(CONCURRENCY_LIMIT)
+def new_state(shared_dir=None):
+    """Build the ``(rate limiter, concurrency ceiling)`` pair.
+
+    Without ``shared_dir`` (taken from ``BREWGEN_SHARED_STATE_DIR`` when not
+    given) both are in-memory and per-process. With it, both live in that
+    directory and are shared by every worker on the host, with the same limits.
+    The result cache stays per-process either way: it only saves work and
+    never loosens a bound."""
+    if shared_dir is None:
+        shared_dir = os.environ.get("BREWGEN_SHARED_STATE_DIR") or None
+    if shared_dir is None:
+        return RateLimiter(), WeightedSlots()
+    os.makedirs(shared_dir, mode=0o700, exist_ok=True)
+    return (shared_state.SharedRateLimiter(shared_dir, RATE_LIMIT_PER_MINUTE,
+                                           RATE_LIMIT_BURST, RATE_IDLE_EXPIRY_SECONDS),
+            shared_state.SharedSlots(shared_dir, CONCURRENCY_LIMIT,
+                                     admission.UNITS_PER_SLOT))
+
+
+RATE_LIMITER, SLOTS = new_state()
+COST_MODEL = admission.CostModel.load()
+IN_FLIGHT = InFlight()
+SLOT_QUEUE = SlotQueue(int(os.environ.get("BREWGEN_SLOT_QUEUE_DEPTH")
+                           or SLOT_QUEUE_DEPTH))
+RESULT_CACHE = ResultCache()
+
+# Scrape-time views of the state above. Each reads the module global when
+# scraped, so they follow reset_state() and monkeypatching.
+metrics.REGISTRY.gauge(
+    "brewgen_slot_units_in_use", "Solver slot units held by this process.",
+    lambda: SLOTS.in_use())
+metrics.REGISTRY.gauge(
+    "brewgen_slot_units", "Solver slot units in total.",
+    lambda: CONCURRENCY_LIMIT * admission.UNITS_PER_SLOT)
+metrics.REGISTRY.gauge(
+    "brewgen_slot_queue_waiting", "Requests waiting for slot units.",
+    lambda: SLOT_QUEUE.waiting)
+metrics.REGISTRY.gauge(
+    "brewgen_rate_limit_buckets", "Per-visitor rate-limit buckets held.",
+    lambda: RATE_LIMITER.bucket_count())
+metrics.REGISTRY.gauge(
+    "brewgen_result_cache_entries", "Answers held in the result cache.",
+    lambda: RESULT_CACHE.stats()["size"])
+metrics.REGISTRY.gauge(
+    "brewgen_result_cache_hits_total", "Result cache lookups that hit.",
+    lambda: RESULT_CACHE.hits, kind="counter")
+metrics.REGISTRY.gauge(
+    "brewgen_result_cache_misses_total", "Result cache lookups that missed.",
+    lambda: RESULT_CACHE.misses, kind="counter")
+metrics.REGISTRY.gauge(
+    "brewgen_coalesced_requests_total",
+    "Requests served by waiting on an identical in-flight solve.",
+    lambda: IN_FLIGHT.coalesced, kind="counter")
 
 
 def reset_state():
-    """Reset the limiter and the concurrency ceiling to a clean slate.
-
-    Only for tests, which need each case to start from an empty bucket store and
-    two free slots regardless of what earlier cases did."""
-    global RATE_LIMITER, SLOTS
+    """Reset the limiter, the concurrency ceiling, the slot queue, the result
+    cache, the in-flight table and the recorded metrics.
+
+    Only for tests, which need each case to start from an empty bucket store,
+    two free slots, no queue, a cold cache, no flights and zeroed counters
+    regardless of what earlier cases did. The in-memory pair is always used
+    here; a shared directory would carry state over from earlier cases."""
+    global RATE_LIMITER, SLOTS, SLOT_QUEUE, RESULT_CACHE, IN_FLIGHT
     RATE_LIMITER = RateLimiter()
-    SLOTS = threading.BoundedSemaphore(CONCURRENCY_LIMIT)
+    SLOTS = WeightedSlots()
+    SLOT_QUEUE = SlotQueue()
+    RESULT_CACHE = ResultCache()
+    IN_FLIGHT = InFlight()
+    metrics.REGISTRY.reset()
 
 
 def client_address():
@@ -367,10 +916,12 @@ def client_address():
 
 # -- structured aggregate logging -------------------------------------------
 
-def _emit_log(request_id, operation, outcome, status, duration):
-    """Emit the one aggregate record for a request. Only these six fields ever
+def _emit_log(request_id, operation, outcome, status, duration, queue_depth=0,
+              queue_wait=0.0):
+    """Emit the one aggregate record for a request. Only these eight fields ever
     appear -- never the brief, the address, the hash, headers, or a query
-    string."""
+    string. ``queue_depth``/``queue_wait`` are 0 unless the request waited in
+    the :class:`SlotQueue`."""
     logger.info(json.dumps({
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "request_id": request_id,
@@ -378,35 +929,57 @@ def _emit_log(request_id, operation, outcome, status, duration):
         "outcome": outcome,
         "status": status,
         "duration": duration,
+        "queue_depth": queue_depth,
+        "queue_wait": queue_wait,
     }))
 
 
 # -- the shared decorator ---------------------------------------------------
 
-def compute_endpoint(operation, contract, require_descriptor=False):
+def compute_endpoint(operation, contract, require_descriptor=False,
+                     cache_context=None, precheck=None, require_descriptors=False,
+                     deadline=None):
     """Wrap a public compute view in the full envelope.
 
     The wrapped function receives the already-parsed, already-validated brief
     dict and returns a ``(response, outcome)`` pair (use :func:`ok_json` /
     :func:`problem`). Everything before it -- media type, size, JSON, contract,
-    rate limit, concurrency -- and the single aggregate log line are handled
-    here, once, so ordering and the failure shape are defined in one place.
+    rate limit, result cache, concurrency -- and the single aggregate log line
+    are handled here, once, so ordering and the failure shape are defined in
+    one place. ``require_descriptor``/``require_descriptors`` are passed to
+    :meth:`BriefContract.validate`. ``cache_context`` is an optional
+    zero-argument callable whose result (the server's solver configuration) is
+    part of the cache key.
+    ``precheck`` is an optional slot-free callable taking the validated brief;
+    it returns a ``(response, outcome)`` pair to answer without running the
+    view, or ``None`` to carry on. ``deadline`` is an optional zero-argument
+    callable giving the operation's end-to-end deadline in seconds; only an
+    endpoint that has one may wait in the :data:`SLOT_QUEUE`, and its view must
+    take :func:`slot_wait` out of that deadline.
     """
     def decorator(view):
         @wraps(view)
         def wrapped(*args, **kwargs):
             start = time.monotonic()
             request_id = uuid.uuid4().hex
-            response, outcome = _run(view, operation, contract,
-                                     require_descriptor, args, kwargs)
+            required = {"require_descriptor": require_descriptor,
+                        "require_descriptors": require_descriptors}
+            g.queue_depth, g.slot_wait = 0, 0.0
+            response, outcome = _run(view, operation, contract, required,
+                                     cache_context, precheck, deadline, args, kwargs)
             duration = round(time.monotonic() - start, 6)
-            _emit_log(request_id, operation, outcome, response.status_code, duration)
+            _emit_log(request_id, operation, outcome, response.status_code, duration,
+                      g.queue_depth, g.slot_wait)
+            metrics.REQUESTS.inc(operation=operation, outcome=outcome,
+                                 status=response.status_code)
+            metrics.REQUEST_SECONDS.observe(duration, operation=operation)
             return response
         return wrapped
     return decorator
 
 
-def _run(view, operation, contract, require_descriptor, args, kwargs):
+def _run(view, operation, contract, required, cache_context, precheck, deadline,
+         args, kwargs):
     """Execute the ordered envelope and return `(response, outcome)`."""
     # 1. media type
     if request.mimetype != "application/json":
@@ -429,19 +1002,72 @@ def _run(view, operation, contract, require_descriptor, args, kwargs):
         return problem(400, "malformed_json")
 
     # 4. versioned brief contract
-    if contract.validate(data, require_descriptor=require_descriptor):
+    if contract.validate(data, **required):
         return problem(422, "invalid")
 
     # 5. per-visitor rate limit (one trusted hop)
     if not RATE_LIMITER.allow(client_address()):
         return problem(429, "rate_limited")
 
-    # 6. two-slot, no-queue concurrency ceiling
-    if not SLOTS.acquire(blocking=False):
+    # 6. result cache -- a repeat brief never takes a solver slot
+    cache = RESULT_CACHE
+    key = brief_key(operation, data,
+                    cache_context() if cache_context is not None else None)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    # 7. presolve -- a brief proven infeasible without a solve takes no slot
+    if precheck is not None:
+        try:
+            answered = precheck(data)
+        except Exception:  # never leak an internal failure's shape
+            return problem(500, "internal")
+        if answered is not None:
+            cache.put(key, *answered)
+            return answered
+
+    # 8. single flight -- a brief already being solved is waited on, within
+    # this request's own deadline (the solver's default one when the endpoint
+    # has none), rather than solved again
+    in_flight = IN_FLIGHT
+    flight, leading = in_flight.join(key)
+    if not leading:
+        return flight.wait(deadline() if deadline is not None
+                           else SolverConfig.request_deadline_seconds)
+    answer = problem(500, "internal")
+    try:
+        answer = _run_in_slot(view, operation, data, deadline, args, kwargs)
+    finally:
+        in_flight.finish(key, flight, *answer)
+    cache.put(key, *answer)
+    return answer
+
+
+def _run_in_slot(view, operation, data, deadline, args, kwargs):
+    """Admit ``data`` to solver capacity and run the view; `(response, outcome)`."""
+    # 9. cost-weighted two-slot ceiling. The request takes the slot units its
+    # predicted solve time needs (a full slot without a deadline). The
+    # operation's deadline starts once it holds them, so a queued request may
+    # wait only while enough of that deadline is left to run; the wait is then
+    # charged to it.
+    units, max_wait = None, 0.0
+    if deadline is not None:
+        seconds = deadline()
+        units = COST_MODEL.units(operation, data, seconds)
+        max_wait = seconds - SLOT_QUEUE_MIN_RUN_SECONDS
+    slots = SLOTS
+    acquired, g.queue_depth, g.slot_wait = SLOT_QUEUE.acquire(slots, max_wait, units)
+    if not acquired:
         return problem(503, "busy")
     try:
-        return view(data, *args, **kwargs)
+        with metrics.counting_solves(operation):
+            response, outcome = view(data, *args, **kwargs)
     except Exception:  # never leak an internal failure's shape
         return problem(500, "internal")
     finally:
-        SLOTS.release()
+        if units is None:
+            slots.release()
+        else:
+            slots.release(units)
+    return response, outcome
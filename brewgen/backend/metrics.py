@@ -0,0 +1,279 @@
+"""An in-process metrics registry for the compute envelope and the solver.
+
+``GET /metrics`` renders :data:`REGISTRY` in the Prometheus text exposition
+format (version 0.0.4), so the container and its slot count can be sized from
+measured load instead of blind. There is no client-library dependency: the
+three metric kinds below cover what the envelope records.
+
+* :class:`Counter` and :class:`Histogram` are updated as requests and solves
+  happen.
+* :class:`Gauge` reads a callback at scrape time. The envelope registers these
+  over its live state (slot units, queue, limiter buckets, result cache), so a
+  scrape never adds work to the request path.
+
+Like the aggregate log line, metrics carry **no brief contents and no
+addresses**. Labels are only ever the operation name, the stable outcome tag,
+the HTTP status and the solver backend -- each a small fixed set, so the
+series count stays bounded whatever callers send.
+
+Every value is per process. With several workers each renders its own; see
+``docs/anonymous-compute-envelope.md``.
+"""
+
+import contextvars
+import math
+import threading
+from contextlib import contextmanager
+
+from .solver import fermentables
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# End-to-end request seconds; the envelope's deadline is 2.0 s.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 5.0)
+# Seconds of one backend solve; the shared solver budget is 1.8 s.
+SOLVE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 1.8)
+# MILP solves one request ran; generation and batch ranges run the most.
+SOLVE_COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32)
+# Rows, columns or binaries of one solved model.
+MODEL_SIZE_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _number(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return "%d" % value
+    return repr(float(value))
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace("\n", "\\n")
+                     .replace('"', '\\"'))
+        for name, value in pairs)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError("%s takes labels %s" % (self.name, self.labelnames))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = ["# HELP %s %s" % (self.name, self.documentation),
+                 "# TYPE %s %s" % (self.name, self.kind)]
+        lines.extend(self._samples())
+        return lines
+
+    def reset(self):
+        pass
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return ["%s%s %s" % (self.name, _labels(self.labelnames, key), _number(value))
+                for key, value in values]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, with their sum and
+    count, per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}   # label key -> [per-bucket counts, sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry is not None else 0
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self):
+        with self._lock:
+            values = sorted((key, ([*counts], total, count))
+                            for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, hits in zip(self.buckets, counts):
+                cumulative += hits
+                lines.append("%s_bucket%s %d" % (
+                    self.name, _labels(self.labelnames, key, [("le", _number(bound))]),
+                    cumulative))
+            lines.append("%s_sum%s %s" % (self.name, _labels(self.labelnames, key),
+                                          _number(total)))
+            lines.append("%s_count%s %d" % (self.name, _labels(self.labelnames, key),
+                                            count))
+        return lines
+
+
+class Gauge(_Metric):
+    """A value read from ``callback`` at scrape time. ``kind`` may be
+    ``"counter"`` for a running total kept elsewhere, such as the result
+    cache's hit count. A callback that fails renders no sample rather than
+    failing the scrape."""
+
+    def __init__(self, name, documentation, callback, kind="gauge"):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self._callback = callback
+
+    def _samples(self):
+        try:
+            value = self._callback()
+        except Exception:
+            return []
+        return ["%s %s" % (self.name, _number(value))]
+
+
+class Registry:
+    """The metrics a scrape renders, in registration order."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError("metric %s is already registered" % metric.name)
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, buckets, labelnames=()):
+        return self.register(Histogram(name, documentation, buckets, labelnames))
+
+    def gauge(self, name, documentation, callback, kind="gauge"):
+        return self.register(Gauge(name, documentation, callback, kind))
+
+    def render(self):
+        """The exposition text for every registered metric."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Zero every counter and histogram. Only for tests."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    "brewgen_requests_total", "Compute requests by operation, outcome and status.",
+    ("operation", "outcome", "status"))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "brewgen_request_duration_seconds", "End-to-end compute request seconds.",
+    DURATION_BUCKETS, ("operation",))
+SOLVES_PER_REQUEST = REGISTRY.histogram(
+    "brewgen_request_solves", "MILP solves per request that ran its operation.",
+    SOLVE_COUNT_BUCKETS, ("operation",))
+SOLVE_SECONDS = REGISTRY.histogram(
+    "brewgen_solve_seconds", "Wall seconds of one backend MILP solve.",
+    SOLVE_BUCKETS, ("backend",))
+MODEL_ROWS = REGISTRY.histogram(
+    "brewgen_model_rows", "Constraints in each solved model.",
+    MODEL_SIZE_BUCKETS, ("backend",))
+MODEL_COLUMNS = REGISTRY.histogram(
+    "brewgen_model_columns", "Variables in each solved model.",
+    MODEL_SIZE_BUCKETS, ("backend",))
+MODEL_BINARIES = REGISTRY.histogram(
+    "brewgen_model_binaries", "Binary variables in each solved model.",
+    MODEL_SIZE_BUCKETS, ("backend",))
+
+# The current request's solve count; a one-item list, so a solve on another
+# thread running a copy of the request's context still adds to it.
+_solves = contextvars.ContextVar("brewgen_solves", default=None)
+_solves_lock = threading.Lock()
+
+
+@contextmanager
+def counting_solves(operation):
+    """Count the MILP solves run inside the block and record the total in
+    ``brewgen_request_solves`` for ``operation``."""
+    count = [0]
+    token = _solves.set(count)
+    try:
+        yield count
+    finally:
+        _solves.reset(token)
+        SOLVES_PER_REQUEST.observe(count[0], operation=operation)
+
+
+def observe_solve(backend, seconds, rows, columns, binaries):
+    """Record one backend solve; the solver calls this after each one."""
+    SOLVE_SECONDS.observe(seconds, backend=backend)
+    MODEL_ROWS.observe(rows, backend=backend)
+    MODEL_COLUMNS.observe(columns, backend=backend)
+    MODEL_BINARIES.observe(binaries, backend=backend)
+    count = _solves.get()
+    if count is not None:
+        with _solves_lock:
+            count[0] += 1
+
+
+fermentables.observe_solves(observe_solve)
@@ -0,0 +1,179 @@
+"""A precompiled snapshot of the shipped catalog data.
+
+Every worker builds its grain, category and style models from ``grains.json``,
+``categories.json``, ``styles.json`` and ``bjcp-2015.json`` -- about 3 MB of
+JSON, most of it per-style hop and sensory statistics the models never read.
+Running this module validates those files, keeps only the fields the models use,
+and writes them as one ``marshal`` file, ``data/catalog.snapshot``, which loads
+several times faster than parsing the JSON. The container image builds it; it is
+not committed.
+
+The snapshot records its format version, the interpreter's bytecode tag
+(``marshal`` is only guaranteed to round-trip within one Python version) and a
+SHA-256 of the source files. :func:`load` reads it at most once per process and
+falls back to the JSON whenever it is missing, unreadable, from another
+interpreter or built from different data, so a stale snapshot can never serve
+data the files do not contain.
+
+Usage:
+    python -m brewgen.backend.models.catalog
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import sys
+import threading
+
+SNAPSHOT_VERSION = 1
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "data")
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "catalog.snapshot")
+# Section name -> the shipped file it is built from.
+SOURCE_FILES = {
+    "grains": "grains.json",
+    "categories": "categories.json",
+    "styles": "styles.json",
+    "bjcp": "bjcp-2015.json",
+}
+
+_lock = threading.Lock()
+# (path, data_dir) -> marshalled snapshot sections, or None if the snapshot is
+# unusable.
+_loaded = {}
+
+
+def source_hash(data_dir=DATA_DIR):
+    """SHA-256 over the source files, in a fixed order."""
+    digest = hashlib.sha256()
+    for name in sorted(SOURCE_FILES.values()):
+        with open(os.path.join(data_dir, name), "rb") as f:
+            digest.update(name.encode("utf-8") + b"\0" + f.read() + b"\0")
+    return digest.hexdigest()
+
+
+def _read_json(name, data_dir):
+    with open(os.path.join(data_dir, SOURCE_FILES[name]), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _usage(usage):
+    return {"min": usage["min"], "max": usage["max"]}
+
+
+def _project(name, data):
+    """Validate one parsed source file and keep only the fields the models read.
+
+    The result has the file's own shape, so a model reads a snapshot section and
+    the raw JSON the same way. A missing field raises ``KeyError`` here, at
+    build time, rather than in a worker."""
+    if name == "grains":
+        return [{
+            "name": g["name"],
+            "brand": g["brand"],
+            "potential": g["potential"],
+            "color": g["color"],
+            "max_percent": g["max_percent"],
+            "category": g["category"],
+            "sensory": g["sensory"],
+        } for g in data]
+    if name == "categories":
+        return [{
+            "name": c["name"],
+            "min_percent": c["min_percent"],
+            "max_percent": c["max_percent"],
+        } for c in data]
+    if name == "styles":
+        return [{
+            "style": s["style"],
+            "fermentables": {
+                "grain_usage": [
+                    {"slug": g["slug"], "usage": _usage(g["usage"])}
+                    for g in s["fermentables"]["grain_usage"]],
+                "category_usage": [
+                    {"name": c["name"], "unique_fermentables": c["unique_fermentables"],
+                     "usage": _usage(c["usage"])}
+                    for c in s["fermentables"]["category_usage"]],
+                "sensory_data": [
+                    {"name": k["name"], "min": k["min"], "max": k["max"],
+                     "stats": {"mean": k["stats"]["mean"]}}
+                    for k in s["fermentables"]["sensory_data"]],
+                "unique_fermentables": s["fermentables"]["unique_fermentables"],
+            },
+            "hops": {"recipe": {"unique_hops": s["hops"]["recipe"]["unique_hops"]}},
+        } for s in data]
+    # The BJCP guide is read by subcategory name; only its beer classes are used.
+    return {"styleguide": {"class": [
+        bev_class for bev_class in data["styleguide"]["class"]
+        if bev_class["type"] == "beer"]}}
+
+
+def build(data_dir=DATA_DIR):
+    """Return the snapshot payload for the files in ``data_dir``."""
+    return {
+        "version": SNAPSHOT_VERSION,
+        "cache_tag": sys.implementation.cache_tag,
+        "source_hash": source_hash(data_dir),
+        # Each section is marshalled on its own so load() can hand every caller
+        # a fresh copy without rereading the file.
+        "sections": {name: marshal.dumps(_project(name, _read_json(name, data_dir)))
+                     for name in SOURCE_FILES},
+    }
+
+
+def write(path=SNAPSHOT_PATH, data_dir=DATA_DIR):
+    """Build the snapshot and write it to ``path`` atomically."""
+    payload = build(data_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        marshal.dump(payload, f)
+    os.replace(tmp, path)
+    return payload
+
+
+def _read_snapshot(path, data_dir):
+    try:
+        with open(path, "rb") as f:
+            payload = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if (not isinstance(payload, dict)
+            or payload.get("version") != SNAPSHOT_VERSION
+            or payload.get("cache_tag") != sys.implementation.cache_tag
+            or payload.get("source_hash") != source_hash(data_dir)):
+        return None
+    return payload["sections"]
+
+
+def load(name, path=None, data_dir=None):
+    """Return one catalog section: from the snapshot if it is current, otherwise
+    parsed from its JSON file.
+
+    ``path`` and ``data_dir`` default to :data:`SNAPSHOT_PATH` and
+    :data:`DATA_DIR`. The snapshot is read and checked once per process; every
+    call returns a fresh copy of the section, as parsing the JSON would."""
+    path = path or SNAPSHOT_PATH
+    data_dir = data_dir or DATA_DIR
+    key = (path, data_dir)
+    with _lock:
+        if key not in _loaded:
+            _loaded[key] = _read_snapshot(path, data_dir)
+        sections = _loaded[key]
+    if sections is not None:
+        return marshal.loads(sections[name])
+    return _read_json(name, data_dir)
+
+
+def reset():
+    """Forget the loaded snapshot so the next :func:`load` reads it again."""
+    with _lock:
+        _loaded.clear()
+
+
+if __name__ == "__main__":
+    snapshot = write()
+    print("wrote %s (%d bytes) for %s"
+          % (os.path.relpath(SNAPSHOT_PATH), os.path.getsize(SNAPSHOT_PATH),
+             ", ".join(sorted(snapshot["sections"]))), file=sys.stderr)
@@ -1,5 +1,4 @@
-import json
-import os.path
+from . import catalog
 
 
 class Category:
@@ -28,12 +27,7 @@ class CategoryModel:
         self.category_list = []
 
         # Populate grains_list with all details from the database as objects
-        path_list = os.path.abspath(__file__).split(os.sep)
-        script_directory = path_list[0:len(path_list)-2]
-        path = "/".join(script_directory) + "/data/categories.json"
-        with open(path, 'r', encoding='utf-8') as f:
-            category_data = json.load(f)
-        for category in category_data:
+        for category in catalog.load('categories'):
             self.category_list.append(Category(
                 name=category['name'],
                 unique_fermentable_count=None,
@@ -1,8 +1,7 @@
-import json
-import os.path
-
 from slugify import slugify
 
+from . import catalog
+
 
 class Grain:
     """Defines a grain and all of its properties."""
@@ -42,19 +41,20 @@ class Grain:
 
 
 class GrainModel:
-    """Defines a Grain Model, used to access data about grains in the grain database."""
+    """Defines a Grain Model, used to access data about grains in the grain database.
+
+    Grains are indexed by slug, name and category as the list is assigned, so
+    lookups cost one dict access instead of a scan of ``grain_list``. Assigning
+    ``grain_list`` or calling ``add_grain`` keeps the indexes current; mutate the
+    list only through those.
+    """
 
     def __init__(self):
-        self.grain_list = []
+        grain_list = []
 
         # Populate grains_list with all details from the database as objects
-        path_list = os.path.abspath(__file__).split(os.sep)
-        script_directory = path_list[0:len(path_list)-2]
-        path = "/".join(script_directory) + "/data/grains.json"
-        with open(path, 'r', encoding='utf-8') as f:
-            grain_data = json.load(f)
-        for grain in grain_data:
-            self.grain_list.append(Grain(
+        for grain in catalog.load('grains'):
+            grain_list.append(Grain(
                 name=grain['name'],
                 brand=grain['brand'],
                 potential=grain['potential'],
@@ -63,6 +63,27 @@ class GrainModel:
                 category=grain['category'],
                 sensory_data=grain['sensory']
             ))
+        self.grain_list = grain_list
+
+    @property
+    def grain_list(self):
+        return self._grain_list
+
+    @grain_list.setter
+    def grain_list(self, grain_list):
+        self._grain_list = grain_list
+        self._by_slug = {}
+        self._by_name = {}
+        self._by_category = {}
+        for grain in grain_list or []:
+            self._index(grain)
+
+    def _index(self, grain):
+        """Add a grain to the slug, name and category indexes. Each maps a key
+        to its grains in list order, so duplicates resolve as a scan would."""
+        self._by_slug.setdefault(grain.slug, []).append(grain)
+        self._by_name.setdefault(grain.name, []).append(grain)
+        self._by_category.setdefault(grain.category, []).append(grain)
 
     def get_grain_list(self):
         """Return a list of all grains as a list of dicts."""
@@ -70,41 +91,32 @@ class GrainModel:
 
     def get_grain_by_category(self, category):
         """Return a list of grain objects belonging to the specified categories."""
-        return [grain for grain in self.grain_list if grain.category in category]
+        matching = [name for name in self._by_category if name in category]
+        if len(matching) == 1:
+            return list(self._by_category[matching[0]])
+        return [grain for grain in self.grain_list if grain.category in matching]
 
     def get_grain_by_slug(self, grain_slug):
-        if type(grain_slug) is str:
-            result = [
-                grain for grain in self.grain_list if grain.slug == grain_slug]
-            if result:
-                return result[0]
-        elif type(grain_slug) is list:
-            result = []
-            for slug in grain_slug:
-                for grain in self.grain_list:
-                    if grain.slug == slug:
-                        result.append(grain)
-            if result:
-                return result
+        return self.__lookup(self._by_slug, grain_slug)
 
     def get_grain_by_name(self, grain_name):
-        if type(grain_name) is str:
-            result = [
-                grain for grain in self.grain_list if grain.name == grain_name]
+        return self.__lookup(self._by_name, grain_name)
+
+    def __lookup(self, index, key):
+        """Return the first grain for a single key, or every grain for a list of
+        keys in key order; None when nothing matches."""
+        if type(key) is str:
+            result = index.get(key)
             if result:
                 return result[0]
-        elif type(grain_name) is list:
-            result = []
-            for name in grain_name:
-                for grain in self.grain_list:
-                    if grain.name == name:
-                        result.append(grain)
+        elif type(key) is list:
+            result = [grain for k in key for grain in index.get(k, ())]
             if result:
                 return result
 
     def get_all_categories(self):
         """Return a list of unique grain categories."""
-        return list(set(grain.category for grain in self.grain_list))
+        return list(self._by_category)
 
     def get_sensory_keywords(self):
         """Return a list of unique sensory keywords, optionally filtered on a list of grains."""
@@ -131,14 +143,19 @@ class GrainList(GrainModel):
     Args:
         grain_objects (list): A list of grain objects used to initialize this object. If provided grain_slugs is ignored.
         grain_slugs (list): A list of grain slugs used to initialize this object
+        grain_model (GrainModel): The catalog grain_slugs are resolved against. Loaded from the
+            database if not provided.
+    With neither grain_objects nor grain_slugs, the list holds the whole catalog.
     """
 
-    def __init__(self, grain_objects=None, grain_slugs=None):
-        GrainModel.__init__(self)
+    def __init__(self, grain_objects=None, grain_slugs=None, grain_model=None):
         if grain_objects:
+            # The list is given outright; there is no need to load the catalog.
             self.grain_list = grain_objects
         elif grain_slugs:
-            self.grain_list = self.get_grain_by_slug(grain_slugs)
+            self.grain_list = (grain_model or GrainModel()).get_grain_by_slug(grain_slugs)
+        else:
+            GrainModel.__init__(self)
 
     def add_grain(self, grain):
         """Adds a grain to the grain list object.
@@ -147,6 +164,7 @@ class GrainList(GrainModel):
         """
         # TODO: Accept slug as well
         self.grain_list.append(grain)
+        self._index(grain)
 
 
 class GrainBill(GrainModel):
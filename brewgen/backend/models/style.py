@@ -1,14 +1,20 @@
-import json
-import os.path
 import re
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
 from slugify import slugify
-from . import grain, category
+from . import catalog, grain, category
+
+# Sentences about one keyword at least this similar (SequenceMatcher ratio, in
+# percent) are the same sentence; many BJCP aroma and flavor sentences nearly
+# repeat each other.
+SIMILAR_SENTENCE_RATIO = 80
 
 
 class Style:
     """Defines a style and all of its properties."""
 
-    def __init__(self, name, bjcp_id, bjcp_category, impression, aroma, appearance, flavor, mouthfeel, comments, history, ingredients, comparison, examples, tags, stats, grain_list, category_list, sensory_data, unique_fermentable_count, unique_hop_count):
+    def __init__(self, name, bjcp_id, bjcp_category, impression, aroma, appearance, flavor, mouthfeel, comments, history, ingredients, comparison, examples, tags, stats, grain_list, category_list, sensory_data, unique_fermentable_count, unique_hop_count, sensory_keywords=None, bjcp_cache=None):
         self.name = name
         self.slug = slugify(name, replacements=[["'", ''], ['®', '']])
         self.id = bjcp_id
@@ -31,9 +37,11 @@ class Style:
         self.unique_fermentable_count = unique_fermentable_count
         self.unique_hop_count = unique_hop_count
         self.exceptions = self.stats.get('exceptions', None)
-
-    def __contains_word(self, string, word):
-        return re.compile(r'\b({0}..?)\b'.format(word), flags=re.IGNORECASE).search(string)
+        # The grain sensory keywords to look for in the BJCP text, and where the
+        # extracted sentences are memoized; StyleModel passes both so they are
+        # shared across rebuilds of the same style.
+        self.__sensory_keywords = sensory_keywords
+        self.__bjcp_cache = {} if bjcp_cache is None else bjcp_cache
 
     def get_style_data(self):
         """Return the style in dict format"""
@@ -133,144 +141,276 @@ class Style:
             }
 
     def get_bjcp_sensory_descriptors(self):
-        """Return sensory descriptors mentioned in the BJCP data."""
-        grain_model = grain.GrainModel()
-        keywords = grain_model.get_sensory_keywords()
-        aroma = {}
-        flavor = {}
-        aroma_sentences = self.aroma.split('.')
-        flavor_sentences = self.flavor.split('.')
-
-        for slug in keywords:
-            keyword = slug.replace('_', ' ')
-
-            aroma_keyword_sentences = []
-            flavor_keyword_sentences = []
-
-            for sentence in aroma_sentences:
-                if self.__contains_word(sentence, keyword):
-                    aroma_keyword_sentences.append(sentence.strip() + '.')
-
-            for sentence in flavor_sentences:
-                if self.__contains_word(sentence, keyword):
-                    flavor_keyword_sentences.append(sentence.strip() + '.')
-
-            if len(aroma_keyword_sentences) > 0:
-                aroma[slug] = aroma_keyword_sentences
-
-            if len(flavor_keyword_sentences) > 0:
-                flavor[slug] = flavor_keyword_sentences
-
+        """Return sensory descriptors mentioned in the BJCP data.
+
+        Computed on first use and memoized; the result is shared, so do not modify it."""
+        descriptors = self.__bjcp_cache.get('descriptors')
+        if descriptors is None:
+            descriptors = self.__bjcp_cache['descriptors'] = self.__extract_bjcp_sensory()
+        return descriptors
+
+    def get_bjcp_sensory_sentences(self):
+        """Return {keyword: [sentences]} from the BJCP aroma and flavor text, aroma first,
+        with sentences nearly identical to an earlier one removed.
+
+        Computed on first use and memoized; the result is shared, so do not modify it."""
+        sentences = self.__bjcp_cache.get('sentences')
+        if sentences is None:
+            descriptors = self.get_bjcp_sensory_descriptors()
+            sentences = {}
+            for keyword in set(descriptors['aroma']) | set(descriptors['flavor']):
+                sentences[keyword] = _drop_similar(
+                    descriptors['aroma'].get(keyword, []) + descriptors['flavor'].get(keyword, []))
+            self.__bjcp_cache['sentences'] = sentences
+        return sentences
+
+    def __extract_bjcp_sensory(self):
+        keywords = self.__sensory_keywords
+        if keywords is None:
+            keywords = grain.GrainModel().get_sensory_keywords()
+        matcher = keyword_matcher(keywords)
         return {
-            'aroma': aroma,
-            'flavor': flavor
+            'aroma': matcher.sentences_by_keyword(self.aroma),
+            'flavor': matcher.sentences_by_keyword(self.flavor)
         }
 
 
-class StyleModel:
-    """Defines a Style Model, used to access data about styles in the style database."""
-
-    def __init__(self):
-        self.style_list = []
-
-        # Populate grains_list with all details from the database as objects
-        path_list = os.path.abspath(__file__).split(os.sep)
-        script_directory = path_list[0:len(path_list)-2]
-        style_usage_path = "/".join(script_directory) + "/data/styles.json"
-        bjcp_path = "/".join(script_directory) + "/data/bjcp-2015.json"
-        
-        with open(bjcp_path, 'r', encoding='utf-8') as f:
-            self.bjcp_data = json.load(f)
+class KeywordMatcher:
+    """Finds which sensory keywords each sentence of a text mentions, in one scan.
+
+    A keyword is a grain sensory slug, matched with its underscores as spaces and
+    case-insensitively, where it starts at a word boundary and is followed by one
+    or two more characters and a word boundary -- so ``malty`` matches "malty",
+    "malty," and "malty flavor". All the keywords are compiled into one pattern:
+    at each word boundary, a required lookahead rejects the position unless some
+    keyword starts there, and one optional lookahead per keyword records every
+    keyword that matches there, overlapping ones included.
+    Args:
+        keywords (list): Sensory keyword slugs, in the order results are reported.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        words = [slug.replace('_', ' ') for slug in self.keywords]
+        any_word = '|'.join(words)
+        each_word = ''.join(r'(?=({0}..?)\b|)'.format(word) for word in words)
+        self.pattern = re.compile(r'\b(?=(?:{0}))'.format(any_word) + each_word,
+                                  flags=re.IGNORECASE)
+
+    def mentions(self, sentence):
+        """Return the set of keyword positions (indexes into keywords) mentioned in sentence."""
+        found = set()
+        for match in self.pattern.finditer(sentence):
+            found.update(i for i, group in enumerate(match.groups()) if group is not None)
+        return found
+
+    def sentences_by_keyword(self, text):
+        """Split text into sentences on '.' and return {keyword: [sentences]} for every
+        keyword mentioned, in keyword order, each sentence stripped and re-terminated."""
+        by_position = {}
+        for sentence in text.split('.'):
+            for i in self.mentions(sentence):
+                by_position.setdefault(i, []).append(sentence.strip() + '.')
+        return {self.keywords[i]: by_position[i] for i in sorted(by_position)}
+
+
+_matchers = {}
+
+
+def keyword_matcher(keywords):
+    """Return the KeywordMatcher for a keyword list, compiling it once."""
+    key = tuple(keywords)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = _matchers[key] = KeywordMatcher(key)
+    return matcher
+
+
+def _drop_similar(sentences):
+    """Return sentences in order, without any at least SIMILAR_SENTENCE_RATIO similar
+    to an earlier kept one. Exact repeats are not compared, so they are kept."""
+    kept = []
+    for sentence in sentences:
+        seq = SequenceMatcher()
+        seq.set_seq2(sentence.lower())
+        for earlier in kept:
+            if earlier == sentence:
+                continue
+            seq.set_seq1(earlier.lower())
+            if seq.ratio() * 100 >= SIMILAR_SENTENCE_RATIO:
+                break
+        else:
+            kept.append(sentence)
+    return kept
 
-        with open(style_usage_path, 'r', encoding='utf-8') as f:
-            style_data = json.load(f)
 
-        for style in style_data:
+class StyleModel:
+    """Defines a Style Model, used to access data about styles in the style database.
+
+    Only a light index -- each style's name, slug, BJCP category and stats -- is
+    built up front. A full ``Style``, with its grain list, category usage,
+    sensory data and BJCP prose, is built the first time it is asked for and
+    kept in a bounded least-recently-used cache, so a worker holds only the
+    styles it is actually serving.
+    Args:
+        grain_model (GrainModel): The grain catalog to resolve style grains against. Pass the
+            caller's own instance to share it; by default one is loaded for this model.
+        cache_size (int): The most fully built styles kept at once.
+    """
+
+    def __init__(self, grain_model=None, cache_size=16):
+        self.grain_model = grain_model or grain.GrainModel()
+        self.cache_size = cache_size
+        self.__cache = OrderedDict()
+        self.__cache_lock = threading.Lock()
+        self.__sensory_keywords = self.grain_model.get_sensory_keywords()
+
+        # Index every style from the database; the raw usage record is kept to
+        # build the full Style from later.
+        self.bjcp_data = catalog.load('bjcp')
+        self.__bjcp_index = self.__build_bjcp_index()
+        self.__index = []
+        self.__by_slug = {}
+        for style in catalog.load('styles'):
             bjcp_style = self.__bjcp_lookup(style['style'])
             bjcp_category = self.__bjcp_lookup(
                 style['style'], return_category=True)
-            style_grain_list = []
-            style_category_list = []
-            style_sensory_data = []
-
-            for grain_data in style['fermentables']['grain_usage']:
-                matching_grain = grain.GrainModel.get_grain_by_slug(
-                    grain.GrainModel(), grain_data['slug'])
-                style_grain_list.append(grain.Grain(
-                    name=matching_grain.name,
-                    brand=matching_grain.brand,
-                    potential=matching_grain.potential,
-                    color=matching_grain.color,
-                    min_percent=grain_data['usage']['min'],
-                    max_percent=grain_data['usage']['max'],
-                    category=matching_grain.category,
-                    sensory_data=matching_grain.sensory_data
-                ))
-
-            for category_data in style['fermentables']['category_usage']:
-                style_category_list.append(category.Category(
-                    name=category_data['name'],
-                    unique_fermentable_count=category_data['unique_fermentables'],
-                    min_percent=category_data['usage']['min'],
-                    max_percent=category_data['usage']['max']
-                ))
-
-            for sensory_keyword in style['fermentables']['sensory_data']:
-                style_sensory_data.append({
-                    'name': sensory_keyword['name'],
-                    'min': sensory_keyword['min'],
-                    'max': sensory_keyword['max'],
-                    'mean': sensory_keyword['stats']['mean']
-                })
-
-            self.style_list.append(Style(
-                # Remove Historical Beer:, Specialty IPA: etc from start of names
-                name=style['style'].split(':')[-1].strip(),
-                bjcp_id=bjcp_style.get('id'),
-                bjcp_category=bjcp_category.get('name'),
-                impression=bjcp_style.get('impression'),
-                aroma=bjcp_style.get('aroma'),
-                appearance=bjcp_style.get('appearance'),
-                flavor=bjcp_style.get('flavor'),
-                mouthfeel=bjcp_style.get('mouthfeel'),
-                comments=bjcp_style.get('comments'),
-                history=bjcp_style.get('history'),
-                ingredients=bjcp_style.get('ingredients'),
-                comparison=bjcp_style.get('comparison'),
-                examples=bjcp_style.get('examples'),
-                tags=bjcp_style.get('tags'),
-                stats=bjcp_style.get('stats'),
-                grain_list=grain.GrainList(style_grain_list),
-                category_list=style_category_list,
-                sensory_data=style_sensory_data,
-                unique_fermentable_count=style['fermentables']['unique_fermentables'],
-                unique_hop_count=style['hops']['recipe']['unique_hops']
+            # Remove Historical Beer:, Specialty IPA: etc from start of names
+            name = style['style'].split(':')[-1].strip()
+            slug = slugify(name, replacements=[["'", ''], ['®', '']])
+            self.__by_slug.setdefault(slug, len(self.__index))
+            self.__index.append({
+                'name': name,
+                'slug': slug,
+                'category': bjcp_category.get('name'),
+                'stats': bjcp_style.get('stats'),
+                'record': style,
+                'bjcp_style': bjcp_style,
+                # BJCP sensory extraction, memoized by the Style across rebuilds.
+                'bjcp_cache': {},
+            })
+
+    @property
+    def style_list(self):
+        """Every style, fully built. This materializes the whole database; prefer
+        the index methods or get_style_by_slug where they will do."""
+        return [self.__get(position) for position in range(len(self.__index))]
+
+    def __get(self, position):
+        """Return the full Style at an index position, building it on a miss."""
+        with self.__cache_lock:
+            style_object = self.__cache.get(position)
+            if style_object is not None:
+                self.__cache.move_to_end(position)
+                return style_object
+        style_object = self.__build_style(self.__index[position])
+        with self.__cache_lock:
+            self.__cache[position] = style_object
+            self.__cache.move_to_end(position)
+            while len(self.__cache) > self.cache_size:
+                self.__cache.popitem(last=False)
+        return style_object
+
+    def __build_style(self, entry):
+        style = entry['record']
+        bjcp_style = entry['bjcp_style']
+        style_grain_list = []
+        style_category_list = []
+        style_sensory_data = []
+
+        for grain_data in style['fermentables']['grain_usage']:
+            matching_grain = self.grain_model.get_grain_by_slug(
+                grain_data['slug'])
+            style_grain_list.append(grain.Grain(
+                name=matching_grain.name,
+                brand=matching_grain.brand,
+                potential=matching_grain.potential,
+                color=matching_grain.color,
+                min_percent=grain_data['usage']['min'],
+                max_percent=grain_data['usage']['max'],
+                category=matching_grain.category,
+                sensory_data=matching_grain.sensory_data
             ))
 
-    def __bjcp_lookup(self, name, return_category=False):
-        """Return bjcp data for a style name"""
+        for category_data in style['fermentables']['category_usage']:
+            style_category_list.append(category.Category(
+                name=category_data['name'],
+                unique_fermentable_count=category_data['unique_fermentables'],
+                min_percent=category_data['usage']['min'],
+                max_percent=category_data['usage']['max']
+            ))
+
+        for sensory_keyword in style['fermentables']['sensory_data']:
+            style_sensory_data.append({
+                'name': sensory_keyword['name'],
+                'min': sensory_keyword['min'],
+                'max': sensory_keyword['max'],
+                'mean': sensory_keyword['stats']['mean']
+            })
+
+        return Style(
+            name=entry['name'],
+            bjcp_id=bjcp_style.get('id'),
+            bjcp_category=entry['category'],
+            impression=bjcp_style.get('impression'),
+            aroma=bjcp_style.get('aroma'),
+            appearance=bjcp_style.get('appearance'),
+            flavor=bjcp_style.get('flavor'),
+            mouthfeel=bjcp_style.get('mouthfeel'),
+            comments=bjcp_style.get('comments'),
+            history=bjcp_style.get('history'),
+            ingredients=bjcp_style.get('ingredients'),
+            comparison=bjcp_style.get('comparison'),
+            examples=bjcp_style.get('examples'),
+            tags=bjcp_style.get('tags'),
+            stats=entry['stats'],
+            grain_list=grain.GrainList(style_grain_list),
+            category_list=style_category_list,
+            sensory_data=style_sensory_data,
+            unique_fermentable_count=style['fermentables']['unique_fermentables'],
+            unique_hop_count=style['hops']['recipe']['unique_hops'],
+            sensory_keywords=self.__sensory_keywords,
+            bjcp_cache=entry['bjcp_cache']
+        )
+
+    def __build_bjcp_index(self):
+        """Map each beer subcategory name to (subcategory, category), keeping the
+        first occurrence of a repeated name."""
+        index = {}
         for bev_class in self.bjcp_data['styleguide']['class']:
             if bev_class['type'] == 'beer':
                 for style_category in bev_class['category']:
                     for subcat in style_category['subcategory']:
-                        if subcat['name'] == name:
-                            if not return_category:
-                                return subcat
-                            else:
-                                return style_category
+                        index.setdefault(subcat['name'], (subcat, style_category))
+        return index
+
+    def __bjcp_lookup(self, name, return_category=False):
+        """Return bjcp data for a style name"""
+        match = self.__bjcp_index.get(name)
+        if match:
+            return match[1] if return_category else match[0]
 
     def get_style_names(self):
         """Return a list of style names"""
-        return [style.name for style in self.style_list]
+        return [entry['name'] for entry in self.__index]
 
     def get_style_slugs(self):
         """Return a list of style names"""
-        return [style.slug for style in self.style_list]
+        return [entry['slug'] for entry in self.__index]
 
     def get_style_names_and_slugs(self):
-        return [{'name': style.name, 'slug': style.slug} for style in self.style_list]
+        return [{'name': entry['name'], 'slug': entry['slug']} for entry in self.__index]
+
+    def get_style_summaries(self):
+        """Return each style's name, slug, BJCP category and stats, without building it."""
+        return [{
+            'name': entry['name'],
+            'slug': entry['slug'],
+            'category': entry['category'],
+            'stats': entry['stats']
+        } for entry in self.__index]
 
     def get_style_by_slug(self, style_slug):
-        for style in self.style_list:
-            if style.slug == style_slug:
-                return style
+        position = self.__by_slug.get(style_slug)
+        if position is not None:
+            return self.__get(position)
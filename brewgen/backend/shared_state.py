@@ -0,0 +1,267 @@
+"""Host-wide rate-limit and concurrency state for running several workers.
+
+The envelope's :class:`~brewgen.backend.envelope.RateLimiter` and two-slot
+semaphore live in one process, which is why the container runs a single
+gunicorn worker. The classes here keep the same state in a directory shared by
+every worker on the host, so the per-visitor budget and the solver ceiling hold
+across workers. They are enabled by setting ``BREWGEN_SHARED_STATE_DIR`` (see
+:func:`brewgen.backend.envelope.new_state`).
+
+* :class:`SharedRateLimiter` keeps the token buckets in a fixed-size,
+  memory-mapped hash table guarded by ``flock``. The buckets are keyed exactly
+  as in the in-process limiter, by a SHA-256 of a daily-rotated random salt and
+  the address, and the table is wiped when the salt rotates. Only the salt and
+  the truncated hashes are stored. **The directory must be on a memory-backed
+  filesystem** (``/dev/shm`` or a ``--tmpfs`` mount) so they never reach disk.
+* :class:`SharedSlots` is a drop-in for ``threading.BoundedSemaphore``. Each slot
+  is an ``flock`` on its own lock file. The kernel drops the lock when its
+  holder exits, so a crashed worker can never leak a slot.
+
+Both classes reopen their files after a ``fork`` so that workers forked from a
+preloaded app never share a lock with their parent. Refill and expiry use
+``time.monotonic``, which is one system-wide clock on Linux, so every worker
+reads the same time.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import secrets
+import struct
+import threading
+import time
+
+RATE_TABLE_SLOTS = 65_536       # bucket slots in the shared table (2 MiB)
+RATE_PROBE_WINDOW = 64          # slots a visitor's bucket may sit past its home slot
+SLOT_POLL_SECONDS = 0.005       # how often a blocking SharedSlots.acquire retries
+
+_MAGIC = b"BGRL"
+_LAYOUT_VERSION = 1
+# magic, layout version, table slots, salt day, salt
+_HEADER = struct.Struct("<4sIIxxxxq16s")
+# truncated address hash, tokens, last seen; an all-zero hash marks a never-used slot
+_BUCKET = struct.Struct("<16sdd")
+_EMPTY = bytes(16)
+
+
+def _open(path, mode=0o600):
+    return os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_CLOEXEC", 0), mode)
+
+
+class SharedRateLimiter:
+    """The per-visitor token bucket of :class:`~brewgen.backend.envelope.RateLimiter`,
+    shared by every process that opens the same ``directory``.
+
+    A visitor's bucket lives in the first matching slot within
+    ``RATE_PROBE_WINDOW`` slots of its hash. Another visitor may take over a
+    slot only when its bucket has expired or has refilled to ``burst``, since a
+    full bucket is the same as a fresh one. So reuse never grants anyone extra
+    requests. If every slot in a new visitor's window holds a live, partly spent
+    bucket, the request is refused rather than losing one of those budgets.
+    With the default table that needs thousands of visitors spending in the same
+    twenty-second refill window.
+    """
+
+    def __init__(self, directory, per_minute, burst, idle_expiry,
+                 clock=time.monotonic, day_clock=time.time,
+                 slots=RATE_TABLE_SLOTS, window=RATE_PROBE_WINDOW):
+        self.path = os.path.join(directory, "rate-limit.table")
+        self._refill_per_second = per_minute / 60.0
+        self._capacity = burst
+        self._idle_expiry = idle_expiry
+        self._clock = clock
+        self._day_clock = day_clock
+        self._slots = slots
+        self._window = min(window, slots)
+        self._size = _HEADER.size + slots * _BUCKET.size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def allow(self, address):
+        """Charge one request to ``address``; return True if within budget."""
+        with self._lock:
+            self._ensure_open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = self._clock()
+                salt = self._rotate_salt_if_needed()
+                return self._charge(self._hash(salt, address), now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def bucket_count(self):
+        """Slots holding a bucket in the shared table, idle ones included until
+        reused or wiped by the daily salt rotation."""
+        with self._lock:
+            self._ensure_open()
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                table = self._map[_HEADER.size:]
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return sum(1 for held, _tokens, _last in _BUCKET.iter_unpack(table)
+                   if held != _EMPTY)
+
+    def _charge(self, key, now):
+        table = self._map
+        cutoff = now - self._idle_expiry
+        home = int.from_bytes(key[:8], "little") % self._slots
+        free = None
+        for step in range(self._window):
+            offset = _HEADER.size + (home + step) % self._slots * _BUCKET.size
+            held, tokens, last = _BUCKET.unpack_from(table, offset)
+            if held == key:
+                if last < cutoff:
+                    tokens = self._capacity  # idle past expiry: a fresh bucket
+                else:
+                    tokens = min(self._capacity,
+                                 tokens + (now - last) * self._refill_per_second)
+                break
+            if held == _EMPTY:
+                # Slots are only ever emptied all at once, on salt rotation, so
+                # the first never-used slot ends this visitor's probe sequence.
+                if free is None:
+                    free = offset
+                offset, tokens = free, self._capacity
+                break
+            if free is None and (last < cutoff or tokens + (
+                    now - last) * self._refill_per_second >= self._capacity):
+                free = offset
+        else:
+            if free is None:
+                return False  # every nearby bucket is live: fail closed
+            offset, tokens = free, self._capacity
+        allowed = tokens >= 1
+        _BUCKET.pack_into(table, offset, key, tokens - 1 if allowed else tokens, now)
+        return allowed
+
+    @staticmethod
+    def _hash(salt, address):
+        digest = hashlib.sha256()
+        digest.update(salt.hex().encode("utf-8"))
+        digest.update(b"|")
+        digest.update(str(address).encode("utf-8"))
+        return digest.digest()[:16]
+
+    def _rotate_salt_if_needed(self):
+        """Return today's salt, drawing a new one and wiping every bucket when
+        the day has changed since the table's salt was drawn."""
+        _magic, _version, _slots, salt_day, salt = _HEADER.unpack_from(self._map, 0)
+        day = int(self._day_clock() // 86_400)
+        if day != salt_day:
+            salt = secrets.token_bytes(16)
+            self._map[_HEADER.size:] = bytes(self._size - _HEADER.size)
+            _HEADER.pack_into(self._map, 0, _MAGIC, _LAYOUT_VERSION, self._slots,
+                              day, salt)
+        return salt
+
+    def _ensure_open(self):
+        """Map the table, creating or resetting it if it has another layout."""
+        if self._pid == os.getpid():
+            return
+        if self._map is not None:  # forked: drop the parent's descriptor
+            self._map.close()
+            os.close(self._fd)
+        fd = _open(self.path)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size != self._size or not self._matches(fd):
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, self._size)
+                # salt day -1 never matches, so the first charge draws a salt
+                os.pwrite(fd, _HEADER.pack(_MAGIC, _LAYOUT_VERSION, self._slots,
+                                           -1, bytes(16)), 0)
+            table = mmap.mmap(fd, self._size)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd, self._map, self._pid = fd, table, os.getpid()
+
+    def _matches(self, fd):
+        header = os.pread(fd, _HEADER.size, 0)
+        magic, version, slots, _day, _salt = _HEADER.unpack(header)
+        return (magic, version, slots) == (_MAGIC, _LAYOUT_VERSION, self._slots)
+
+
+class SharedSlots:
+    """A host-wide counting semaphore of ``limit`` slots, each split into
+    ``units_per_slot`` units, with the ``acquire``/``release`` interface of
+    ``threading.BoundedSemaphore`` plus a ``units`` argument (a full slot when
+    omitted), as in :class:`~brewgen.backend.envelope.WeightedSlots`.
+
+    Unit ``i`` is held by an exclusive ``flock`` on ``slot-<i>.lock``, and a
+    request takes all of its units or none. Threads of one process share the
+    instance's descriptors, so the instance also tracks which units its own
+    threads hold. Releasing more than were acquired raises ``ValueError``, as
+    ``BoundedSemaphore`` does."""
+
+    def __init__(self, directory, limit, units_per_slot=1):
+        self.units_per_slot = units_per_slot
+        self.paths = [os.path.join(directory, "slot-%d.lock" % index)
+                      for index in range(limit * units_per_slot)]
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fds = []
+        self._held = []
+
+    def acquire(self, blocking=True, timeout=None, units=None):
+        """Take ``units`` free units; return False if they do not free up in time."""
+        units = self.units_per_slot if units is None else units
+        if not blocking:
+            return self._try_acquire(units)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire(units):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(SLOT_POLL_SECONDS)
+        return True
+
+    def __enter__(self):
+        return self.acquire()
+
+    def release(self, units=None):
+        units = self.units_per_slot if units is None else units
+        with self._lock:
+            if len(self._held) < units or self._pid != os.getpid():
+                raise ValueError("Semaphore released too many times")
+            for _ in range(units):
+                fcntl.flock(self._fds[self._held.pop()], fcntl.LOCK_UN)
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def in_use(self):
+        """Units this process's threads hold. Other workers' units are not
+        counted: finding them would mean contending for their locks."""
+        with self._lock:
+            return len(self._held) if self._pid == os.getpid() else 0
+
+    def _try_acquire(self, units):
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked child opens its own descriptors: one inherited from the
+                # parent would share, not contend for, the parent's locks.
+                for fd in self._fds:
+                    os.close(fd)
+                self._fds = [_open(path) for path in self.paths]
+                self._held = []
+                self._pid = os.getpid()
+            taken = []
+            for index, fd in enumerate(self._fds):
+                if len(taken) == units:
+                    break
+                if index in self._held:
+                    continue
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                taken.append(index)
+            if len(taken) < units:
+                for index in taken:  # all or nothing
+                    fcntl.flock(self._fds[index], fcntl.LOCK_UN)
+                return False
+            self._held.extend(taken)
+            return True
@@ -1,6 +1,6 @@
 """Flask-independent fermentables solver (color math + bounded PuLP MILP)."""
 
-from . import color
+from . import backends, color, heuristic
 from .fermentables import (
     Bill,
     FermentableSolver,
@@ -10,7 +10,9 @@ from .fermentables import (
 )
 
 __all__ = [
+    "backends",
     "color",
+    "heuristic",
     "Bill",
     "FermentableSolver",
     "GenerationResult",
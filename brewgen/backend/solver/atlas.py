@@ -0,0 +1,102 @@
+"""The precomputed per-style sensory range atlas.
+
+For a style's unmodified seed -- its ``grain_usage`` and ``category_usage`` from
+``styles.json`` with no sensory bounds and no color band -- every descriptor's
+min/max is a pure function of the shipped data. ``scripts/build_sensory_atlas.py``
+runs :meth:`FermentableSolver.sensory_ranges` for every style once, offline,
+and commits the result as ``data/sensory-atlas.json``; the API then answers
+those seeds with zero solver work.
+
+The atlas records a hash of the data files it was built from. If the shipped
+data changes without a rebuild, :func:`load` returns an empty atlas and every
+request falls through to the solver, so a stale atlas can never serve a range
+the current data would not produce.
+"""
+
+import hashlib
+import json
+import os
+
+ATLAS_VERSION = 1
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "data")
+ATLAS_PATH = os.path.join(DATA_DIR, "sensory-atlas.json")
+# The shipped files every seed range is a function of.
+SOURCE_FILES = ("grains.json", "styles.json")
+
+
+def data_hash(data_dir=DATA_DIR):
+    """SHA-256 over the shipped source files, in a fixed order."""
+    digest = hashlib.sha256()
+    for name in SOURCE_FILES:
+        with open(os.path.join(data_dir, name), "rb") as f:
+            digest.update(name.encode("utf-8") + b"\0" + f.read() + b"\0")
+    return digest.hexdigest()
+
+
+def seed_key(data):
+    """Return the atlas key of a brief, or None if it is not a bare seed.
+
+    A bare seed has no sensory bounds and no beer profile (so no color band),
+    which is exactly the model the atlas was solved under. The key is a hash of
+    the canonical grain usage (slug order), category usage (name order) and
+    grain cap; numbers are compared as floats so ``5`` and ``5.0`` agree."""
+    if data.get("sensory_model") or data.get("beer_profile"):
+        return None
+    fermentables = sorted(
+        [item["slug"], float(item["min_percent"]), float(item["max_percent"])]
+        for item in data.get("fermentable_list", []))
+    categories = sorted(
+        [cat["name"], float(cat["min_percent"]), float(cat["max_percent"]),
+         None if cat.get("unique_fermentable_count") is None
+         else float(cat["unique_fermentable_count"])]
+        for cat in data.get("category_model") or [])
+    canonical = json.dumps({
+        "fermentables": fermentables,
+        "categories": categories,
+        "max_unique": float(data.get("max_unique_fermentables", 4)),
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SensoryAtlas:
+    """Seed key -> ``{style, ranges}``, where ``ranges`` maps each descriptor
+    to ``[min, max]``, or is None for a seed with no feasible bill."""
+
+    def __init__(self, seeds=None):
+        self.seeds = dict(seeds or {})
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def ranges(self, data):
+        """Return ``(found, ranges)`` for a brief.
+
+        ``found`` is False when the brief is not an atlas seed; otherwise
+        ``ranges`` is the seed's descriptor->``[min, max]`` mapping, or None if
+        the seed admits no bill."""
+        key = seed_key(data)
+        if key is None or key not in self.seeds:
+            return False, None
+        return True, self.seeds[key]["ranges"]
+
+    def for_style(self, slug):
+        """The recorded ranges for one style's seed, or None."""
+        for entry in self.seeds.values():
+            if entry["style"] == slug:
+                return entry["ranges"]
+        return None
+
+
+def load(path=ATLAS_PATH, data_dir=DATA_DIR):
+    """Load the atlas, or an empty one if it is missing, from another version,
+    or built from different data."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return SensoryAtlas()
+    if payload.get("version") != ATLAS_VERSION or payload.get("data_hash") != data_hash(data_dir):
+        return SensoryAtlas()
+    return SensoryAtlas(payload.get("seeds"))
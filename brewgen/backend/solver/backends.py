@@ -0,0 +1,87 @@
+"""Pluggable MILP backends for the fermentables solver.
+
+Every solve the fermentables solver performs goes through one backend, picked
+by name from :class:`~brewgen.backend.solver.fermentables.SolverConfig`. Each
+backend runs the same PuLP model with one deterministic, single-threaded
+configuration and leaves the problem's status and variable values set exactly
+as :meth:`pulp.LpProblem.solve` does, so the solver reads results the same way
+regardless of which one ran.
+
+A solve may be warm-started: the caller sets a complete, feasible starting
+point with :meth:`pulp.LpVariable.setInitialValue` and passes
+``warm_start=True``, and the backend hands those values to the solver as its
+first incumbent. Variables whose value is ``None`` are left to the solver.
+
+* ``"cbc"`` -- PuLP's bundled CBC binary. Forks one process per solve and
+  round-trips the model through ``.mps``/``.sol`` files in the temp directory.
+  Always available; the default.
+* ``"highs"`` -- HiGHS through its in-process ``highspy`` library API. No
+  subprocess and no temp files. Needs the optional ``highspy`` dependency
+  (``pip install ".[highs]"``).
+"""
+
+import pulp
+
+
+class CbcCommandBackend:
+    """CBC run as a subprocess through ``pulp.PULP_CBC_CMD``."""
+
+    name = "cbc"
+
+    def available(self):
+        return pulp.PULP_CBC_CMD(msg=0).available()
+
+    def solve(self, prob, time_limit, warm_start=False):
+        """Solve ``prob`` under ``time_limit`` seconds; return the PuLP status."""
+        return prob.solve(pulp.PULP_CBC_CMD(msg=0, threads=1, timeLimit=time_limit,
+                                            warmStart=warm_start))
+
+
+class HighsBackend:
+    """HiGHS run in-process through ``pulp.HiGHS`` and ``highspy``."""
+
+    name = "highs"
+
+    def available(self):
+        return pulp.HiGHS(msg=False).available()
+
+    def solve(self, prob, time_limit, warm_start=False):
+        """Solve ``prob`` under ``time_limit`` seconds; return the PuLP status."""
+        solver = _WarmHighs if warm_start else pulp.HiGHS
+        return prob.solve(solver(msg=False, threads=1, timeLimit=time_limit))
+
+
+class _WarmHighs(pulp.HiGHS):
+    """``pulp.HiGHS`` that passes the variables' initial values to HiGHS as a
+    starting solution; PuLP's own HiGHS interface has no warm start."""
+
+    def callSolver(self, lp):
+        start = [(var.index, var.varValue) for var in lp.variables()
+                 if var.varValue is not None]
+        if start:
+            indices, values = zip(*start)
+            lp.solverModel.setSolution(len(start), list(indices), list(values))
+        super().callSolver(lp)
+
+
+BACKENDS = {backend.name: backend for backend in (CbcCommandBackend(), HighsBackend())}
+
+# name -> availability, probed once per process rather than on every solve.
+_available = {}
+
+
+def get_backend(name):
+    """Return the backend registered as ``name``.
+
+    Raises ``ValueError`` for an unknown name and ``RuntimeError`` when the
+    backend's optional dependency is not installed, so a misconfigured server
+    fails loudly instead of silently switching solvers."""
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError("unknown solver backend: %r" % (name,)) from None
+    if name not in _available:
+        _available[name] = backend.available()
+    if not _available[name]:
+        raise RuntimeError("solver backend %r is not available" % (name,))
+    return backend
@@ -7,9 +7,17 @@ One shared constraint model backs these operations:
   color, category, cardinality, gravity and equipment) feasible?
 * :meth:`FermentableSolver.sensory_range` -- the exact achievable min/max for
   one named descriptor, holding every other configured constraint fixed.
+* :meth:`FermentableSolver.sensory_range_batch` -- the same for a short, capped
+  list of descriptors under one shared budget.
 * :meth:`FermentableSolver.generate` -- up to five deterministic, meaningfully
   different grain bills inside exact SRM bounds and a hard deadline.
 
+Before any of them reaches a MILP backend, a pure-Python presolve
+(:meth:`FermentableSolver.proves_infeasible`) propagates interval bounds over
+grains, categories, sensory bounds and color. A brief it proves infeasible is
+answered without a solve, and the per-grain caps it tightens are the ones the
+model is built with.
+
 The public interactive editor asks only for one focused descriptor range or one
 full-brief feasibility check at a time; it never triggers an all-descriptor
 sweep. :meth:`FermentableSolver.sensory_ranges` computes every descriptor at
@@ -23,13 +31,42 @@ numbers -- there is no fixed-point scaling. Only generation adds color
 constraints; validity and sensory-range invent none.
 """
 
+import contextvars
+import math
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from enum import Enum
 
 import pulp
 
-from . import color
+from . import backends, color, heuristic
+
+
+# Slack allowed before presolve calls a bound violated, on the x100 scale the
+# model's rows use. Wider than the backends' own feasibility tolerance, so
+# presolve never rejects a brief a solver would accept.
+PRESOLVE_TOLERANCE = 1e-6
+
+# Share of the request deadline generation's heuristic may spend before the
+# MILP takes over.
+HEURISTIC_SHARE = 0.1
+
+# Accepted values of SolverConfig.diversity_cut.
+_DIVERSITY_CUTS = ("split", "support")
+
+# Callables told about every backend solve; see observe_solves.
+_solve_observers = []
+
+
+def observe_solves(callback):
+    """Call ``callback(backend, seconds, rows, columns, binaries)`` after every
+    MILP solve: the backend's name, the solve's wall seconds and the size of
+    the model it solved. Lets the server record solver metrics without the
+    solver knowing about them; a solve with no observers is not measured."""
+    _solve_observers.append(callback)
 
 
 class GenerationStatus(str, Enum):
@@ -62,6 +99,38 @@ class SolverConfig:
     min_pairwise_distance: int = 10
     solver_time_limit_seconds: float = 1.8
     request_deadline_seconds: float = 2.0
+    # Name of the MILP backend every solve runs on; see ``backends``. "cbc"
+    # spawns PuLP's bundled CBC binary, "highs" solves in-process.
+    backend: str = "cbc"
+    # Build the base constraint model once per solver (per brief) and reuse it
+    # across the validity, feasibility and range solves, swapping only the
+    # objective and relaxing the excluded descriptor's bound. False rebuilds a
+    # fresh model for every solve, the historical behavior.
+    reuse_model: bool = True
+    # Run a focused range's minimize and maximize solves concurrently, each
+    # granted half of the remaining shared solver budget. False runs them one
+    # after the other.
+    parallel_range: bool = False
+    # How generation keeps later bills away from accepted ones; see
+    # FermentableSolver._add_distance_cut. "support" adds one continuous and
+    # one binary per grain the accepted bill actually uses; "split", the
+    # historical cut, adds 2N continuous and N binary variables per bill.
+    diversity_cut: str = "support"
+    # Warm-start each generation solve after the first from a bill that already
+    # satisfies every constraint and distance cut, found by shifting points
+    # within the previous bill. False solves every iteration cold.
+    warm_start: bool = True
+    # Try to find the whole diverse set with the seeded local search in
+    # ``heuristic`` before any MILP solve; the MILP only fills what it could not.
+    heuristic: bool = False
+    # Most descriptors one sensory_range_batch call may ask about.
+    max_range_batch: int = 8
+
+    def __post_init__(self):
+        # An unknown backend name is a configuration error: fail when the
+        # config is built, not on the first request's solve.
+        if self.backend not in backends.BACKENDS:
+            raise ValueError("unknown solver backend: %r" % (self.backend,))
 
 
 @dataclass(frozen=True)
@@ -86,24 +155,32 @@ class _Budget:
     cumulative solver-time cap. Each solve is granted the smaller of what is
     left of either; a non-positive grant means the request is already spent.
     Both ceilings are server config, never caller-set, and the clock is
-    injectable so deadline behavior is testable without real waiting."""
+    injectable so deadline behavior is testable without real waiting. Grants
+    and charges are locked so concurrent solves can share one budget."""
 
     def __init__(self, config, clock):
         self._clock = clock
         self._deadline = clock() + config.request_deadline_seconds
         self._solver_remaining = config.solver_time_limit_seconds
+        self._lock = threading.Lock()
 
     @property
     def clock(self):
         return self._clock
 
-    def next_limit(self):
-        """Seconds the next solve may run; <= 0 means no budget remains."""
-        return min(self._solver_remaining, self._deadline - self._clock())
+    def next_limit(self, share=1):
+        """Seconds the next solve may run; <= 0 means no budget remains.
+
+        ``share`` is the number of solves about to run at once: each is granted
+        that fraction of the remaining solver time, so together they can never
+        overdraw the cumulative cap."""
+        with self._lock:
+            return min(self._solver_remaining / share, self._deadline - self._clock())
 
     def charge(self, seconds):
         """Debit the cumulative solver budget by an elapsed solve."""
-        self._solver_remaining -= seconds
+        with self._lock:
+            self._solver_remaining -= seconds
 
 
 @dataclass
@@ -170,14 +247,27 @@ class FermentableSolver:
         self.sensory_bounds = list(sensory_bounds or [])
         self.config = config or SolverConfig()
         self._range = range(len(self.grains))
+        # (color_context, lane) -> (problem, x_vars, sensory_rows); see
+        # _shared_model.
+        self._models = {}
+        # Tightened per-grain caps, or None once presolve proves the grain and
+        # category structure alone infeasible; see _grain_bounds.
+        self._upper = None
+        self._structure_feasible = None
 
     # -- public operations -------------------------------------------------
 
     def is_valid(self):
         """Return True if the constraints admit at least one grain bill."""
-        prob, _x, _used = self._base_problem("validity")
-        prob += 0  # feasibility only
-        prob.solve(self._solver())
+        if self.proves_infeasible():
+            return False
+        if self.config.reuse_model:
+            prob, x, _rows = self._shared_model(None)
+            self._feasibility_objective(prob, x)
+        else:
+            prob, _x, _used = self._base_problem("validity")
+            prob += 0  # feasibility only
+        self._solve(prob)
         return pulp.LpStatus[prob.status] == "Optimal"
 
     def feasibility(self, color_context=None, clock=time.monotonic):
@@ -191,15 +281,21 @@ class FermentableSolver:
         Returns a :class:`FeasibilityResult` whose status is ``FEASIBLE``,
         ``INFEASIBLE`` or ``DEADLINE_EXCEEDED``. No solver internals leak out.
         """
+        if self.proves_infeasible(color_context):
+            return FeasibilityResult(CheckStatus.INFEASIBLE)
         budget = _Budget(self.config, clock)
         limit = budget.next_limit()
         if limit <= 0:
             return FeasibilityResult(CheckStatus.DEADLINE_EXCEEDED)
-        prob, x, _used = self._base_problem("feasibility")
-        if color_context is not None:
-            self._add_color_constraints(prob, x, color_context)
-        prob += 0  # feasibility only, no objective
-        prob.solve(self._solver(limit))
+        if self.config.reuse_model:
+            prob, x, _rows = self._shared_model(color_context)
+            self._feasibility_objective(prob, x)
+        else:
+            prob, x, _used = self._base_problem("feasibility")
+            if color_context is not None:
+                self._add_color_constraints(prob, x, color_context)
+            prob += 0  # feasibility only, no objective
+        self._solve(prob, limit)
         return FeasibilityResult(self._check_status(prob))
 
     def sensory_range(self, name, color_context=None, clock=time.monotonic):
@@ -208,22 +304,52 @@ class FermentableSolver:
         Every other configured constraint is held fixed, but the target
         descriptor's own sensory bound is excluded so the returned span is its
         full editable range rather than the slice a stale bound would allow.
-        Both the minimize and maximize solves draw from one shared budget.
+        Both the minimize and maximize solves draw from one shared budget; with
+        ``config.parallel_range`` they run concurrently.
 
         Returns a :class:`RangeResult`. ``INVALID`` means the descriptor is not
         a known sensory keyword; ``FEASIBLE`` carries ``minimum``/``maximum``;
         ``INFEASIBLE`` and ``DEADLINE_EXCEEDED`` carry neither.
         """
+        return self._focused_range(name, color_context, _Budget(self.config, clock))
+
+    def sensory_range_batch(self, names, color_context=None, clock=time.monotonic):
+        """Return one :class:`RangeResult` per name in ``names``, in order.
+
+        Each range is computed exactly as :meth:`sensory_range` would, but all
+        of them draw from one shared budget and re-solve the brief's one shared
+        model, so a handful of on-screen descriptors costs one request rather
+        than one each. Once the budget is spent the remaining names come back
+        ``DEADLINE_EXCEEDED``. This is not the all-descriptor sweep: at most
+        ``config.max_range_batch`` names are accepted, and more raise
+        ``ValueError``."""
+        names = list(names)
+        if len(names) > self.config.max_range_batch:
+            raise ValueError("at most %d descriptors per batch"
+                             % self.config.max_range_batch)
+        budget = _Budget(self.config, clock)
+        return [self._focused_range(name, color_context, budget) for name in names]
+
+    def _focused_range(self, name, color_context, budget):
+        """Compute one focused range against ``budget``; see
+        :meth:`sensory_range`."""
         if name not in self.sensory_keywords:
             return RangeResult(CheckStatus.INVALID, name)
-        budget = _Budget(self.config, clock)
+        if self.proves_infeasible(color_context, exclude_sensory=name):
+            return RangeResult(CheckStatus.INFEASIBLE, name)
         coeffs = [self.grains[i]["sensory_data"].get(name, 0) for i in self._range]
-        low_status, low = self._extreme(
-            coeffs, pulp.LpMinimize, name, color_context, budget)
+        if self.config.parallel_range:
+            low_status, low, high_status, high = self._concurrent_extremes(
+                coeffs, name, color_context, budget)
+        else:
+            low_status, low = self._extreme(
+                coeffs, pulp.LpMinimize, name, color_context, budget)
+            if low_status is not CheckStatus.FEASIBLE:
+                return RangeResult(low_status, name)
+            high_status, high = self._extreme(
+                coeffs, pulp.LpMaximize, name, color_context, budget)
         if low_status is not CheckStatus.FEASIBLE:
             return RangeResult(low_status, name)
-        high_status, high = self._extreme(
-            coeffs, pulp.LpMaximize, name, color_context, budget)
         if high_status is not CheckStatus.FEASIBLE:
             return RangeResult(high_status, name)
         # Divided-down integer sums carry tiny float noise; trim it.
@@ -238,6 +364,8 @@ class FermentableSolver:
         sweep. Cardinality-preserving MILP with no invented color constraints.
         Returns an empty list if the underlying model is infeasible.
         """
+        if self.proves_infeasible():
+            return []
         ranges = []
         budget = _Budget(SolverConfig(request_deadline_seconds=float("inf"),
                                       solver_time_limit_seconds=float("inf")),
@@ -272,26 +400,153 @@ class FermentableSolver:
             values[key] = round(total / 100, 6)
         return values
 
-    def _extreme(self, coeffs, sense, exclude_sensory, color_context, budget):
-        """Minimize or maximize one descriptor over a fresh copy of the model.
-
-        A fresh problem per solve avoids CBC's trouble with re-solving the same
-        problem object dozens of times. ``exclude_sensory`` drops that
+    def proves_infeasible(self, color_context=None, exclude_sensory=None):
+        """Return True when interval reasoning alone proves no bill exists.
+
+        Runs no solver. Propagates each grain's usable range through its
+        category caps, then checks category minimums, usage totals and
+        cardinality against what the grains can reach, and every sensory bound
+        and (with ``color_context``) color row against the span its linear
+        relaxation allows. ``exclude_sensory`` skips that descriptor's bound,
+        exactly as a focused range does. False is not a proof of feasibility;
+        it only means the MILP has to decide."""
+        upper = self._grain_bounds()
+        if upper is None:
+            return True
+        for bound in self.sensory_bounds:
+            if bound["name"] == exclude_sensory:
+                continue
+            coeffs = [self.grains[i]["sensory_data"].get(bound["name"], 0)
+                      for i in self._range]
+            low, high = _relaxed_span(coeffs, upper)
+            if (high < bound["min"] * 100 - PRESOLVE_TOLERANCE
+                    or low > bound["max"] * 100 + PRESOLVE_TOLERANCE):
+                return True
+        if color_context is not None:
+            for row in self._color_rows(color_context):
+                if _relaxed_span(row, upper)[1] < -PRESOLVE_TOLERANCE:
+                    return True
+        return False
+
+    def _grain_bounds(self):
+        """Return each grain's tightened whole-percent cap, or None if the grain
+        and category structure alone is infeasible.
+
+        A grain's cap is the smallest of its own maximum, its category's maximum
+        and 100; a grain whose (at least one point) minimum then exceeds its cap
+        can never be used and is capped at zero. The structure is infeasible
+        when some category's minimum exceeds its maximum or what its best
+        ``unique_fermentable_count`` grains can reach, when the category
+        minimums sum past 100 or need more distinct grains than
+        ``max_unique_grains`` allows, or when no choice of grains can reach 100.
+        Computed once per solver; it does not depend on color or sensory."""
+        if self._structure_feasible is None:
+            self._upper = self._propagate_bounds()
+            self._structure_feasible = self._upper is not None
+        return self._upper
+
+    def _propagate_bounds(self):
+        """Compute :meth:`_grain_bounds` from scratch."""
+        limits = {}
+        for cat in self.categories:
+            members = [i for i in self._range
+                       if self.grains[i]["category"] == cat["name"]]
+            if not members:
+                continue  # the model skips a category with no grains too
+            cap = cat.get("unique_fermentable_count")
+            low, high, count = limits.get(
+                cat["name"], (0, 100, self.max_unique_grains))
+            limits[cat["name"]] = (
+                max(low, cat["min_percent"]), min(high, cat["max_percent"]),
+                count if cap is None else min(count, math.floor(cap)))
+
+        upper = []
+        for grain in self.grains:
+            cap = min(grain["max_percent"], 100)
+            if grain["category"] in limits:
+                cap = min(cap, limits[grain["category"]][1])
+            cap = max(math.floor(cap), 0)
+            usable = max(math.ceil(grain["min_percent"]), 1) <= cap
+            upper.append(cap if usable else 0)
+
+        reach = 0
+        needed_grains = 0
+        needed_percent = 0
+        for name, (low, high, count) in limits.items():
+            caps = sorted((upper[i] for i in self._range
+                           if self.grains[i]["category"] == name), reverse=True)
+            best = min(high, sum(caps[:max(count, 0)]))
+            if low > high or best < low:
+                return None
+            needed_percent += low
+            if low > 0:
+                total = 0
+                for caps_used, cap in enumerate(caps, start=1):
+                    total += cap
+                    if total >= low:
+                        needed_grains += caps_used
+                        break
+            reach += best
+        reach += sum(upper[i] for i in self._range
+                     if self.grains[i]["category"] not in limits)
+        top = sorted(upper, reverse=True)[:max(self.max_unique_grains, 0)]
+        if (needed_percent > 100 or needed_grains > self.max_unique_grains
+                or min(reach, sum(top)) < 100):
+            return None
+        return upper
+
+    def _concurrent_extremes(self, coeffs, name, color_context, budget):
+        """Run the minimize and maximize solves for ``name`` at once.
+
+        The maximize solve goes to a one-thread pool while the calling thread
+        runs the minimize; each is granted half of the remaining budget and
+        solves its own copy of the shared model, since one problem object
+        cannot be solved twice at the same time. Returns
+        ``(low_status, low, high_status, high)``."""
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # In the caller's context, so solve observers see one request.
+            high = pool.submit(contextvars.copy_context().run, self._extreme, coeffs,
+                               pulp.LpMaximize, name, color_context, budget,
+                               share=2, lane="max")
+            low_status, low = self._extreme(
+                coeffs, pulp.LpMinimize, name, color_context, budget, share=2)
+            high_status, high = high.result()
+        return low_status, low, high_status, high
+
+    def _extreme(self, coeffs, sense, exclude_sensory, color_context, budget,
+                 share=1, lane=None):
+        """Minimize or maximize one descriptor over the model.
+
+        With ``config.reuse_model`` the brief's shared model is re-solved with
+        only the objective swapped; otherwise a fresh copy is built per solve.
+        ``exclude_sensory`` drops (or, on the shared model, relaxes) that
         descriptor's own bound so a focused range spans its full editable width.
+        ``share`` and ``lane`` are set by :meth:`_concurrent_extremes`: the
+        number of solves splitting the budget and which model copy to use.
         Returns ``(status, value)`` where ``value`` is the descriptor's sensory
         value (usage-weighted average) only when the status is ``FEASIBLE``."""
-        limit = budget.next_limit()
+        limit = budget.next_limit(share)
         if limit <= 0:
             return CheckStatus.DEADLINE_EXCEEDED, None
-        prob, x, _used = self._base_problem("sensory", exclude_sensory=exclude_sensory)
-        if color_context is not None:
-            self._add_color_constraints(prob, x, color_context)
-        prob.sense = sense
-        prob.setObjective(pulp.lpSum(coeffs[i] * x[i] for i in self._range))
+        if self.config.reuse_model:
+            prob, x, rows = self._shared_model(color_context, lane)
+        else:
+            prob, x, _used = self._base_problem(
+                "sensory", exclude_sensory=exclude_sensory)
+            if color_context is not None:
+                self._add_color_constraints(prob, x, color_context)
+            rows = {}
+        if any(coeffs):
+            prob.sense = sense
+            prob.setObjective(pulp.lpSum(coeffs[i] * x[i] for i in self._range))
+        else:
+            # A descriptor no grain carries is zero on every bill.
+            self._feasibility_objective(prob, x)
         start = budget.clock()
-        prob.solve(self._solver(limit))
+        with self._relaxed(rows, exclude_sensory):
+            self._solve(prob, limit)
         budget.charge(budget.clock() - start)
-        status = self._check_status(prob)
+        status = self._check_status(prob, proven=True)
         if status is not CheckStatus.FEASIBLE:
             return status, None
         # Read straight from the integer percentages rather than the PuLP
@@ -300,14 +555,20 @@ class FermentableSolver:
         return status, value
 
     @staticmethod
-    def _check_status(prob):
-        """Map a solved problem onto a stable, solver-agnostic CheckStatus."""
+    def _check_status(prob, proven=False):
+        """Map a solved problem onto a stable, solver-agnostic CheckStatus.
+
+        Backends report a time-limited solve that still holds an incumbent as
+        "Optimal"; with ``proven`` (an exact range extreme) only a solution the
+        backend proved optimal counts, and the rest is a deadline."""
         name = pulp.LpStatus[prob.status]
         if name == "Optimal":
+            if proven and prob.sol_status != pulp.LpSolutionOptimal:
+                return CheckStatus.DEADLINE_EXCEEDED
             return CheckStatus.FEASIBLE
         if name == "Infeasible":
             return CheckStatus.INFEASIBLE
-        # Undefined/Not Solved: CBC hit the time limit without a proof.
+        # Undefined/Not Solved: the backend hit the time limit without a proof.
         return CheckStatus.DEADLINE_EXCEEDED
 
     def generate(self, original_sg, target_volume_gallons, mash_efficiency,
@@ -317,6 +578,11 @@ class FermentableSolver:
         Exact decimal SRM bounds are enforced in-model. Each accepted bill adds
         an L1-distance cut so every later bill differs by at least
         ``config.min_pairwise_distance`` summed absolute percentage points.
+        With ``config.warm_start`` each later solve starts from a repaired
+        perturbation of the previous bill when one passes every constraint.
+        With ``config.heuristic`` a seeded local search proposes bills first;
+        each passes the same exact checks, and the MILP, with those bills
+        already cut off, only completes the set.
 
         Args:
             original_sg (float): target starting gravity (1.xxx).
@@ -325,9 +591,13 @@ class FermentableSolver:
             min_srm, max_srm (float): exact SRM acceptance bounds.
             clock (callable): monotonic seconds source; injectable for tests.
         """
-        prob, x, _used = self._base_problem("generation")
         ctx = ColorContext(original_sg, target_volume_gallons, mash_efficiency,
                            min_srm, max_srm)
+        if self.config.diversity_cut not in _DIVERSITY_CUTS:
+            raise ValueError("unknown diversity cut: %r" % (self.config.diversity_cut,))
+        if self.proves_infeasible(ctx):
+            return GenerationResult(GenerationStatus.INFEASIBLE)
+        prob, x, used = self._base_problem("generation")
         self._add_color_constraints(prob, x, ctx)
         colors = [g["color"] for g in self.grains]
         ppgs = [g["ppg"] for g in self.grains]
@@ -335,9 +605,30 @@ class FermentableSolver:
 
         alternatives = []
         vectors = []
+        # One start-value setter per accepted bill's cut; see _add_distance_cut.
+        cut_starts = []
         start = clock()
         deadline = start + self.config.request_deadline_seconds
 
+        def accept(vector):
+            srm = color.morey_srm(color.mash_color_units(
+                colors, ppgs, vector, original_sg, target_volume_gallons,
+                mash_efficiency))
+            percents = {self.grains[i]["slug"]: vector[i]
+                        for i in self._range if vector[i] > 0}
+            alternatives.append(Bill(percents=percents, srm=srm))
+            vectors.append(vector)
+            cut_starts.append(self._add_distance_cut(prob, x, vector, len(vectors) - 1))
+
+        if self.config.heuristic and clock() < deadline:
+            # A fixed share of the deadline, so a brief the search finds hard
+            # leaves the MILP most of the budget.
+            stop = min(deadline, start + HEURISTIC_SHARE
+                       * self.config.request_deadline_seconds)
+            for vector in heuristic.diverse_bills(self, ctx, self.config.max_bills,
+                                                  clock, stop):
+                accept(vector)
+
         while len(alternatives) < self.config.max_bills:
             now = clock()
             if now >= deadline:
@@ -346,7 +637,17 @@ class FermentableSolver:
                 return GenerationResult(status, alternatives)
 
             time_limit = min(self.config.solver_time_limit_seconds, deadline - now)
-            prob.solve(self._solver(time_limit))
+            warm = False
+            if vectors and self.config.warm_start:
+                candidate = self._next_start(vectors, ctx)
+                if candidate is not None:
+                    for i in self._range:
+                        x[i].setInitialValue(candidate[i])
+                        used[i].setInitialValue(1 if candidate[i] > 0 else 0)
+                    for set_start in cut_starts:
+                        set_start(candidate)
+                    warm = True
+            self._solve(prob, time_limit, warm_start=warm)
             status_name = pulp.LpStatus[prob.status]
 
             if status_name == "Infeasible":
@@ -359,15 +660,7 @@ class FermentableSolver:
                           else GenerationStatus.DEADLINE_EXCEEDED)
                 return GenerationResult(status, alternatives)
 
-            vector = [int(round(x[i].value())) for i in self._range]
-            srm = color.morey_srm(color.mash_color_units(
-                colors, ppgs, vector, original_sg, target_volume_gallons,
-                mash_efficiency))
-            percents = {self.grains[i]["slug"]: vector[i]
-                        for i in self._range if vector[i] > 0}
-            alternatives.append(Bill(percents=percents, srm=srm))
-            vectors.append(vector)
-            self._add_distance_cut(prob, x, vector, len(vectors) - 1)
+            accept([int(round(x[i].value())) for i in self._range])
 
         return GenerationResult(GenerationStatus.COMPLETE, alternatives)
 
@@ -379,20 +672,81 @@ class FermentableSolver:
         The two half-plane coefficient rows come straight from the shared color
         math generation uses, so validity, focused ranges and generation all
         judge color identically."""
+        lower, upper = self._color_rows(ctx)
+        prob += pulp.lpSum(lower[i] * x[i] for i in self._range) >= 0
+        prob += pulp.lpSum(upper[i] * x[i] for i in self._range) >= 0
+
+    def _color_rows(self, ctx):
+        """Return the two per-grain coefficient rows, each required >= 0, that
+        hold a bill's SRM inside ``ctx``'s color band."""
         colors = [g["color"] for g in self.grains]
         ppgs = [g["ppg"] for g in self.grains]
-        lower, upper = color.color_bound_coefficients(
+        return color.color_bound_coefficients(
             colors, ppgs, ctx.original_sg, ctx.target_volume_gallons,
             ctx.mash_efficiency, ctx.min_srm, ctx.max_srm)
-        prob += pulp.lpSum(lower[i] * x[i] for i in self._range) >= 0
-        prob += pulp.lpSum(upper[i] * x[i] for i in self._range) >= 0
 
-    def _base_problem(self, name, exclude_sensory=None):
+    def _shared_model(self, color_context, lane=None):
+        """Return this brief's reusable model for ``color_context``.
+
+        Built once on first use and re-solved afterwards: callers only swap the
+        objective and sense, and relax an excluded descriptor's bound through
+        :meth:`_relaxed`. Each ``lane`` gets its own copy so concurrent solves
+        never share a problem object. Returns (problem, x_vars, sensory_rows),
+        where ``sensory_rows`` maps a descriptor name to its bound constraints."""
+        key = (color_context, lane)
+        model = self._models.get(key)
+        if model is None:
+            rows = {}
+            prob, x, _used = self._base_problem("shared", sensory_rows=rows)
+            if color_context is not None:
+                self._add_color_constraints(prob, x, color_context)
+            model = self._models[key] = (prob, x, rows)
+        return model
+
+    def _feasibility_objective(self, prob, x):
+        """Make a shared model a pure feasibility check.
+
+        An empty objective would leave PuLP's placeholder variable behind and
+        corrupt every later solve of the same problem, so minimize the total
+        instead: it is pinned at 100 on every bill, so any feasible bill is
+        optimal."""
+        prob.sense = pulp.LpMinimize
+        prob.setObjective(pulp.lpSum(x))
+
+    @contextmanager
+    def _relaxed(self, rows, name):
+        """Temporarily relax the named descriptor's bound rows on a shared model.
+
+        Rather than removing the rows (which would reorder the model), each
+        right-hand side is widened to the descriptor's full attainable span --
+        any bill's usage-weighted value lies between its smallest and largest
+        grain coefficient -- and restored afterwards."""
+        relaxed = rows.get(name, [])
+        if not relaxed:
+            yield
+            return
+        coeffs = [self.grains[i]["sensory_data"].get(name, 0) for i in self._range]
+        saved = [(row, row.constant) for row, _sense in relaxed]
+        for row, sense in relaxed:
+            if sense == pulp.LpConstraintGE:
+                row.constant = -(min(coeffs) * 100 - 1)
+            else:
+                row.constant = -(max(coeffs) * 100 + 1)
+        try:
+            yield
+        finally:
+            for row, constant in saved:
+                row.constant = constant
+
+    def _base_problem(self, name, exclude_sensory=None, sensory_rows=None):
         """Build the shared model: total==100, per-grain min/max linked to a
         used binary, category usage bounds, global and per-category cardinality,
-        and any sensory bounds. ``exclude_sensory`` drops the bound with that
+        and any sensory bounds. Per-grain caps are the presolve-tightened ones
+        from :meth:`_grain_bounds`. ``exclude_sensory`` drops the bound with that
         descriptor name so a focused range is not clipped by its own stale
-        bound. Returns (problem, x_vars, used_vars)."""
+        bound. When ``sensory_rows`` is a dict it is filled with each
+        descriptor's ``(constraint, sense)`` bound rows so a shared model can
+        relax them later. Returns (problem, x_vars, used_vars)."""
         prob = pulp.LpProblem(name, pulp.LpMinimize)
         x = [pulp.LpVariable("x_%d" % i, lowBound=0, upBound=100, cat="Integer")
              for i in self._range]
@@ -400,11 +754,16 @@ class FermentableSolver:
 
         prob += pulp.lpSum(x) == 100
 
+        # Presolve-tightened caps; the declared ones if presolve already proved
+        # the structure infeasible (the solve will then agree).
+        upper = self._grain_bounds()
+        if upper is None:
+            upper = [grain["max_percent"] for grain in self.grains]
         for i in self._range:
             grain = self.grains[i]
             # used == 0 forces x == 0; used == 1 forces min..max (>=1 so a used
             # grain is really present even when its declared minimum is 0).
-            prob += x[i] <= grain["max_percent"] * used[i]
+            prob += x[i] <= upper[i] * used[i]
             prob += x[i] >= used[i]
             prob += x[i] >= grain["min_percent"] * used[i]
 
@@ -428,16 +787,29 @@ class FermentableSolver:
                 continue
             expr = pulp.lpSum(
                 self.grains[i]["sensory_data"].get(key, 0) * x[i] for i in self._range)
-            prob += expr >= bound["min"] * 100
-            prob += expr <= bound["max"] * 100
+            lower = expr >= bound["min"] * 100
+            upper = expr <= bound["max"] * 100
+            prob += lower
+            prob += upper
+            if sensory_rows is not None:
+                sensory_rows.setdefault(key, []).extend(
+                    [(lower, pulp.LpConstraintGE), (upper, pulp.LpConstraintLE)])
 
         return prob, x, used
 
     def _add_distance_cut(self, prob, x, accepted, tag):
         """Require every future bill to differ from ``accepted`` by at least
-        ``config.min_pairwise_distance`` summed absolute percentage points.
+        ``config.min_pairwise_distance`` summed absolute percentage points,
+        using the ``config.diversity_cut`` formulation.
+
+        Returns a function that, given a candidate bill's whole-percent vector,
+        sets the cut's own variables to the start values consistent with it."""
+        if self.config.diversity_cut == "support":
+            return self._add_support_cut(prob, x, accepted, tag)
+        return self._add_split_cut(prob, x, accepted, tag)
 
-        The absolute deviation of each grain is split into a positive and a
+    def _add_split_cut(self, prob, x, accepted, tag):
+        """The absolute deviation of each grain is split into a positive and a
         negative part whose sum equals |x_i - accepted_i| exactly (a binary
         keeps only one part active), then the total is bounded below."""
         pos = [pulp.LpVariable("p_%d_%d" % (tag, i), lowBound=0) for i in self._range]
@@ -450,8 +822,146 @@ class FermentableSolver:
         prob += (pulp.lpSum(pos[i] + neg[i] for i in self._range)
                  >= self.config.min_pairwise_distance)
 
-    def _solver(self, time_limit=None):
-        """One deterministic CBC configuration for every solve."""
+        def set_start(vector):
+            for i in self._range:
+                delta = vector[i] - accepted[i]
+                pos[i].setInitialValue(max(delta, 0))
+                neg[i].setInitialValue(max(-delta, 0))
+                pick[i].setInitialValue(1 if delta > 0 else 0)
+        return set_start
+
+    def _add_support_cut(self, prob, x, accepted, tag):
+        """The same distance, linearized over the accepted bill's support only.
+
+        Both bills sum to 100, so their L1 distance is twice the percentage
+        points the new bill takes away from grains ``accepted`` uses. Each such
+        grain gets a shortfall variable held at or below
+        ``max(accepted_i - x_i, 0)`` -- a binary picks which side of that max
+        applies -- and twice their total is bounded below. Grains outside the
+        support need no variables at all."""
+        terms = {}
+        for i in self._range:
+            if accepted[i] <= 0:
+                continue
+            short = pulp.LpVariable("s_%d_%d" % (tag, i), lowBound=0)
+            below = pulp.LpVariable("z_%d_%d" % (tag, i), cat="Binary")
+            prob += short <= accepted[i] * below
+            prob += short <= accepted[i] - x[i] + 100 * (1 - below)
+            terms[i] = (short, below)
+        prob += (2 * pulp.lpSum(short for short, _below in terms.values())
+                 >= self.config.min_pairwise_distance)
+
+        def set_start(vector):
+            for i, (short, below) in terms.items():
+                short.setInitialValue(max(accepted[i] - vector[i], 0))
+                below.setInitialValue(1 if vector[i] < accepted[i] else 0)
+        return set_start
+
+    def _next_start(self, vectors, ctx):
+        """Return a whole-percent bill to warm-start the next generation solve,
+        or None when no cheap one exists.
+
+        Repairs a perturbation of the latest accepted bill: shifts the fewest
+        points that can clear the distance cut (then twice that) from one of its
+        grains to another, preferring its larger grains as donors and grains it
+        already uses as receivers, and keeps the first shift that
+        :meth:`_admits` and every distance cut accept. Deterministic, so
+        generation stays reproducible."""
+        previous = vectors[-1]
+        distance = self.config.min_pairwise_distance
+        step = max(-(-distance // 2), 1)
+        donors = sorted((i for i in self._range if previous[i] > 0),
+                        key=lambda i: (-previous[i], i))
+        receivers = donors + [i for i in self._range if previous[i] == 0]
+        rows = self._color_rows(ctx)
+        for amount in (step, 2 * step):
+            for donor in donors:
+                if previous[donor] < amount:
+                    continue
+                for receiver in receivers:
+                    if receiver == donor:
+                        continue
+                    candidate = list(previous)
+                    candidate[donor] -= amount
+                    candidate[receiver] += amount
+                    if (all(_l1(candidate, vector) >= distance for vector in vectors)
+                            and self._admits(candidate, rows)):
+                        return candidate
+        return None
+
+    def _admits(self, vector, color_rows=None):
+        """Return True if the whole-percent ``vector`` satisfies every model
+        constraint exactly: the total, each grain's zero-or-min..max usage,
+        global and per-category cardinality, category usage, sensory bounds
+        and, given ``color_rows`` from :meth:`_color_rows`, the color band."""
+        if sum(vector) != 100:
+            return False
+        for value, grain in zip(vector, self.grains):
+            if value and not (max(grain["min_percent"], 1) <= value
+                              <= grain["max_percent"]):
+                return False
+        if sum(1 for value in vector if value) > self.max_unique_grains:
+            return False
+        for cat in self.categories:
+            members = [vector[i] for i in self._range
+                       if self.grains[i]["category"] == cat["name"]]
+            if not members:
+                continue
+            if not cat["min_percent"] <= sum(members) <= cat["max_percent"]:
+                return False
+            cap = cat.get("unique_fermentable_count")
+            if cap is not None and sum(1 for value in members if value) > cap:
+                return False
+        for bound in self.sensory_bounds:
+            total = sum(self.grains[i]["sensory_data"].get(bound["name"], 0) * vector[i]
+                        for i in self._range)
+            if not bound["min"] * 100 <= total <= bound["max"] * 100:
+                return False
+        for row in color_rows or ():
+            if sum(row[i] * vector[i] for i in self._range) < 0:
+                return False
+        return True
+
+    def _solve(self, prob, time_limit=None, warm_start=False):
+        """Solve ``prob`` on the configured backend with one deterministic
+        configuration for every solve. ``warm_start`` passes the variables'
+        initial values to the backend as a starting solution."""
         if time_limit is None:
             time_limit = self.config.solver_time_limit_seconds
-        return pulp.PULP_CBC_CMD(msg=0, threads=1, timeLimit=time_limit)
+        start = time.monotonic()
+        backends.get_backend(self.config.backend).solve(
+            prob, time_limit, warm_start=warm_start)
+        if _solve_observers:
+            seconds = time.monotonic() - start
+            columns = prob.variables()
+            binaries = sum(1 for var in columns if var.isBinary())
+            for observer in _solve_observers:
+                observer(self.config.backend, seconds, len(prob.constraints),
+                         len(columns), binaries)
+
+
+def _l1(a, b):
+    """Summed absolute percentage-point difference between two bill vectors."""
+    return sum(abs(left - right) for left, right in zip(a, b))
+
+
+def _relaxed_span(coeffs, upper):
+    """Return ``(low, high)`` of ``sum(coeffs[i] * x[i])`` over the relaxation
+    ``0 <= x[i] <= upper[i]``, ``sum(x) == 100``.
+
+    Filling the cheapest (or dearest) grains first up to their caps is optimal
+    for this fractional knapsack, so every integer bill's value lies inside the
+    span. Assumes the caps can reach 100."""
+    order = sorted(range(len(coeffs)), key=lambda i: coeffs[i])
+
+    def fill(indices):
+        left, total = 100, 0
+        for i in indices:
+            take = min(upper[i], left)
+            total += coeffs[i] * take
+            left -= take
+            if left <= 0:
+                break
+        return total
+
+    return fill(order), fill(reversed(order))
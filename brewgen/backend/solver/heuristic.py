@@ -0,0 +1,298 @@
+"""Seeded local-search heuristic for grain-bill generation.
+
+Most briefs are easy: a handful of grains, loose category bands and a wide SRM
+window admit many whole-percent bills, and spawning a MILP solve per bill costs
+far more than finding them. :func:`diverse_bills` tries to find the whole
+diverse set in pure Python first; :meth:`FermentableSolver.generate` keeps
+whatever it finds and hands the rest of the set to the MILP, with every
+heuristic bill already cut off.
+
+The search is a min-conflicts walk. A bill is a whole-percent vector that always
+sums to 100; each move shifts points from one grain to another, and each step
+takes the best of a sample of moves by total constraint violation -- grain,
+category, cardinality, sensory, color and distance to the bills already found.
+Violations are kept as running aggregates, so scoring a move touches only the
+two grains it changes. A bill is returned only after the solver's exact check
+(:meth:`FermentableSolver._admits`, color rows and sensory bounds included) and
+an exact pairwise-distance check pass, so a heuristic bill is indistinguishable
+from one the MILP found. The generator is seeded and the move budget is fixed,
+so the same brief always yields the same bills -- unless the caller's deadline
+cuts the search short, in which case it returns the bills found so far and the
+MILP does the rest.
+"""
+
+import math
+import random
+import time
+
+SEED = 0              # every search starts from the same generator state
+RESTARTS = 4          # fresh random starts per bill before giving up on it
+STEPS = 150           # moves per start
+SAMPLES = 48          # candidate moves scored per step
+MAX_MOVES = 3000      # moves across the whole call, bounding a hard brief's cost
+CLOCK_EVERY = 25      # moves between deadline checks
+
+# Points a move shifts; a move may also empty the donor grain entirely.
+_AMOUNTS = (1, 2, 5, 10)
+# Extra weight on a cardinality overrun, which no single small shift repairs.
+_COUNT_WEIGHT = 10.0
+# Aggregates are updated incrementally in floating point, so a state this close
+# to zero penalty is recomputed from scratch, and below _EPSILON it is handed to
+# the exact check.
+_RECOMPUTE = 1e-6
+_EPSILON = 1e-9
+
+
+def diverse_bills(solver, ctx, count, clock=time.monotonic, deadline=None):
+    """Return up to ``count`` mutually distant bills for ``solver``'s brief.
+
+    Each bill is a whole-percent vector in ``solver.grains`` order that satisfies
+    every model constraint and the color band of ``ctx`` (a
+    :class:`~brewgen.backend.solver.fermentables.ColorContext`), and lies at
+    least ``config.min_pairwise_distance`` from every other returned bill. Stops
+    at the first bill it cannot find, or once ``clock()`` reaches ``deadline``
+    (checked every ``CLOCK_EVERY`` moves), so the result may be short or empty."""
+    upper = solver._grain_bounds()
+    if upper is None or not any(upper):
+        return []
+    search = _Search(solver, ctx, upper, random.Random(SEED), clock, deadline)
+    bills = []
+    while len(bills) < count:
+        bill = search.find()
+        if bill is None:
+            break
+        bills.append(bill)
+        search.accept(bill)
+    return bills
+
+
+class _Search:
+    """Local-search state for one brief: constraint data plus running
+    aggregates of the current vector."""
+
+    def __init__(self, solver, ctx, upper, rng, clock=time.monotonic, deadline=None):
+        self.solver = solver
+        self.rng = rng
+        self.clock = clock
+        self.deadline = deadline
+        self.n = len(solver.grains)
+        self.upper = upper
+        self.low = [max(math.ceil(g["min_percent"]), 1) for g in solver.grains]
+        self.usable = [i for i in range(self.n) if upper[i] > 0]
+        self.max_unique = solver.max_unique_grains
+        self.distance = solver.config.min_pairwise_distance
+        self.moves_left = MAX_MOVES
+
+        # Category entries with at least one grain, as (min, max, cap, members);
+        # the model skips the others.
+        self.cats = []
+        self.cats_of = [[] for _ in range(self.n)]
+        for cat in solver.categories:
+            members = [i for i in range(self.n)
+                       if solver.grains[i]["category"] == cat["name"]]
+            if not members:
+                continue
+            for i in members:
+                self.cats_of[i].append(len(self.cats))
+            self.cats.append((cat["min_percent"], cat["max_percent"],
+                              cat.get("unique_fermentable_count"), members))
+
+        # Linear rows as (coefficients, low, high, scale) on the x100 scale;
+        # scale turns a violation back into roughly percentage points.
+        self.rows = []
+        for bound in solver.sensory_bounds:
+            coeffs = [g["sensory_data"].get(bound["name"], 0) for g in solver.grains]
+            self.rows.append((coeffs, bound["min"] * 100, bound["max"] * 100,
+                              max(max(map(abs, coeffs)), 1e-12)))
+        self.color_rows = solver._color_rows(ctx)
+        for coeffs in self.color_rows:
+            self.rows.append((coeffs, 0.0, math.inf,
+                              max(max(map(abs, coeffs)), 1e-12)))
+        self.accepted = []
+
+    # -- penalties -----------------------------------------------------------
+
+    def _grain_penalty(self, i, value):
+        if value == 0:
+            return 0.0
+        return max(self.low[i] - value, 0) + max(value - self.upper[i], 0)
+
+    def _count_penalty(self, used):
+        return max(used - self.max_unique, 0) * _COUNT_WEIGHT
+
+    def _cat_penalty(self, c, total, used):
+        low, high, cap, _members = self.cats[c]
+        penalty = max(low - total, 0) + max(total - high, 0)
+        if cap is not None:
+            penalty += max(used - cap, 0) * _COUNT_WEIGHT
+        return penalty
+
+    def _row_penalty(self, r, total):
+        _coeffs, low, high, scale = self.rows[r]
+        return (max(low - total, 0) + max(total - high, 0)) / scale
+
+    def _distance_penalty(self, distance):
+        return max(self.distance - distance, 0)
+
+    # -- state -----------------------------------------------------------------
+
+    def accept(self, bill):
+        """Keep later bills at least the configured distance from ``bill``."""
+        self.accepted.append(bill)
+
+    def _load(self, vector):
+        """Make ``vector`` the current state and recompute every aggregate."""
+        self.v = vector
+        self.used = sum(1 for value in vector if value)
+        self.cat_total = [sum(vector[i] for i in members)
+                          for _lo, _hi, _cap, members in self.cats]
+        self.cat_used = [sum(1 for i in members if vector[i])
+                         for _lo, _hi, _cap, members in self.cats]
+        self.row_total = [sum(c * value for c, value in zip(coeffs, vector))
+                          for coeffs, _lo, _hi, _scale in self.rows]
+        self.dist = [sum(abs(a - b) for a, b in zip(vector, bill))
+                     for bill in self.accepted]
+        self.penalty = (
+            sum(self._grain_penalty(i, vector[i]) for i in range(self.n))
+            + self._count_penalty(self.used)
+            + sum(self._cat_penalty(c, self.cat_total[c], self.cat_used[c])
+                  for c in range(len(self.cats)))
+            + sum(self._row_penalty(r, total) for r, total in enumerate(self.row_total))
+            + sum(self._distance_penalty(d) for d in self.dist))
+
+    def _start(self):
+        """Load a random bill summing to 100: one grain for each category that
+        needs some, random others up to a random count, minimums first and the
+        rest spread within the caps."""
+        rng = self.rng
+        chosen = []
+        for low, _high, _cap, members in self.cats:
+            if low > 0:
+                options = [i for i in members if self.upper[i] and i not in chosen]
+                if options:
+                    chosen.append(rng.choice(options))
+        target = rng.randint(1, max(min(self.max_unique, len(self.usable)), 1))
+        others = [i for i in self.usable if i not in chosen]
+        rng.shuffle(others)
+        chosen.extend(others[:max(target - len(chosen), 0)])
+        if not chosen:
+            chosen = [rng.choice(self.usable)]
+
+        vector = [0] * self.n
+        for i in chosen:
+            vector[i] = min(self.low[i], self.upper[i])
+        left = 100 - sum(vector)
+        while left > 0:
+            room = [i for i in chosen if vector[i] < self.upper[i]]
+            i = rng.choice(room or chosen)
+            step = min(left, max(self.upper[i] - vector[i], 1), rng.randint(1, 25))
+            vector[i] += step
+            left -= step
+        while left < 0:
+            i = max(chosen, key=lambda k: vector[k])
+            step = min(-left, vector[i])
+            vector[i] -= step
+            left += step
+        self._load(vector)
+
+    # -- moves -----------------------------------------------------------------
+
+    def _score(self, i, j, k):
+        """Total penalty after shifting ``k`` points from grain ``i`` to ``j``."""
+        v = self.v
+        old_i, old_j = v[i], v[j]
+        new_i, new_j = old_i - k, old_j + k
+        penalty = self.penalty
+        penalty += (self._grain_penalty(i, new_i) - self._grain_penalty(i, old_i)
+                    + self._grain_penalty(j, new_j) - self._grain_penalty(j, old_j))
+        used_delta_i = (new_i > 0) - (old_i > 0)
+        used_delta_j = (new_j > 0) - (old_j > 0)
+        if used_delta_i or used_delta_j:
+            used = self.used + used_delta_i + used_delta_j
+            penalty += self._count_penalty(used) - self._count_penalty(self.used)
+        for c in set(self.cats_of[i] + self.cats_of[j]):
+            total, used = self.cat_total[c], self.cat_used[c]
+            new_total, new_used = total, used
+            if c in self.cats_of[i]:
+                new_total -= k
+                new_used += used_delta_i
+            if c in self.cats_of[j]:
+                new_total += k
+                new_used += used_delta_j
+            penalty += (self._cat_penalty(c, new_total, new_used)
+                        - self._cat_penalty(c, total, used))
+        for r, (coeffs, _lo, _hi, _scale) in enumerate(self.rows):
+            total = self.row_total[r]
+            penalty += (self._row_penalty(r, total + (coeffs[j] - coeffs[i]) * k)
+                        - self._row_penalty(r, total))
+        for a, bill in enumerate(self.accepted):
+            dist = self.dist[a]
+            new = (dist + abs(new_i - bill[i]) - abs(old_i - bill[i])
+                   + abs(new_j - bill[j]) - abs(old_j - bill[j]))
+            penalty += self._distance_penalty(new) - self._distance_penalty(dist)
+        return penalty
+
+    def _apply(self, i, j, k, penalty):
+        v = self.v
+        old_i, old_j = v[i], v[j]
+        v[i], v[j] = old_i - k, old_j + k
+        self.used += (v[i] > 0) - (old_i > 0) + (v[j] > 0) - (old_j > 0)
+        for c in self.cats_of[i]:
+            self.cat_total[c] -= k
+            self.cat_used[c] += (v[i] > 0) - (old_i > 0)
+        for c in self.cats_of[j]:
+            self.cat_total[c] += k
+            self.cat_used[c] += (v[j] > 0) - (old_j > 0)
+        for r, (coeffs, _lo, _hi, _scale) in enumerate(self.rows):
+            self.row_total[r] += (coeffs[j] - coeffs[i]) * k
+        for a, bill in enumerate(self.accepted):
+            self.dist[a] += (abs(v[i] - bill[i]) - abs(old_i - bill[i])
+                             + abs(v[j] - bill[j]) - abs(old_j - bill[j]))
+        self.penalty = penalty
+
+    def _verified(self):
+        """The exact check: every model constraint and every pairwise distance."""
+        return (self.solver._admits(self.v, self.color_rows)
+                and all(sum(abs(a - b) for a, b in zip(self.v, bill)) >= self.distance
+                        for bill in self.accepted))
+
+    def _out_of_time(self):
+        """True once the deadline has passed; reads the clock only every
+        ``CLOCK_EVERY`` moves."""
+        if self.deadline is None or self.moves_left % CLOCK_EVERY:
+            return False
+        if self.clock() >= self.deadline:
+            self.moves_left = 0  # stay stopped without reading the clock again
+            return True
+        return False
+
+    def find(self):
+        """Search for one more bill; return its vector or None."""
+        rng = self.rng
+        for _restart in range(RESTARTS):
+            self._start()
+            for _step in range(STEPS):
+                if self.penalty <= _RECOMPUTE:
+                    self._load(self.v)
+                if self.penalty <= _EPSILON and self._verified():
+                    return list(self.v)
+                if self.moves_left <= 0 or self._out_of_time():
+                    return None
+                self.moves_left -= 1
+                donors = [i for i in range(self.n) if self.v[i]]
+                best = None
+                for _sample in range(SAMPLES):
+                    i = rng.choice(donors)
+                    j = rng.choice(self.usable)
+                    if i == j:
+                        continue
+                    k = min(rng.choice(_AMOUNTS + (self.v[i],)), self.v[i])
+                    score = self._score(i, j, k)
+                    if best is None or score < best[0]:
+                        best = (score, i, j, k)
+                if best is not None:
+                    score, i, j, k = best
+                    self._apply(i, j, k, score)
+            if self.penalty <= _EPSILON and self._verified():
+                return list(self.v)
+        return None
@@ -1,12 +1,15 @@
-from flask import Flask, jsonify, request, render_template
+import os
+from dataclasses import replace
+
+from flask import Flask, Response, jsonify, request, render_template
 from werkzeug.middleware.proxy_fix import ProxyFix
 from .models import grain, beer, category, equipment, style
-from .solver import color as grain_color
+from .solver import atlas, backends, color as grain_color
 from .solver.fermentables import (
     FermentableSolver, SolverConfig, ColorContext, CheckStatus, GenerationStatus)
-from . import envelope
+from . import envelope, metrics
+from .catalog_responses import CatalogResponses
 from .envelope import compute_endpoint, ok_json, problem, BriefContract
-from difflib import SequenceMatcher
 
 app = Flask(__name__,
             static_folder='../dist/static',
@@ -23,7 +26,25 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
 
 all_grains = grain.GrainList()
 category_model = category.CategoryModel()
-all_styles = style.StyleModel()
+all_styles = style.StyleModel(grain_model=all_grains)
+
+# Every style seed's descriptor ranges, precomputed offline; empty if the atlas
+# is missing or was built from different data.
+SENSORY_ATLAS = atlas.load()
+
+# The catalog GETs only change on deploy: each payload is rendered to bytes and
+# compressed once, and served with a strong ETag, Cache-Control and 304
+# revalidation. The payloads that take no URL argument are rendered here, at
+# startup; per-style and per-category ones on first request.
+CATALOG_RESPONSES = CatalogResponses(app)
+CATALOG_RESPONSES.pin(('grains', False), all_grains.get_grain_list)
+CATALOG_RESPONSES.pin(('grains', True), all_grains.get_grain_slugs)
+CATALOG_RESPONSES.pin(('grain-categories',),
+                      lambda: sorted(all_grains.get_all_categories()))
+CATALOG_RESPONSES.pin(('sensory-keywords',),
+                      lambda: sorted(all_grains.get_sensory_keywords()))
+CATALOG_RESPONSES.pin(('category-style-data',), category_model.get_category_list)
+CATALOG_RESPONSES.pin(('styles',), all_styles.get_style_summaries)
 
 # The versioned brief contract, built once from the shipped catalog so it can
 # reject unknown/duplicate slugs and cap every list at catalog cardinality.
@@ -31,7 +52,39 @@ CONTRACT = BriefContract.from_grain_list(all_grains)
 
 # Solver deadlines and diversity limits are server configuration, never set by
 # the caller, so a slow or malicious request cannot ask for unbounded compute.
-SOLVER_CONFIG = SolverConfig()
+# The deploy may pick the MILP backend ("cbc" or the in-process "highs"), and
+# may run a focused range's two solves concurrently -- worth it only with a
+# spare CPU, since each gets half the budget and its own model copy.
+# Generation's pure-Python heuristic stays off: on tight briefs it spends its
+# share of the deadline before a MILP that needs a fraction of it.
+SOLVER_CONFIG = SolverConfig(
+    backend=os.environ.get('BREWGEN_SOLVER_BACKEND', 'cbc'),
+    parallel_range=os.environ.get('BREWGEN_PARALLEL_RANGE', '') == '1',
+    max_range_batch=envelope.MAX_BATCH_DESCRIPTORS)
+# Refuse to start on a backend that cannot run (HiGHS without ``highspy``)
+# rather than answering every compute request with a 500.
+backends.get_backend(SOLVER_CONFIG.backend)
+
+
+def _solver_cache_context():
+    """The solver configuration a cached compute answer was produced under."""
+    return SOLVER_CONFIG
+
+
+def _solver_deadline():
+    """The end-to-end deadline a compute operation runs under, which bounds how
+    long it may wait in the envelope's slot queue."""
+    return SOLVER_CONFIG.request_deadline_seconds
+
+
+def _request_config():
+    """SOLVER_CONFIG with the time this request waited for its slot taken out
+    of its deadline, so queueing never stretches the end-to-end budget."""
+    waited = envelope.slot_wait()
+    if not waited:
+        return SOLVER_CONFIG
+    return replace(SOLVER_CONFIG, request_deadline_seconds=max(
+        0.0, SOLVER_CONFIG.request_deadline_seconds - waited))
 
 
 def _build_fermentable_solver(data):
@@ -67,10 +120,72 @@ def _build_fermentable_solver(data):
         max_unique_grains=data.get('max_unique_fermentables', 4),
         sensory_keywords=all_grains.get_sensory_keywords(),
         sensory_bounds=data.get('sensory_model'),
-        config=SOLVER_CONFIG,
+        config=_request_config(),
     )
 
 
+def _range_color_context(data):
+    """The color context a focused range holds fixed: only when the brief
+    actually pins a color band."""
+    return _color_context(data) if data.get('beer_profile') else None
+
+
+def _infeasible_precheck(color_context, exclusions=None):
+    """Build an envelope precheck that answers a brief the solver's presolve
+    proves infeasible, before it can take a solver slot.
+
+    ``color_context`` maps the brief to the color band its operation holds
+    fixed. ``exclusions`` maps the brief to the descriptors whose own bound is
+    skipped, as a focused range does; the brief is rejected only when presolve
+    proves every one of them infeasible."""
+    def precheck(data):
+        solver = _build_fermentable_solver(data)
+        context = color_context(data)
+        excluded = exclusions(data) if exclusions is not None else [None]
+        if all(solver.proves_infeasible(context, exclude_sensory=name)
+               for name in excluded):
+            return problem(422, 'infeasible')
+        return None
+    return precheck
+
+
+def _atlas_range(data):
+    """Envelope precheck: answer a focused range for a bare style seed straight
+    from the precomputed atlas, with no solver work."""
+    found, ranges = SENSORY_ATLAS.ranges(data)
+    if not found:
+        return None
+    if ranges is None:
+        return problem(422, 'infeasible')
+    low, high = ranges[data['descriptor']]
+    return ok_json({'status': 'feasible', 'name': data['descriptor'],
+                    'min': low, 'max': high}, outcome='feasible')
+
+
+def _atlas_range_batch(data):
+    """Envelope precheck: the batch form of :func:`_atlas_range`."""
+    found, ranges = SENSORY_ATLAS.ranges(data)
+    if not found:
+        return None
+    if ranges is None:
+        return problem(422, 'infeasible')
+    return ok_json({'status': 'complete', 'ranges': [
+        {'name': name, 'status': 'feasible',
+         'min': ranges[name][0], 'max': ranges[name][1]}
+        for name in data['descriptors']]}, outcome='complete')
+
+
+def _first_answer(*prechecks):
+    """Combine envelope prechecks; the first one to answer wins."""
+    def precheck(data):
+        for check in prechecks:
+            answered = check(data)
+            if answered is not None:
+                return answered
+        return None
+    return precheck
+
+
 def _color_context(data):
     """Build the gravity/equipment/SRM color context from a request body.
 
@@ -94,6 +209,13 @@ def healthz():
     return jsonify({'status': 'ok'}), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """This process's envelope and solver metrics in the Prometheus text
+    format; aggregate counts only, never a brief or an address."""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def catch_all(path):
@@ -103,12 +225,12 @@ def catch_all(path):
 @app.route('/api/v1/grains', methods=['GET'])
 def get_grains():
     """All grains"""
-    slugs_only = request.args.get('slugs')
-    if slugs_only == 'true':
-        response = all_grains.get_grain_slugs()
+    slugs_only = request.args.get('slugs') == 'true'
+    if slugs_only:
+        build = all_grains.get_grain_slugs
     else:
-        response = all_grains.get_grain_list()
-    return jsonify(response), 200
+        build = all_grains.get_grain_list
+    return CATALOG_RESPONSES.respond(('grains', slugs_only), build)
 
 
 @app.route('/api/v1/grains/<grain>', methods=['GET'])
@@ -120,73 +242,44 @@ def get_grain():
 @app.route('/api/v1/grains/categories', methods=['GET'])
 def get_grain_categories():
     """All grain categories"""
-    return jsonify(sorted(all_grains.get_all_categories())), 200
+    return CATALOG_RESPONSES.respond(
+        ('grain-categories',), lambda: sorted(all_grains.get_all_categories()))
 
 
 @app.route('/api/v1/grains/categories/<category_name>', methods=['GET'])
 def get_grains_in_category(category_name):
     """All grains in a category_name"""
-    category_grains = [grain.get_grain_data()
-                       for grain in all_grains.get_grain_by_category(category_name)]
-    return jsonify(category_grains), 200
+    return CATALOG_RESPONSES.respond(
+        ('grains-in-category', category_name),
+        lambda: [grain.get_grain_data()
+                 for grain in all_grains.get_grain_by_category(category_name)])
 
 
 @app.route('/api/v1/style-data/grains/categories', methods=['GET'])
 def get_grain_categories_style_data():
     # TODO: Develop this properly, add styles and add a style-data/<style> endpoint
     """Style data for all grain categories"""
-    return jsonify(category_model.get_category_list()), 200
+    return CATALOG_RESPONSES.respond(('category-style-data',),
+                                     category_model.get_category_list)
 
 
 @app.route('/api/v1/styles', methods=['GET'])
 def get_styles():
     """List of styles and their summaries"""
-    response = []
-    for style_object in all_styles.style_list:
-        response.append({
-            'name': style_object.name,
-            'slug': style_object.slug,
-            'category': style_object.category,
-            'stats': style_object.stats
-        })
-    return jsonify(response), 200
+    return CATALOG_RESPONSES.respond(('styles',), all_styles.get_style_summaries)
 
 
 @app.route('/api/v1/styles/<style_slug>', methods=['GET'])
 def get_style_data(style_slug):
     """Data for a single style"""
-    style_object = all_styles.get_style_by_slug(style_slug)
+    return CATALOG_RESPONSES.respond(('style', style_slug),
+                                     lambda: _style_payload(style_slug))
+
 
-    # Format the BJCP sensory data
-    bjcp_sensory = style_object.get_bjcp_sensory_descriptors()
-    bjcp_sensory_response = {}
-
-    # Get a unique  list of keywords in both datasets, probably a better way to do this...
-    keywords = []
-    for attrib in ['flavor', 'aroma']:
-        for key, _ in bjcp_sensory[attrib].items():
-            keywords.append(key)
-    keywords = list(set(keywords))
-
-    # Build the response {'keyword': [sentences]}
-    for keyword in keywords:
-        # Get all the sentences, then remove ones that are too similar (many flavor and aroma sentences are nearly identical)
-        aroma_sentences = bjcp_sensory['aroma'].get(keyword, [])
-        flavor_sentences = bjcp_sensory['flavor'].get(keyword, [])
-        keyword_sentences = aroma_sentences + flavor_sentences
-        for sentence in keyword_sentences:
-            sans_sentence = [s for s in keyword_sentences if s != sentence]
-            seq = SequenceMatcher()
-            seq.set_seq1(sentence.lower())
-            for compare_sentence in sans_sentence:
-                seq.set_seq2(compare_sentence.lower())
-                ratio = seq.ratio() * 100
-                if ratio >= 80:
-                    keyword_sentences.remove(compare_sentence)
-
-        bjcp_sensory_response[keyword] = keyword_sentences
-
-    return jsonify({
+def _style_payload(style_slug):
+    """The full response body for one style."""
+    style_object = all_styles.get_style_by_slug(style_slug)
+    return {
         'name': style_object.name,
         'slug': style_object.slug,
         'stats': style_object.get_stats(),
@@ -197,58 +290,34 @@ def get_style_data(style_slug):
         'hops': {
             'unique_hop_count': style_object.unique_hop_count
         },
-        'bjcp_sensory': bjcp_sensory_response
-    }), 200
+        'bjcp_sensory': style_object.get_bjcp_sensory_sentences(),
+        # The seed's full descriptor ranges from the precomputed atlas, if built.
+        'sensory_ranges': SENSORY_ATLAS.for_style(style_object.slug)
+    }
 
 
 @app.route('/api/v1/styles/<style_slug>/grains', methods=['GET'])
 def get_style_grain_data(style_slug):
     """Grain data for a single style"""
-    style_object = all_styles.get_style_by_slug(style_slug)
-    return jsonify(style_object.grain_list.get_grain_list()), 200
+    return CATALOG_RESPONSES.respond(
+        ('style-grains', style_slug),
+        lambda: all_styles.get_style_by_slug(style_slug).grain_list.get_grain_list())
 
 
 @app.route('/api/v1/styles/<style_slug>/bjcp-sensory', methods=['GET'])
 def get_style_bjcp_descriptors(style_slug):
     """Grain data for a single style"""
-    style_object = all_styles.get_style_by_slug(style_slug)
-    bjcp_sensory = style_object.get_bjcp_sensory_descriptors()
-    response = {}
-
-    # Get a unique  list of keywords in both datasets, probably a better way to do this...
-    keywords = []
-    for attrib in ['flavor', 'aroma']:
-        for key, _ in bjcp_sensory[attrib].items():
-            keywords.append(key)
-    keywords = list(set(keywords))
-
-    # Build the response {'keyword': [sentences]}
-    for keyword in keywords:
-        # Get all the sentences, then remove ones that are too similar (many flavor and aroma sentences are nearly identical)
-        aroma_sentences = bjcp_sensory['aroma'].get(keyword, [])
-        flavor_sentences = bjcp_sensory['flavor'].get(keyword, [])
-        keyword_sentences = aroma_sentences + flavor_sentences
-        for sentence in keyword_sentences:
-            sans_sentence = [s for s in keyword_sentences if s != sentence]
-            seq = SequenceMatcher()
-            seq.set_seq1(sentence.lower())
-            for compare_sentence in sans_sentence:
-                seq.set_seq2(compare_sentence.lower())
-                ratio = seq.ratio() * 100
-                if ratio >= 80:
-                    keyword_sentences.remove(compare_sentence)
-
-        response[keyword] = keyword_sentences
-
-    return jsonify(response), 200
+    return CATALOG_RESPONSES.respond(
+        ('style-bjcp-sensory', style_slug),
+        lambda: all_styles.get_style_by_slug(style_slug).get_bjcp_sensory_sentences())
 
 
 @app.route('/api/v1/style-data/grains/categories/<category_name>', methods=['GET'])
 def get_grain_category_style_data(category_name):
     """Style details for a single category"""
-    category_data = category_model.get_category(
-        category_name).get_category_data()
-    return jsonify(category_data), 200
+    return CATALOG_RESPONSES.respond(
+        ('category-style-data', category_name),
+        lambda: category_model.get_category(category_name).get_category_data())
 
 
 @app.route('/api/v1/grains/categories/<category_name>', methods=['GET'])
@@ -263,21 +332,27 @@ def get_fermentable_list_sensory_keywords():
     POST: All possible sensory keywords for the posted grain list (list of slugs)
     """
     if request.method == 'GET':
-        return jsonify(sorted(all_grains.get_sensory_keywords())), 200
+        return CATALOG_RESPONSES.respond(
+            ('sensory-keywords',), lambda: sorted(all_grains.get_sensory_keywords()))
     elif request.method == 'POST':
         # TODO: Return all possible sensory keywords for the posted grain list
         pass
 
 
 @app.route('/api/v1/grains/sensory-range', methods=['POST'])
-@compute_endpoint('sensory_range', CONTRACT, require_descriptor=True)
+@compute_endpoint('sensory_range', CONTRACT, require_descriptor=True,
+                  cache_context=_solver_cache_context, deadline=_solver_deadline,
+                  precheck=_first_answer(_atlas_range, _infeasible_precheck(
+                      _range_color_context,
+                      exclusions=lambda data: [data['descriptor']])))
 def get_fermentable_sensory_range(data):
     """Return the exact achievable min/max for one named sensory descriptor.
 
     Holds every other configured constraint fixed and excludes the target
     descriptor's own bound, so the range is its full editable span. This is the
     focused replacement for the retired all-descriptor sweep; one request asks
-    about exactly one flavor.
+    about exactly one flavor. A bare style seed (no sensory bounds, no color
+    band) is answered from the precomputed sensory atlas without a solve.
 
     POST format:
     {
@@ -291,9 +366,8 @@ def get_fermentable_sensory_range(data):
     }
     """
     solver = _build_fermentable_solver(data)
-    # Hold color fixed only when the brief actually pins a color band.
-    context = _color_context(data) if data.get('beer_profile') else None
-    result = solver.sensory_range(data['descriptor'], color_context=context)
+    result = solver.sensory_range(data['descriptor'],
+                                  color_context=_range_color_context(data))
 
     if result.status == CheckStatus.FEASIBLE:
         return ok_json({'status': 'feasible', 'name': result.name,
@@ -306,8 +380,54 @@ def get_fermentable_sensory_range(data):
     return problem(422, 'invalid')
 
 
+@app.route('/api/v1/grains/sensory-range/batch', methods=['POST'])
+@compute_endpoint('sensory_range_batch', CONTRACT, require_descriptors=True,
+                  cache_context=_solver_cache_context, deadline=_solver_deadline,
+                  precheck=_first_answer(_atlas_range_batch, _infeasible_precheck(
+                      _range_color_context,
+                      exclusions=lambda data: data['descriptors'])))
+def get_fermentable_sensory_range_batch(data):
+    """Return the exact achievable min/max for a short list of descriptors.
+
+    Each range is the same as the focused endpoint's, but the whole list shares
+    one request, one solver slot, one solver budget and one reused model. The
+    list is capped (``envelope.MAX_BATCH_DESCRIPTORS``); this is not the retired
+    all-descriptor sweep. Ranges come back in request order, each with its own
+    status. If the budget runs out part-way, the answered ranges are returned as
+    ``partial`` and the rest are marked ``deadline_exceeded``.
+
+    POST format matches the focused endpoint, with a list in place of the
+    single descriptor:
+    {
+        "descriptors": ["bready", "toasty"],
+        "fermentable_list": [grain1, grain2],
+        ...
+    }
+    """
+    solver = _build_fermentable_solver(data)
+    results = solver.sensory_range_batch(data['descriptors'],
+                                         color_context=_range_color_context(data))
+
+    statuses = {result.status for result in results}
+    if statuses == {CheckStatus.INFEASIBLE}:
+        return problem(422, 'infeasible')
+    if statuses == {CheckStatus.DEADLINE_EXCEEDED}:
+        return problem(503, 'deadline')
+    ranges = []
+    for result in results:
+        entry = {'name': result.name, 'status': result.status.value}
+        if result.status == CheckStatus.FEASIBLE:
+            entry.update({'min': result.minimum, 'max': result.maximum})
+        ranges.append(entry)
+    outcome = ('partial' if CheckStatus.DEADLINE_EXCEEDED in statuses
+               else 'complete')
+    return ok_json({'status': outcome, 'ranges': ranges}, outcome=outcome)
+
+
 @app.route('/api/v1/grains/feasibility', methods=['POST'])
-@compute_endpoint('feasibility', CONTRACT)
+@compute_endpoint('feasibility', CONTRACT, cache_context=_solver_cache_context,
+                  deadline=_solver_deadline,
+                  precheck=_infeasible_precheck(_color_context))
 def get_fermentable_brief_feasibility(data):
     """Report whether one complete grain-bill brief is feasible.
 
@@ -337,7 +457,9 @@ def get_fermentable_brief_feasibility(data):
 
 
 @app.route('/api/v1/grains/recipes', methods=['POST'])
-@compute_endpoint('recipes', CONTRACT)
+@compute_endpoint('recipes', CONTRACT, cache_context=_solver_cache_context,
+                  deadline=_solver_deadline,
+                  precheck=_infeasible_precheck(_color_context))
 def get_fermentable_list_recipes(data):
     """Generate up to five unranked, meaningfully different grain bills.
 
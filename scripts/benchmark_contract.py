@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Benchmark the compiled brief checker against the rule-by-rule reference.
+
+Times :meth:`BriefContract.validate` -- the per-requirement checker compiled on
+first use -- and :meth:`BriefContract.validate_reference` on the briefs that cost
+the envelope the most to check, and reports the per-call time of each and the
+speedup:
+
+* the largest valid brief: every catalog grain, category and sensory keyword,
+  with the descriptor fields a batch request may carry,
+* the same brief rejected only at its very last field, so both checkers walk it
+  all the way,
+* a 64 KiB body (``MAX_BODY_BYTES``) of the valid brief's JSON padded out with
+  whitespace -- the catalog caps keep any valid brief well under the body cap,
+  so this is the most the envelope ever validates after parsing -- and
+* 64 KiB bodies that the caps reject early: a fermentable list longer than the
+  catalog and a sensory model of unknown keywords.
+
+Every brief must get the same answer from both checkers; the script exits
+non-zero if one disagrees.
+
+Usage:
+    python3 scripts/benchmark_contract.py [--repeats N] [--json]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import timeit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from brewgen.backend import envelope, views  # noqa: E402
+
+CONTRACT = views.CONTRACT
+REQUIRED = {"require_descriptor": True, "require_descriptors": True}
+
+
+def _largest_brief():
+    keywords = sorted(CONTRACT.sensory_keywords)
+    return {
+        "version": envelope.BRIEF_VERSION,
+        "fermentable_list": [{"slug": slug, "min_percent": 0, "max_percent": 40}
+                             for slug in sorted(CONTRACT.slugs)],
+        "category_model": [{"name": name, "min_percent": 0, "max_percent": 100,
+                            "unique_fermentable_count": 2}
+                           for name in sorted(CONTRACT.categories)],
+        "sensory_model": [{"name": name, "min": 0, "max": 5} for name in keywords],
+        "max_unique_fermentables": 6,
+        "equipment_profile": {"target_volume_gallons": 5.5, "mash_efficiency": 72},
+        "beer_profile": {"original_sg": 1.05, "min_color_srm": 2, "max_color_srm": 30},
+        "descriptor": keywords[0],
+        "descriptors": keywords[:envelope.MAX_BATCH_DESCRIPTORS],
+    }
+
+
+def _fill(template, make_item):
+    """``template`` with its one list grown until the JSON reaches 64 KiB."""
+    brief = copy.deepcopy(template)
+    items = next(value for value in brief.values() if isinstance(value, list))
+    while len(json.dumps(brief)) < envelope.MAX_BODY_BYTES:
+        items.append(make_item(len(items)))
+    items.pop()
+    return brief
+
+
+def _briefs():
+    largest = _largest_brief()
+    late = copy.deepcopy(largest)
+    late["beer_profile"]["min_color_srm"] = 40
+    padded = json.dumps(largest, indent=2)
+    padded += " " * (envelope.MAX_BODY_BYTES - len(padded.encode()))
+    slug = sorted(CONTRACT.slugs)[0]
+    return {
+        "largest valid": (json.dumps(largest), largest),
+        "rejected at last field": (json.dumps(late), late),
+        "64 KiB padded valid": (padded, json.loads(padded)),
+        "64 KiB long fermentables": _body(_fill(
+            {"fermentable_list": []},
+            lambda i: {"slug": slug, "min_percent": 0, "max_percent": 40})),
+        "64 KiB unknown keywords": _body(_fill(
+            {"sensory_model": [],
+             "fermentable_list": [{"slug": slug, "min_percent": 0, "max_percent": 100}],
+             "category_model": []},
+            lambda i: {"name": "keyword-%d" % i, "min": 0, "max": 5})),
+    }
+
+
+def _body(brief):
+    return json.dumps(brief), brief
+
+
+def _per_call(check, brief, repeats):
+    """Best-of-``repeats`` seconds per call."""
+    timer = timeit.Timer(lambda: check(brief, **REQUIRED))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeats, number)) / number
+
+
+def run(repeats):
+    report, agree = {}, True
+    for label, (body, brief) in _briefs().items():
+        outcome = CONTRACT.validate(brief, **REQUIRED)
+        if outcome != CONTRACT.validate_reference(brief, **REQUIRED):
+            agree = False
+        compiled = _per_call(CONTRACT.validate, brief, repeats)
+        reference = _per_call(CONTRACT.validate_reference, brief, repeats)
+        report[label] = {
+            "body_bytes": len(body.encode()),
+            "outcome": outcome or "valid",
+            "compiled_us": round(compiled * 1e6, 2),
+            "reference_us": round(reference * 1e6, 2),
+            "speedup": round(reference / compiled, 2),
+        }
+    return report, agree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args()
+
+    report, agree = run(args.repeats)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for label, row in report.items():
+            print("%-26s %6d bytes  %-7s  compiled %8.2fus  reference %8.2fus  %.2fx"
+                  % (label, row["body_bytes"], row["outcome"], row["compiled_us"],
+                     row["reference_us"], row["speedup"]))
+    if not agree:
+        print("the compiled checker and the reference disagree", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
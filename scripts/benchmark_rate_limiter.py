@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark per-request rate-limiter cost with many live visitor buckets.
+
+Fills a :class:`RateLimiter` with ``--buckets`` live visitors (100k by default),
+then times :meth:`RateLimiter.allow` -- which also runs idle eviction under the
+limiter's lock -- for three request mixes:
+
+* a new visitor per request, the burst-from-many-addresses case,
+* returning visitors, picked at random from the live set, and
+* steady state: time advances so that one old bucket expires per request.
+
+Each mix runs against the last-seen-ordered limiter and against the same
+limiter with the previous full-scan eviction, and the script reports the
+per-request time of each and the speedup. Both must end with the same buckets;
+the script exits non-zero if they differ.
+
+Usage:
+    python3 scripts/benchmark_rate_limiter.py [--buckets N] [--requests N] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from brewgen.backend import envelope  # noqa: E402
+
+IDLE_EXPIRY = envelope.RATE_IDLE_EXPIRY_SECONDS
+
+
+class ScanningRateLimiter(envelope.RateLimiter):
+    """The limiter with the previous eviction: a scan of every bucket."""
+
+    def _evict_idle(self, now):
+        cutoff = now - self._idle_expiry
+        stale = [key for key, (_t, last) in self._buckets.items() if last < cutoff]
+        for key in stale:
+            del self._buckets[key]
+
+
+def _filled(limiter_class, buckets, clock):
+    """A limiter holding ``buckets`` visitors, each charged once, seen one
+    millisecond apart. The buckets are written directly: filling through
+    ``allow`` would make the scanning fill quadratic."""
+    limiter = limiter_class(clock=lambda: clock["now"], day_clock=lambda: 0.0)
+    tokens = limiter._capacity - 1
+    for index in range(buckets):
+        limiter._buckets[limiter._hash("198.51.%d.%d" % divmod(index, 256))] = (
+            tokens, index / 1000.0)
+    return limiter
+
+
+def _mixes(buckets, requests):
+    """Mix name -> list of ``(seconds since fill, address)`` requests."""
+    rng = random.Random(20)
+    start = buckets / 1000.0
+    return {
+        "new visitors": [(start, "203.0.%d.%d" % divmod(i, 256))
+                         for i in range(requests)],
+        "returning visitors": [(start, "198.51.%d.%d" % divmod(
+            rng.randrange(buckets), 256)) for _ in range(requests)],
+        # The clock sits just past the oldest bucket's expiry and advances one
+        # millisecond a request, so each request expires about one bucket.
+        "steady expiry": [(IDLE_EXPIRY + 0.0005 + i / 1000.0,
+                           "203.0.%d.%d" % divmod(i, 256)) for i in range(requests)],
+    }
+
+
+def _timed(limiter_class, buckets, plan):
+    clock = {"now": 0.0}
+    limiter = _filled(limiter_class, buckets, clock)
+    elapsed = 0.0
+    for now, address in plan:
+        clock["now"] = now
+        start = time.perf_counter()
+        limiter.allow(address)
+        elapsed += time.perf_counter() - start
+    return elapsed / len(plan), dict(limiter._buckets)
+
+
+def run(buckets, requests):
+    report, agree = {}, True
+    for label, plan in _mixes(buckets, requests).items():
+        ordered, ordered_state = _timed(envelope.RateLimiter, buckets, plan)
+        scanning, scanning_state = _timed(ScanningRateLimiter, buckets, plan)
+        # Salts differ per limiter, so compare bucket contents, not keys.
+        if sorted(ordered_state.values()) != sorted(scanning_state.values()):
+            agree = False
+        report[label] = {
+            "live_buckets": len(ordered_state),
+            "ordered_us": round(ordered * 1e6, 2),
+            "scan_us": round(scanning * 1e6, 2),
+            "speedup": round(scanning / ordered, 1),
+        }
+    return report, agree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buckets", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args()
+
+    report, agree = run(args.buckets, args.requests)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for label, row in report.items():
+            print("%-20s %7d buckets  ordered %9.2fus  scan %9.2fus  %.1fx"
+                  % (label, row["live_buckets"], row["ordered_us"], row["scan_us"],
+                     row["speedup"]))
+    if not agree:
+        print("ordered and scanning eviction kept different buckets", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
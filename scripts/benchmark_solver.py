@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Benchmark grain-bill generation across solver configurations.
+
+Runs :meth:`FermentableSolver.generate` directly -- no HTTP, no envelope -- on
+a handful of style-shaped briefs built from the shipped grain catalog, once per
+configuration variant, and reports for each:
+
+* the wall time of a whole generation (median and worst over the repeats),
+* the wall time of every individual solve, by bill index, since the later
+  bills of a set are the ones that time out into ``partial``, and
+* how often the set finished ``complete`` under the production deadline.
+
+Variants differ only in the ``SolverConfig`` field under comparison, so the
+numbers isolate that one choice. Every variant must return the same number of
+bills; the script exits non-zero if one falls short of another.
+
+Usage:
+    python3 scripts/benchmark_solver.py [--repeats N] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import replace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from brewgen.backend import views  # noqa: E402
+from brewgen.backend.solver.fermentables import (  # noqa: E402
+    FermentableSolver, SolverConfig, GenerationStatus)
+
+# The configurations under comparison, each as SolverConfig overrides.
+VARIANTS = {
+    "split cut": {"diversity_cut": "split", "warm_start": False},
+    "support cut": {"diversity_cut": "support", "warm_start": False},
+    "support cut, warm start": {"diversity_cut": "support", "warm_start": True},
+    "heuristic first": {"diversity_cut": "support", "warm_start": True,
+                        "heuristic": True},
+}
+
+# Style-shaped briefs: (label, category model, max unique grains, SRM band).
+BRIEFS = [
+    ("pale ale", [("base", 60, 100, 2), ("crystal", 0, 25, 2),
+                  ("munich", 0, 40, 1)], 4, (4.0, 12.0)),
+    ("brown ale", [("base", 55, 100, 2), ("crystal", 0, 25, 2),
+                   ("roasted", 0, 12, 1), ("munich", 0, 40, 1)], 5, (15.0, 25.0)),
+    ("wheat", [("base", 30, 70, 2), ("wheat", 30, 70, 2),
+               ("crystal", 0, 10, 1)], 4, (2.0, 8.0)),
+    ("stout", [("base", 50, 100, 2), ("crystal", 0, 20, 2),
+               ("roasted", 5, 20, 2), ("munich", 0, 20, 1)], 6, (30.0, 60.0)),
+]
+SG, VOL, EFF = 1.055, 5.5, 75
+
+
+def _solver(brief, config):
+    label, cats, max_unique, _band = brief
+    names = {name for name, *_ in cats}
+    grains = [g for g in views.all_grains.get_grain_list() if g["category"] in names]
+    data = {
+        "fermentable_list": [{"slug": g["slug"], "min_percent": 0,
+                              "max_percent": g["max_percent"]} for g in grains],
+        "category_model": [{"name": name, "min_percent": lo, "max_percent": hi,
+                            "unique_fermentable_count": count}
+                           for name, lo, hi, count in cats],
+        "max_unique_fermentables": max_unique,
+    }
+    solver = views._build_fermentable_solver(data)
+    return FermentableSolver(solver.grains, solver.categories, max_unique,
+                             solver.sensory_keywords, config=config)
+
+
+def _timed_generate(solver, band):
+    """Generate once; return (result, total seconds, per-solve seconds)."""
+    solves = []
+    real = solver._solve
+
+    def timed(prob, time_limit=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return real(prob, time_limit, **kwargs)
+        finally:
+            solves.append(time.perf_counter() - start)
+
+    solver._solve = timed
+    start = time.perf_counter()
+    result = solver.generate(SG, VOL, EFF, *band)
+    return result, time.perf_counter() - start, solves
+
+
+def run(repeats):
+    report = {}
+    bills = {}
+    for variant, overrides in VARIANTS.items():
+        relaxed = replace(SolverConfig(**overrides), request_deadline_seconds=60.0,
+                          solver_time_limit_seconds=60.0)
+        production = SolverConfig(**overrides)
+        rows = {}
+        for brief in BRIEFS:
+            label, _cats, _max_unique, band = brief
+            totals, per_bill = [], {}
+            for _ in range(repeats):
+                result, total, solves = _timed_generate(_solver(brief, relaxed), band)
+                totals.append(total)
+                for index, seconds in enumerate(solves):
+                    per_bill.setdefault(index, []).append(seconds)
+            bills.setdefault(label, {})[variant] = len(result.alternatives)
+            complete = sum(
+                _solver(brief, production).generate(SG, VOL, EFF, *band).status
+                is GenerationStatus.COMPLETE for _ in range(repeats))
+            rows[label] = {
+                "bills": len(result.alternatives),
+                "median_seconds": round(statistics.median(totals), 4),
+                "worst_seconds": round(max(totals), 4),
+                "solve_median_seconds": [round(statistics.median(per_bill[i]), 4)
+                                         for i in sorted(per_bill)],
+                "complete_under_deadline": "%d/%d" % (complete, repeats),
+            }
+        report[variant] = rows
+    agree = all(len(set(counts.values())) == 1 for counts in bills.values())
+    return report, agree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args()
+
+    report, agree = run(args.repeats)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for variant, rows in report.items():
+            print(variant)
+            for label, row in rows.items():
+                print("  %-10s %d bills  median %.3fs  worst %.3fs  complete %s"
+                      % (label, row["bills"], row["median_seconds"],
+                         row["worst_seconds"], row["complete_under_deadline"]))
+                print("  %-10s per-solve %s" % ("", row["solve_median_seconds"]))
+    if not agree:
+        print("variants returned different numbers of bills", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
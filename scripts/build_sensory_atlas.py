@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Build the per-style sensory range atlas (``brewgen/backend/data/sensory-atlas.json``).
+
+For every style in ``StyleModel``, builds the style's unmodified seed brief --
+its grain and category usage, no sensory bounds, no color band -- exactly as
+the API would, runs the full :meth:`FermentableSolver.sensory_ranges` sweep
+offline with no deadline, and writes every descriptor's min/max keyed by the
+seed's canonical hash. The file also records the hash of the data it was built
+from; the API ignores an atlas whose hash no longer matches.
+
+Rerun it and commit the result whenever ``grains.json`` or ``styles.json``
+changes.
+
+Usage:
+    python3 scripts/build_sensory_atlas.py [--check]
+
+``--check`` rebuilds in memory and exits non-zero if the committed atlas
+differs, for CI.
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import replace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from brewgen.backend import views  # noqa: E402
+from brewgen.backend.solver import atlas  # noqa: E402
+
+
+def seed_brief(style_object):
+    """The unmodified seed brief for a style, in the public brief shape."""
+    return {
+        "fermentable_list": [
+            {"slug": g["slug"], "min_percent": g["min_percent"],
+             "max_percent": g["max_percent"]}
+            for g in style_object.get_grain_usage()],
+        "category_model": style_object.get_category_usage(),
+        "max_unique_fermentables": style_object.unique_fermentable_count or 4,
+    }
+
+
+def build():
+    seeds = {}
+    for style_object in views.all_styles.style_list:
+        brief = seed_brief(style_object)
+        solver = views._build_fermentable_solver(brief)
+        # Offline: the full sweep runs without the public deadline.
+        solver.config = replace(solver.config, parallel_range=False)
+        ranges = solver.sensory_ranges()
+        seeds[atlas.seed_key(brief)] = {
+            "style": style_object.slug,
+            "ranges": ({r["name"]: [r["min"], r["max"]] for r in ranges}
+                       if ranges else None),
+        }
+    return {
+        "version": atlas.ATLAS_VERSION,
+        "data_hash": atlas.data_hash(),
+        "seeds": seeds,
+    }
+
+
+def render(payload):
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true",
+                        help="fail if the committed atlas is out of date")
+    args = parser.parse_args()
+
+    text = render(build())
+    if args.check:
+        try:
+            with open(atlas.ATLAS_PATH, encoding="utf-8") as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current != text:
+            print("sensory atlas is out of date; rerun "
+                  "scripts/build_sensory_atlas.py", file=sys.stderr)
+            return 1
+        return 0
+    with open(atlas.ATLAS_PATH, "w", encoding="utf-8") as f:
+        f.write(text)
+    print("wrote %d style seeds to %s" % (len(json.loads(text)["seeds"]),
+                                          os.path.relpath(atlas.ATLAS_PATH, REPO_ROOT)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
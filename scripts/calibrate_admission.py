@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Calibrate the admission cost model (``brewgen/backend/data/admission-cost.json``).
+
+Runs every compute operation's view on a spread of briefs, exactly as the API
+would once a request holds its solver slot, under the production solver
+configuration. The briefs are each style's seed grain bill, the same bill with
+a few sensory bounds, and wide briefs of every grain in a few categories. It
+logs each run as one ``(operation, features, seconds)`` record and fits the
+per-operation linear model of :mod:`brewgen.backend.admission` to them.
+
+Timings are machine-specific: calibrate on the production hardware class
+(Linux/amd64, one vCPU) and commit the result. A fit with a negative
+coefficient is reported and not written. ``--log`` keeps the measured
+records as JSON lines, and ``--from-log`` refits from such a file, adding more
+measurements, without rerunning anything.
+
+Usage:
+    python3 scripts/calibrate_admission.py [--briefs N] [--log FILE]
+                                           [--from-log FILE ...]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from brewgen.backend import admission, views  # noqa: E402
+
+# operation -> the undecorated view the envelope runs under a slot.
+VIEWS = {
+    "feasibility": views.get_fermentable_brief_feasibility,
+    "sensory_range": views.get_fermentable_sensory_range,
+    "sensory_range_batch": views.get_fermentable_sensory_range_batch,
+    "recipes": views.get_fermentable_list_recipes,
+}
+WIDE_CATEGORIES = [["base", "crystal"], ["base", "crystal", "roasted", "munich"],
+                   ["base", "wheat", "crystal", "adjunct"]]
+BEER_PROFILE = {"original_sg": 1.055, "min_color_srm": 2, "max_color_srm": 40}
+
+
+def _style_brief(style_object):
+    return {
+        "fermentable_list": [
+            {"slug": g["slug"], "min_percent": g["min_percent"],
+             "max_percent": g["max_percent"]}
+            for g in style_object.get_grain_usage()],
+        "category_model": style_object.get_category_usage(),
+        "max_unique_fermentables": style_object.unique_fermentable_count or 4,
+        "beer_profile": BEER_PROFILE,
+    }
+
+
+def _wide_brief(names, rng):
+    grains = [g for g in views.all_grains.get_grain_list() if g["category"] in names]
+    return {
+        "fermentable_list": [{"slug": g["slug"], "min_percent": 0,
+                              "max_percent": g["max_percent"]} for g in grains],
+        "category_model": [{"name": name, "min_percent": 0, "max_percent": 100,
+                            "unique_fermentable_count": 2} for name in names],
+        "max_unique_fermentables": rng.randint(3, 6),
+        "beer_profile": BEER_PROFILE,
+    }
+
+
+def briefs(count, rng):
+    """``count`` briefs: style seeds, some with sensory bounds, and wide ones."""
+    keywords = sorted(views.all_grains.get_sensory_keywords())
+    styles = rng.sample(views.all_styles.style_list,
+                        min(count, len(views.all_styles.style_list)))
+    result = []
+    for index, style_object in enumerate(styles):
+        brief = _style_brief(style_object)
+        if index % 2:
+            brief["sensory_model"] = [{"name": name, "min": 0, "max": 5}
+                                      for name in rng.sample(keywords, rng.randint(1, 6))]
+        result.append(brief)
+    for names in WIDE_CATEGORIES:
+        result.append(_wide_brief(names, rng))
+    return result, keywords
+
+
+def measure(count, seed=23):
+    rng = random.Random(seed)
+    samples = []
+    brief_list, keywords = briefs(count, rng)
+    for brief in brief_list:
+        for operation, view in VIEWS.items():
+            data = dict(brief)
+            if operation == "sensory_range":
+                data["descriptor"] = rng.choice(keywords)
+            elif operation == "sensory_range_batch":
+                data["descriptors"] = rng.sample(keywords, rng.randint(1, 8))
+            start = time.perf_counter()
+            view.__wrapped__(data)
+            seconds = time.perf_counter() - start
+            samples.append((operation, admission.features(
+                operation, data, views.SOLVER_CONFIG.max_bills), round(seconds, 6)))
+    return samples
+
+
+def report(coefficients, samples):
+    """Print each operation's fit error and the units its runs would take."""
+    model = admission.CostModel(coefficients)
+    deadline = views.SOLVER_CONFIG.request_deadline_seconds
+    for operation in sorted(coefficients):
+        errors, units = [], {}
+        for op, values, seconds in samples:
+            if op != operation:
+                continue
+            predicted = model.seconds(operation, values)
+            errors.append(abs(predicted - seconds))
+            count = admission.units_for(predicted, deadline)
+            units[count] = units.get(count, 0) + 1
+        print("%-20s %3d runs  mean abs error %.3fs  runs per unit count %s"
+              % (operation, len(errors), sum(errors) / len(errors),
+                 dict(sorted(units.items()))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--briefs", type=int, default=24,
+                        help="style seeds to sample (plus the wide briefs)")
+    parser.add_argument("--log", help="append the measured records to this JSONL file")
+    parser.add_argument("--from-log", nargs="*", default=None,
+                        help="fit from these JSONL files instead of measuring")
+    args = parser.parse_args()
+
+    samples = []
+    if args.from_log is not None:
+        for path in args.from_log:
+            with open(path, encoding="utf-8") as f:
+                samples.extend((r["operation"], tuple(r["features"]), r["seconds"])
+                               for r in map(json.loads, f))
+    else:
+        samples = measure(args.briefs)
+        if args.log:
+            with open(args.log, "a", encoding="utf-8") as f:
+                for operation, values, seconds in samples:
+                    f.write(json.dumps({"operation": operation,
+                                        "features": list(values),
+                                        "seconds": seconds}) + "\n")
+
+    coefficients = admission.fit(samples)
+    report(coefficients, samples)
+    problem = admission.implausible(coefficients)
+    if problem is not None:
+        print("refusing to write the model (%s); measure more briefs" % problem,
+              file=sys.stderr)
+        return 1
+    payload = {
+        "version": admission.COST_MODEL_VERSION,
+        "features": list(admission.FEATURES),
+        "coefficients": coefficients,
+        "samples": len(samples),
+    }
+    with open(admission.COST_MODEL_PATH, "w", encoding="utf-8") as f:
+        f.write(json.dumps(payload, indent=2, sort_keys=True) + "\n")
+    print("wrote %s" % os.path.relpath(admission.COST_MODEL_PATH, REPO_ROOT))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Cost-aware admission: brief features, the fitted cost model, and weighted
+slot units, in process and shared."""
+
+import json
+
+import pytest
+
+from brewgen.backend import admission, envelope, shared_state
+
+
+def test_features_follow_the_operation():
+    data = {"fermentable_list": [{}] * 10, "max_unique_fermentables": 4,
+            "sensory_model": [{}] * 3, "descriptors": ["a", "b", "c"]}
+    assert admission.features("feasibility", data) == (10, 6, 3, 1)
+    assert admission.features("sensory_range", data) == (10, 6, 3, 2)
+    assert admission.features("sensory_range_batch", data) == (10, 6, 3, 6)
+    assert admission.features("recipes", data, max_bills=5) == (10, 6, 3, 5)
+    assert admission.features("feasibility", {"fermentable_list": [{}] * 2}) == \
+        (2, 0, 0, 1)
+
+
+def test_fit_recovers_a_linear_cost():
+    truth = [0.05, 0.01, 0.002, 0.004, 0.03]
+    samples = []
+    for grains in (3, 10, 20, 40):
+        for excess in (0, 2, 9):
+            for bounds in (0, 4):
+                for solves in (2, 8, 16):
+                    values = (grains, excess, bounds, solves)
+                    seconds = truth[0] + sum(w * v for w, v in zip(truth[1:], values))
+                    samples.append(("sensory_range_batch", values, seconds))
+    fitted = admission.fit(samples)["sensory_range_batch"]
+    assert fitted == pytest.approx(truth, abs=1e-4)
+
+
+def test_units_scale_with_the_predicted_share_of_the_deadline():
+    model = admission.CostModel({"feasibility": [0.0, 0.1, 0, 0, 0]})
+    per_slot = admission.UNITS_PER_SLOT
+    assert model.units("feasibility", {"fermentable_list": [{}]}, 2.0) == 1
+    assert model.units("feasibility", {"fermentable_list": [{}] * 11}, 2.0) == 3
+    assert model.units("feasibility", {"fermentable_list": [{}] * 90}, 2.0) == per_slot
+    # No prediction for the operation, or no deadline: a full slot.
+    assert model.units("sensory_range", {"fermentable_list": [{}]}, 2.0) == per_slot
+    assert model.units("feasibility", {"fermentable_list": [{}]}, 0) == per_slot
+    # Generation and batch ranges take a full slot however cheap they look.
+    cheap = admission.CostModel({op: [0.0] * 5 for op in admission.FULL_SLOT_OPERATIONS})
+    for operation in admission.FULL_SLOT_OPERATIONS:
+        assert cheap.units(operation, {"fermentable_list": [{}]}, 2.0) == per_slot
+
+
+def _model_file(path, coefficients, version=admission.COST_MODEL_VERSION):
+    path.write_text(json.dumps({"version": version,
+                                "features": list(admission.FEATURES),
+                                "coefficients": coefficients}))
+    return str(path)
+
+
+def test_a_missing_stale_or_implausible_model_costs_a_full_slot(tmp_path):
+    assert admission.CostModel.load(str(tmp_path / "missing.json")).coefficients == {}
+    stale = _model_file(tmp_path / "stale.json", {"feasibility": [0, 0, 0, 0, 0]},
+                        version=admission.COST_MODEL_VERSION + 1)
+    assert admission.CostModel.load(stale).coefficients == {}
+    negative = _model_file(tmp_path / "negative.json",
+                           {"feasibility": [0.01, 0.001, -0.002, 0, 0]})
+    assert admission.CostModel.load(negative).coefficients == {}
+    short = _model_file(tmp_path / "short.json", {"feasibility": [0.01, 0.001]})
+    assert admission.CostModel.load(short).coefficients == {}
+    good = _model_file(tmp_path / "good.json", {"feasibility": [0.01, 0.001, 0, 0, 0]})
+    assert admission.CostModel.load(good).coefficients == {
+        "feasibility": [0.01, 0.001, 0, 0, 0]}
+    # No model ships until one is fitted on the production hardware.
+    assert admission.CostModel.load().coefficients == {}
+
+
+def test_weighted_slots_share_capacity_in_units():
+    slots = envelope.WeightedSlots(limit=2, units_per_slot=4)
+    assert slots.acquire(blocking=False)              # a full slot: 4 units
+    for _ in range(4):
+        assert slots.acquire(blocking=False, units=1)
+    assert not slots.acquire(blocking=False, units=1)
+    assert not slots.acquire(timeout=0.01)
+    slots.release()
+    assert slots.acquire(blocking=False, units=3)
+    assert not slots.acquire(blocking=False, units=2)
+    slots.release(3)
+    slots.release(4)
+    with pytest.raises(ValueError):
+        slots.release(1)
+
+
+def test_shared_slot_units_are_all_or_nothing(tmp_path):
+    first = shared_state.SharedSlots(str(tmp_path), 2, units_per_slot=4)
+    second = shared_state.SharedSlots(str(tmp_path), 2, units_per_slot=4)
+    assert first.acquire(blocking=False, units=3)
+    assert second.acquire(blocking=False)             # a full slot
+    assert not second.acquire(blocking=False, units=2)
+    assert second.acquire(blocking=False, units=1)    # the last unit
+    first.release(3)
+    assert second.acquire(blocking=False, units=3)
+    second.release(3)
+    second.release(1)
+    second.release()
+    with pytest.raises(ValueError):
+        second.release()
@@ -0,0 +1,77 @@
+"""Pluggable solver backends: every backend answers the same model the same
+way. The in-process HiGHS backend is exercised only where its optional
+``highspy`` dependency is installed."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import make_grain, make_category
+from brewgen.backend.solver import backends
+from brewgen.backend.solver.fermentables import (
+    CheckStatus, ColorContext, FermentableSolver, GenerationStatus, SolverConfig)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BACKEND_NAMES = [
+    pytest.param("cbc"),
+    pytest.param("highs", marks=pytest.mark.skipif(
+        not backends.HighsBackend().available(), reason="highspy not installed")),
+]
+
+GRAINS = [
+    make_grain("pale", "base", color=2.0, ppg=37.0, sensory={"bready": 2.0}),
+    make_grain("munich", "base", color=9.0, ppg=35.0, sensory={"bready": 4.0}),
+    make_grain("crystal", "crystal", color=60.0, ppg=34.0, max_percent=20,
+               sensory={"caramel": 5.0}),
+]
+CATS = [make_category("base", 70, 100), make_category("crystal", 0, 20)]
+
+
+def _solver(backend, **kwargs):
+    return FermentableSolver(GRAINS, CATS, max_unique_grains=3,
+                             sensory_keywords=["bready", "caramel"],
+                             config=SolverConfig(backend=backend), **kwargs)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        backends.get_backend("no-such-solver")
+    with pytest.raises(ValueError):
+        SolverConfig(backend="no-such-solver")
+
+
+def test_the_server_refuses_to_start_on_an_unknown_backend():
+    env = dict(os.environ, BREWGEN_SOLVER_BACKEND="no-such-solver")
+    result = subprocess.run([sys.executable, "-c", "import brewgen.backend.views"],
+                            cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert "unknown solver backend: 'no-such-solver'" in result.stderr
+
+
+@pytest.mark.parametrize("backend", BACKEND_NAMES)
+def test_backends_agree_on_ranges_and_feasibility(backend):
+    reference = _solver("cbc")
+    solver = _solver(backend)
+    context = ColorContext(1.05, 5.5, 75, 3.0, 10.0)
+    for name in ("bready", "caramel"):
+        expected = reference.sensory_range(name, color_context=context)
+        actual = solver.sensory_range(name, color_context=context)
+        assert actual.status is CheckStatus.FEASIBLE
+        assert actual.minimum == pytest.approx(expected.minimum, abs=1e-6)
+        assert actual.maximum == pytest.approx(expected.maximum, abs=1e-6)
+    assert solver.is_valid() is True
+    dark = ColorContext(1.05, 5.5, 75, 80.0, 90.0)
+    assert solver.feasibility(color_context=dark).status is CheckStatus.INFEASIBLE
+
+
+@pytest.mark.parametrize("backend", BACKEND_NAMES)
+def test_backends_generate_valid_diverse_bills(backend):
+    result = _solver(backend).generate(1.05, 5.5, 75, 3.0, 10.0)
+    assert result.status is GenerationStatus.COMPLETE
+    assert len(result.alternatives) == 5
+    for bill in result.alternatives:
+        assert sum(bill.percents.values()) == 100
+        assert 3.0 - 1e-9 <= bill.srm <= 10.0 + 1e-9
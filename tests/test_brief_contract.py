@@ -0,0 +1,109 @@
+"""The compiled brief checker must accept and reject exactly the briefs the
+rule-by-rule reference does, for every descriptor requirement."""
+
+import copy
+import json
+import random
+
+import pytest
+
+from brewgen.backend import envelope, views
+
+CONTRACT = views.CONTRACT
+SLUGS = sorted(CONTRACT.slugs)
+KEYWORDS = sorted(CONTRACT.sensory_keywords)
+REQUIREMENTS = [
+    {},
+    {"require_descriptor": True},
+    {"require_descriptors": True},
+]
+
+
+def _full_brief(required):
+    """The largest valid brief: every grain, category and keyword."""
+    keywords = KEYWORDS
+    brief = {
+        "version": envelope.BRIEF_VERSION,
+        "fermentable_list": [{"slug": slug, "min_percent": 0, "max_percent": 40}
+                             for slug in SLUGS],
+        "category_model": [{"name": name, "min_percent": 0, "max_percent": 100,
+                            "unique_fermentable_count": 2}
+                           for name in sorted(CONTRACT.categories)],
+        "sensory_model": [{"name": name, "min": 0, "max": 5} for name in keywords],
+        "max_unique_fermentables": 6,
+        "equipment_profile": {"target_volume_gallons": 5.5, "mash_efficiency": 72},
+        "beer_profile": {"original_sg": 1.05, "min_color_srm": 2, "max_color_srm": 30},
+        "descriptor": keywords[0],
+        "descriptors": keywords[:envelope.MAX_BATCH_DESCRIPTORS],
+    }
+    if not required.get("require_descriptor"):
+        del brief["descriptor"]
+    if not required.get("require_descriptors"):
+        del brief["descriptors"]
+    return brief
+
+
+# Replacement values for a mutated leaf: wrong types, non-finite and huge numbers,
+# out-of-range numbers, bools standing in for numbers, and unknown names.
+_VALUES = [None, True, False, 0, -1, 1, 50, 101, 1.5, 10 ** 400, float("nan"),
+           float("inf"), "", "x", "pale-ale-malt", [], [1], {}, {"a": 1}]
+
+
+def _mutate(brief, rng):
+    """Change one randomly chosen node: replace, delete or duplicate it, or add
+    an unexpected key beside it."""
+    parent, key = brief, rng.choice(list(brief))
+    while isinstance(parent[key], (dict, list)) and parent[key] and rng.random() < 0.7:
+        parent = parent[key]
+        key = rng.choice(list(parent) if isinstance(parent, dict) else range(len(parent)))
+    action = rng.random()
+    if action < 0.6:
+        parent[key] = copy.deepcopy(rng.choice(
+            _VALUES + [rng.choice(SLUGS), rng.choice(KEYWORDS)]))
+    elif action < 0.75:
+        del parent[key]
+    elif action < 0.9 and isinstance(parent, list):
+        parent.append(copy.deepcopy(parent[key]))
+    elif isinstance(parent, dict):
+        parent["unexpected"] = 1
+
+
+def _outcome(check, brief, required):
+    try:
+        return check(brief, **required)
+    except Exception as exc:  # the reference raises on e.g. unhashable names
+        return type(exc)
+
+
+@pytest.mark.parametrize("required", REQUIREMENTS, ids=lambda r: ",".join(r) or "plain")
+def test_compiled_checker_matches_the_reference(required):
+    rng = random.Random(19)
+    full = json.dumps(_full_brief(required))
+    assert CONTRACT.validate_reference(json.loads(full), **required) is None
+    outcomes = set()
+    for _ in range(3000):
+        brief = json.loads(full)
+        for _ in range(rng.randint(1, 3)):
+            _mutate(brief, rng)
+        expected = _outcome(CONTRACT.validate_reference, brief, required)
+        assert _outcome(CONTRACT.validate, brief, required) == expected, brief
+        outcomes.add(expected)
+    # The corpus exercises acceptance, rejection and the reference's exceptions.
+    assert {None, "invalid", OverflowError, TypeError} <= outcomes
+
+
+@pytest.mark.parametrize("brief", [None, [], "brief", {}, {"version": 1.0},
+                                   {"version": True, "fermentable_list": []}])
+def test_top_level_shapes_match_the_reference(brief):
+    for required in REQUIREMENTS:
+        assert CONTRACT.validate(brief, **required) == \
+            CONTRACT.validate_reference(brief, **required)
+
+
+def test_checker_is_compiled_once_per_requirement():
+    contract = envelope.BriefContract(["a"], ["base"], ["sweet"])
+    brief = {"fermentable_list": [{"slug": "a", "min_percent": 0, "max_percent": 100}]}
+    assert contract.validate(brief) is None
+    assert contract.validate(brief) is None
+    assert contract.validate(dict(brief, descriptor="sweet"), require_descriptor=True) is None
+    assert len(contract._checkers) == 2
@@ -0,0 +1,154 @@
+"""The static catalog GETs serve pre-rendered, pre-compressed bytes with a
+strong ETag and Cache-Control, and answer a matching If-None-Match with 304."""
+
+import gzip
+import json
+
+import pytest
+
+from brewgen.backend import views
+from brewgen.backend.catalog_responses import CatalogResponses
+
+STYLE_SLUG = views.all_styles.get_style_slugs()[0]
+CATALOG_PATHS = [
+    "/api/v1/grains",
+    "/api/v1/grains?slugs=true",
+    "/api/v1/grains/categories",
+    "/api/v1/grains/categories/base",
+    "/api/v1/grains/sensory-keywords",
+    "/api/v1/style-data/grains/categories",
+    "/api/v1/style-data/grains/categories/base",
+    "/api/v1/styles",
+    "/api/v1/styles/%s" % STYLE_SLUG,
+    "/api/v1/styles/%s/grains" % STYLE_SLUG,
+    "/api/v1/styles/%s/bjcp-sensory" % STYLE_SLUG,
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_catalog_cache():
+    views.CATALOG_RESPONSES.clear()
+    yield
+    views.CATALOG_RESPONSES.clear()
+
+
+@pytest.fixture
+def client():
+    return views.app.test_client()
+
+
+@pytest.mark.parametrize("path", CATALOG_PATHS)
+def test_catalog_get_is_cacheable_and_revalidates(client, path):
+    resp = client.get(path)
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/json"
+    etag, weak = resp.get_etag()
+    assert etag and not weak
+    assert resp.cache_control.public
+    assert resp.cache_control.max_age == views.CATALOG_RESPONSES.max_age
+
+    again = client.get(path, headers={"If-None-Match": '"%s"' % etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert again.get_etag() == (etag, False)
+
+    stale = client.get(path, headers={"If-None-Match": '"not-the-etag"'})
+    assert stale.status_code == 200
+    assert stale.get_data() == resp.get_data()
+
+
+def test_catalog_bytes_match_jsonify(client):
+    with views.app.app_context():
+        expected = views.jsonify(views.all_grains.get_grain_list()).get_data()
+    assert client.get("/api/v1/grains").get_data() == expected
+    assert client.get("/api/v1/grains?slugs=true").get_json() == \
+        views.all_grains.get_grain_slugs()
+    assert client.get("/api/v1/styles").get_json() == \
+        views.all_styles.get_style_summaries()
+
+
+def test_fixed_payloads_are_rendered_at_startup(client, monkeypatch):
+    monkeypatch.setattr(views.all_styles, "get_style_summaries",
+                        lambda: pytest.fail("style list re-rendered"))
+    assert client.get("/api/v1/styles").status_code == 200
+
+
+def test_style_payload_is_built_once(client, monkeypatch):
+    calls = []
+    real = views._style_payload
+
+    def counting(slug):
+        calls.append(slug)
+        return real(slug)
+
+    monkeypatch.setattr(views, "_style_payload", counting)
+    path = "/api/v1/styles/%s" % STYLE_SLUG
+    first = client.get(path).get_data()
+    assert client.get(path).get_data() == first
+    assert calls == [STYLE_SLUG]
+
+
+def test_large_payloads_are_served_compressed(client):
+    plain = client.get("/api/v1/grains")
+    assert "Accept-Encoding" in plain.headers["Vary"]
+    assert plain.headers.get("Content-Encoding") is None
+
+    packed = client.get("/api/v1/grains", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in packed.headers["Vary"]
+    assert gzip.decompress(packed.get_data()) == plain.get_data()
+    assert len(packed.get_data()) < len(plain.get_data())
+    etag, weak = packed.get_etag()
+    assert not weak and etag == plain.get_etag()[0] + "-gzip"
+
+    revalidated = client.get("/api/v1/grains", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": '"%s"' % etag})
+    assert revalidated.status_code == 304
+
+    # Small payloads have no variants and do not vary.
+    small = client.get("/api/v1/grains/categories", headers={"Accept-Encoding": "gzip"})
+    assert small.headers.get("Content-Encoding") is None
+    assert "Vary" not in small.headers
+
+
+def test_negotiation_picks_the_best_accepted_variant():
+    responses = CatalogResponses(views.app, compressors={
+        "br": lambda body: b"br:" + body[:10],
+        "gzip": lambda body: b"gz:" + body[:10],
+    })
+    payload = ["x" * 2000]
+
+    def encoding(accept):
+        with views.app.test_request_context(headers={"Accept-Encoding": accept}):
+            return responses.respond("k", lambda: payload).headers.get("Content-Encoding")
+
+    assert encoding("gzip, deflate, br") == "br"
+    assert encoding("gzip") == "gzip"
+    assert encoding("br;q=0.5, gzip") == "gzip"
+    assert encoding("br;q=0, gzip;q=0") is None
+    assert encoding("*") == "br"
+    assert encoding("identity") is None
+
+
+def test_cache_is_bounded_and_does_not_cache_failures():
+    responses = CatalogResponses(views.app, max_entries=2)
+    builds = []
+
+    def build(value):
+        builds.append(value)
+        return {"value": value}
+
+    for key in ("a", "b", "c"):
+        entry = responses.rendered(key, lambda key=key: build(key))
+        assert json.loads(entry.body) == {"value": key}
+    responses.rendered("c", lambda: build("c"))
+    responses.rendered("a", lambda: build("a"))
+    assert builds == ["a", "b", "c", "a"]
+
+    def broken():
+        raise LookupError("no such style")
+
+    with pytest.raises(LookupError):
+        responses.rendered("d", broken)
+    assert responses.rendered("d", lambda: build("d")).etag
+    assert builds[-1] == "d"
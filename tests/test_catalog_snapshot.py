@@ -0,0 +1,106 @@
+"""The marshal catalog snapshot: it must yield exactly the models the JSON
+does, and any stale or foreign snapshot must fall back to the JSON."""
+
+import json
+import marshal
+import os
+import shutil
+
+import pytest
+
+from brewgen.backend.models import catalog, category, grain, style
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A private copy of the catalog source files."""
+    target = tmp_path / "data"
+    target.mkdir()
+    for name in catalog.SOURCE_FILES.values():
+        shutil.copy(os.path.join(catalog.DATA_DIR, name), target / name)
+    yield str(target)
+    catalog.reset()
+
+
+def _models():
+    grains = grain.GrainModel()
+    styles = style.StyleModel(grain_model=grains)
+    return {
+        "grains": grains.get_grain_list(),
+        "categories": category.CategoryModel().get_category_list(),
+        "styles": [[s.name, s.slug, s.id, s.category, s.stats, s.get_grain_usage(),
+                    s.get_category_usage(), s.sensory_data, s.unique_fermentable_count,
+                    s.unique_hop_count] for s in styles.style_list],
+    }
+
+
+def test_models_built_from_the_snapshot_match_the_json(monkeypatch, tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    monkeypatch.setattr(catalog, "SNAPSHOT_PATH", path)
+    catalog.reset()
+    from_json = _models()
+
+    catalog.write(path)
+    catalog.reset()
+    try:
+        assert catalog._read_snapshot(path, catalog.DATA_DIR) is not None
+        assert _models() == from_json
+    finally:
+        catalog.reset()
+
+
+def test_sections_are_fresh_copies(data_dir, tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    catalog.write(path, data_dir)
+    first = catalog.load("grains", path, data_dir)
+    first[0]["name"] = "mutated"
+    assert catalog.load("grains", path, data_dir)[0]["name"] != "mutated"
+
+
+def test_a_snapshot_of_changed_data_is_ignored(data_dir, tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    catalog.write(path, data_dir)
+    grains_path = os.path.join(data_dir, "grains.json")
+    with open(grains_path, encoding="utf-8") as f:
+        grains = json.load(f)
+    grains[0]["name"] = "Renamed Malt"
+    with open(grains_path, "w", encoding="utf-8") as f:
+        json.dump(grains, f)
+
+    assert catalog.load("grains", path, data_dir)[0]["name"] == "Renamed Malt"
+
+
+@pytest.mark.parametrize("field, value", [
+    ("version", catalog.SNAPSHOT_VERSION + 1),
+    ("cache_tag", "cpython-00"),
+])
+def test_a_snapshot_from_another_format_or_interpreter_is_ignored(
+        data_dir, tmp_path, field, value):
+    path = str(tmp_path / "catalog.snapshot")
+    payload = catalog.build(data_dir)
+    payload[field] = value
+    with open(path, "wb") as f:
+        marshal.dump(payload, f)
+    assert catalog._read_snapshot(path, data_dir) is None
+    assert len(catalog.load("categories", path, data_dir)) > 0
+
+
+def test_a_missing_or_corrupt_snapshot_falls_back(data_dir, tmp_path):
+    missing = str(tmp_path / "missing.snapshot")
+    with open(os.path.join(data_dir, "categories.json"), encoding="utf-8") as f:
+        assert catalog.load("categories", missing, data_dir) == json.load(f)
+
+    corrupt = tmp_path / "corrupt.snapshot"
+    corrupt.write_bytes(b"\x00not marshal")
+    assert catalog._read_snapshot(str(corrupt), data_dir) is None
+
+
+def test_build_rejects_data_missing_a_model_field(data_dir):
+    styles_path = os.path.join(data_dir, "styles.json")
+    with open(styles_path, encoding="utf-8") as f:
+        styles = json.load(f)
+    del styles[0]["fermentables"]["grain_usage"][0]["usage"]
+    with open(styles_path, "w", encoding="utf-8") as f:
+        json.dump(styles, f)
+    with pytest.raises(KeyError):
+        catalog.build(data_dir)
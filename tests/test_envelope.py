@@ -10,10 +10,13 @@ oversized body must be rejected before the solver is ever built."""
 
 import json
 import logging
+import threading
+import time
 
+import flask
 import pytest
 
-from brewgen.backend import views, envelope
+from brewgen.backend import admission, envelope, metrics, views
 from brewgen.backend.solver.fermentables import SolverConfig
 
 COMPUTE_ENDPOINTS = [
@@ -207,6 +210,35 @@ def test_rate_limit_is_keyed_per_visitor_via_one_trusted_hop(client, monkeypatch
     assert post("203.0.113.9").status_code != 429
 
 
+def test_idle_buckets_expire_oldest_first_without_a_full_scan():
+    clock = {"now": 0.0}
+    limiter = envelope.RateLimiter(idle_expiry=100, clock=lambda: clock["now"])
+    for second, ip in enumerate(["a", "b", "c"]):
+        clock["now"] = float(second)
+        limiter.allow(ip)
+    clock["now"] = 50.0
+    limiter.allow("a")  # seen again: moves behind b and c
+    assert list(limiter._buckets) == [limiter._hash(ip) for ip in "bca"]
+
+    # b and c go idle past the expiry; a, refreshed at 50, survives.
+    clock["now"] = 102.5
+    limiter.allow("d")
+    assert list(limiter._buckets) == [limiter._hash(ip) for ip in "ad"]
+    # An expired visitor comes back with a full burst.
+    assert limiter.allow("b") and limiter.allow("b") and not limiter.allow("b")
+
+
+def test_salt_rotation_drops_every_bucket():
+    day = {"now": 0.0}
+    limiter = envelope.RateLimiter(clock=lambda: 0.0, day_clock=lambda: day["now"])
+    assert limiter.allow("a") and limiter.allow("a") and not limiter.allow("a")
+    old_key = limiter._hash("a")
+    day["now"] = 86_400.0
+    assert limiter.allow("a")
+    assert limiter._hash("a") != old_key
+    assert list(limiter._buckets) == [limiter._hash("a")]
+
+
 # -- two-slot, no-queue concurrency ----------------------------------------
 
 def test_two_solver_slots_are_available(client):
@@ -234,6 +266,100 @@ def test_third_concurrent_request_is_busy_503(client):
         envelope.SLOTS.release()
 
 
+def _hold_both_slots_then_free_one(after):
+    assert envelope.SLOTS.acquire(blocking=False) is True
+    assert envelope.SLOTS.acquire(blocking=False) is True
+    timer = threading.Timer(after, envelope.SLOTS.release)
+    timer.start()
+    return timer
+
+
+def test_queued_request_waits_for_a_slot_and_logs_the_wait(client, monkeypatch,
+                                                           caplog):
+    monkeypatch.setattr(envelope, "SLOT_QUEUE", envelope.SlotQueue(depth=1))
+    deadlines = []
+    real_generate = views.FermentableSolver.generate
+
+    def spy(solver, *args, **kwargs):
+        deadlines.append(solver.config.request_deadline_seconds)
+        return real_generate(solver, *args, **kwargs)
+
+    monkeypatch.setattr(views.FermentableSolver, "generate", spy)
+    timer = _hold_both_slots_then_free_one(0.2)
+    try:
+        with caplog.at_level(logging.INFO, logger="brewgen.compute"):
+            resp = client.post("/api/v1/grains/recipes", json=_brief())
+    finally:
+        timer.join()
+        envelope.SLOTS.release()
+    assert resp.status_code == 200
+    payload = json.loads([r for r in caplog.records
+                          if r.name == "brewgen.compute"][0].getMessage())
+    assert payload["queue_depth"] == 1
+    assert 0.15 < payload["queue_wait"] < 1.0
+    # The wait comes out of the solver's end-to-end deadline.
+    assert deadlines == [pytest.approx(
+        views.SOLVER_CONFIG.request_deadline_seconds - payload["queue_wait"])]
+
+
+def test_full_queue_is_busy_at_once():
+    slots = threading.BoundedSemaphore(1)
+    assert slots.acquire(blocking=False)
+    queue = envelope.SlotQueue(depth=1)
+    queue.waiting = 1  # someone is already waiting
+    assert queue.acquire(slots, max_wait=5.0) == (False, 1, 0.0)
+    # With no deadline left to spend there is no wait at all.
+    queue.waiting = 0
+    assert queue.acquire(slots, max_wait=0.0) == (False, 0, 0.0)
+
+
+def test_queued_request_is_refused_once_its_deadline_cannot_be_met():
+    clock = {"now": 0.0}
+    slots = threading.BoundedSemaphore(1)
+    assert slots.acquire(blocking=False)
+    queue = envelope.SlotQueue(depth=2, clock=lambda: clock["now"])
+    real_acquire = slots.acquire
+
+    def timed_out(blocking=True, timeout=None):
+        if blocking:
+            clock["now"] += timeout  # the slot never frees up in time
+        return real_acquire(blocking=False)
+
+    slots.acquire = timed_out
+    assert queue.acquire(slots, max_wait=1.5) == (False, 1, 1.5)
+    assert queue.waiting == 0
+
+
+def test_default_has_no_queue(client):
+    assert envelope.SLOT_QUEUE.depth == envelope.SLOT_QUEUE_DEPTH == 0
+
+
+def test_cheap_check_is_admitted_beside_a_held_slot(client, monkeypatch):
+    monkeypatch.setattr(envelope, "RATE_LIMITER",
+                        envelope.RateLimiter(per_minute=6000, burst=1000))
+    slots = envelope.WeightedSlots()
+    monkeypatch.setattr(envelope, "SLOTS", slots)
+    # One full slot and all but one unit of the other are in use.
+    assert slots.acquire(blocking=False)
+    assert slots.acquire(blocking=False, units=admission.UNITS_PER_SLOT - 1)
+
+    monkeypatch.setattr(envelope, "COST_MODEL",
+                        admission.CostModel({"feasibility": [0.01, 0, 0, 0, 0]}))
+    body = _brief("/api/v1/grains/feasibility")
+    resp = client.post("/api/v1/grains/feasibility", json=body)
+    assert resp.status_code != 503
+    assert slots.acquire(blocking=False, units=1)  # the unit was given back
+    slots.release(1)
+
+    # Predicted to take the whole deadline, the same check needs a full slot.
+    monkeypatch.setattr(envelope, "COST_MODEL",
+                        admission.CostModel({"feasibility": [5.0, 0, 0, 0, 0]}))
+    monkeypatch.setattr(envelope, "RESULT_CACHE", envelope.ResultCache())
+    resp = client.post("/api/v1/grains/feasibility", json=body)
+    assert resp.status_code == 503
+    assert resp.get_json()["outcome"] == "busy"
+
+
 # -- deadline -> 503 --------------------------------------------------------
 
 @pytest.mark.parametrize("endpoint", [
@@ -273,8 +399,198 @@ def test_log_carries_only_aggregate_fields(client, caplog):
     assert len(records) == 1, "exactly one aggregate line per compute request"
     payload = json.loads(records[0].getMessage())
     assert set(payload) == {"timestamp", "request_id", "operation",
-                            "outcome", "status", "duration"}
+                            "outcome", "status", "duration", "queue_depth",
+                            "queue_wait"}
     assert payload["operation"] == "recipes"
+    assert (payload["queue_depth"], payload["queue_wait"]) == (0, 0.0)
     # The address, its hash, and brief content never reach the log.
     assert marker_ip not in records[0].getMessage()
     assert marker_slug not in records[0].getMessage()
+
+
+# -- result cache -----------------------------------------------------------
+
+def _fresh_limiter(monkeypatch):
+    monkeypatch.setattr(envelope, "RATE_LIMITER",
+                        envelope.RateLimiter(per_minute=6000, burst=1000))
+
+
+def test_repeat_brief_is_served_from_cache_without_a_slot(client, monkeypatch):
+    _fresh_limiter(monkeypatch)
+    body = _brief("/api/v1/grains/recipes")
+    first = client.post("/api/v1/grains/recipes", json=body)
+    assert first.status_code == 200
+
+    # The same brief with its fermentables reordered is the same canonical
+    # brief: it must replay without building a solver or taking a slot.
+    def spy(_data):
+        raise AssertionError("a cached brief must not reach the solver")
+    monkeypatch.setattr(views, "_build_fermentable_solver", spy)
+    body["fermentable_list"].reverse()
+    assert envelope.SLOTS.acquire(blocking=False) is True
+    assert envelope.SLOTS.acquire(blocking=False) is True
+    try:
+        second = client.post("/api/v1/grains/recipes", json=body)
+    finally:
+        envelope.SLOTS.release()
+        envelope.SLOTS.release()
+
+    assert second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert envelope.RESULT_CACHE.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_cache_key_covers_operation_and_solver_config():
+    body = _brief("/api/v1/grains/recipes")
+    key = envelope.brief_key("recipes", body, SolverConfig())
+    assert key == envelope.brief_key("recipes", dict(body, version=1), SolverConfig())
+    assert key != envelope.brief_key("feasibility", body, SolverConfig())
+    assert key != envelope.brief_key(
+        "recipes", body, SolverConfig(request_deadline_seconds=5))
+    changed = json.loads(json.dumps(body))
+    changed["beer_profile"]["max_color_srm"] = 21
+    assert key != envelope.brief_key("recipes", changed, SolverConfig())
+
+
+def test_deadline_outcomes_are_never_cached(client, monkeypatch):
+    _fresh_limiter(monkeypatch)
+    monkeypatch.setattr(views, "SOLVER_CONFIG",
+                        SolverConfig(request_deadline_seconds=0))
+    body = _brief("/api/v1/grains/feasibility")
+    for _ in range(2):
+        assert client.post("/api/v1/grains/feasibility",
+                           json=body).status_code == 503
+    assert envelope.RESULT_CACHE.stats()["size"] == 0
+
+
+def test_result_cache_is_bounded_lru_with_ttl():
+    now = {"t": 0.0}
+    cache = envelope.ResultCache(max_entries=2, ttl=10, clock=lambda: now["t"])
+    for key in ("a", "b"):
+        cache.put(key, *envelope.ok_json({"k": key}, "feasible"))
+    cache.get("a")                       # "a" is now most recently used
+    cache.put("c", *envelope.ok_json({"k": "c"}, "feasible"))
+    assert cache.get("b") is None        # least recently used was evicted
+    assert cache.get("a") is not None
+    now["t"] = 11.0
+    assert cache.get("a") is None        # expired
+    cache.put("p", *envelope.ok_json({"k": "p"}, "partial"))
+    assert cache.get("p") is None        # deadline-shaped outcomes are skipped
+
+
+# -- single flight ----------------------------------------------------------
+
+def test_identical_in_flight_briefs_are_solved_once(monkeypatch):
+    _fresh_limiter(monkeypatch)
+    solves, release = [], threading.Event()
+    feasibility = views.FermentableSolver.feasibility
+
+    def slow_feasibility(solver, **kwargs):
+        solves.append(1)
+        release.wait(5)
+        return feasibility(solver, **kwargs)
+    monkeypatch.setattr(views.FermentableSolver, "feasibility", slow_feasibility)
+
+    body = _brief("/api/v1/grains/feasibility")
+    responses = []
+
+    def post():
+        resp = views.app.test_client().post("/api/v1/grains/feasibility", json=body)
+        responses.append((resp.status_code, resp.get_json()))
+    leader = threading.Thread(target=post)
+    leader.start()
+    while not solves:
+        time.sleep(0.005)
+    follower = threading.Thread(target=post)
+    follower.start()
+    while envelope.IN_FLIGHT.coalesced == 0:
+        time.sleep(0.005)
+    release.set()
+    leader.join(10)
+    follower.join(10)
+
+    assert len(solves) == 1
+    assert len(responses) == 2 and responses[0] == responses[1]
+    assert responses[0][0] == 200
+
+
+def test_a_follower_gives_up_at_its_own_deadline():
+    flights = envelope.InFlight()
+    flight, leading = flights.join("k")
+    assert leading
+    follower, leading = flights.join("k")
+    assert follower is flight and not leading
+    resp, outcome = follower.wait(0.01)
+    assert resp.status_code == 503 and outcome == "deadline"
+
+    flights.finish("k", flight, *envelope.ok_json({"ok": True}, "feasible"))
+    resp, outcome = flight.wait(0)
+    assert resp.get_json() == {"ok": True} and outcome == "feasible"
+    assert flights.join("k")[1]              # the next request leads anew
+
+
+def test_a_follower_without_an_endpoint_deadline_still_times_out(monkeypatch):
+    _fresh_limiter(monkeypatch)
+    monkeypatch.setattr(SolverConfig, "request_deadline_seconds", 0.05)
+    app = flask.Flask(__name__)
+
+    @app.route("/check", methods=["POST"])
+    @envelope.compute_endpoint("feasibility", views.CONTRACT)
+    def check(_data):
+        raise AssertionError("a follower must not run the view")
+
+    body = _brief("/api/v1/grains/feasibility")
+    # A leader for the same brief that never finishes.
+    envelope.IN_FLIGHT.join(envelope.brief_key("feasibility", body))
+    resp = app.test_client().post("/check", json=body)
+    assert resp.status_code == 503
+    assert resp.get_json()["outcome"] == "deadline"
+
+
+# -- metrics ----------------------------------------------------------------
+
+def _samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines()
+                if not line.startswith("#"))
+
+
+def test_compute_requests_and_solves_are_recorded(monkeypatch):
+    _fresh_limiter(monkeypatch)
+    client = views.app.test_client()
+    body = _brief("/api/v1/grains/sensory-range")
+    for _ in range(2):  # a solve, then a cache hit
+        assert client.post("/api/v1/grains/sensory-range", json=body,
+                           environ_base={"REMOTE_ADDR": "198.51.100.7"}).status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type == metrics.CONTENT_TYPE
+    text = resp.get_data(as_text=True)
+    samples = _samples(text)
+    assert samples['brewgen_requests_total{operation="sensory_range",'
+                   'outcome="feasible",status="200"}'] == "2"
+    assert samples['brewgen_request_duration_seconds_count'
+                   '{operation="sensory_range"}'] == "2"
+    # Only the request that ran its operation counts solves: a min and a max.
+    assert samples['brewgen_request_solves_count{operation="sensory_range"}'] == "1"
+    assert samples['brewgen_request_solves_sum{operation="sensory_range"}'] == "2"
+    backend = views.SOLVER_CONFIG.backend
+    assert samples['brewgen_solve_seconds_count{backend="%s"}' % backend] == "2"
+    assert int(samples['brewgen_model_binaries_sum{backend="%s"}' % backend]) > 0
+    assert samples["brewgen_result_cache_hits_total"] == "1"
+    assert samples["brewgen_result_cache_misses_total"] == "1"
+    assert samples["brewgen_rate_limit_buckets"] == "1"
+    assert samples["brewgen_slot_units_in_use"] == "0"
+
+    # Aggregates only: nothing from the brief or about the visitor.
+    assert "198.51.100.7" not in text
+    for value in (body["descriptor"], body["fermentable_list"][0]["slug"]):
+        assert value not in text
+
+
+def test_slot_occupancy_follows_held_units():
+    assert envelope.SLOTS.acquire(blocking=False, units=3)
+    try:
+        assert _samples(metrics.REGISTRY.render())["brewgen_slot_units_in_use"] == "3"
+    finally:
+        envelope.SLOTS.release(3)
@@ -172,3 +172,83 @@ def test_generation_partial_when_deadline_hits_after_first_bill():
         1.05, 5.5, 75, 0.0, 100.0, clock=lambda: next(times))
     assert result.status == GenerationStatus.PARTIAL
     assert len(result.alternatives) == 1
+
+
+@pytest.mark.parametrize("cut", ["split", "support"])
+def test_diversity_cuts_enforce_pairwise_distance_exactly(cut):
+    """Both formulations must admit exactly the bills at least 10 points from
+    every accepted one. Two grains give a one-dimensional space: bills must sit
+    5 points of one grain apart, so any maximal set has 12 to 21 members."""
+    grains = [make_grain("a", "base", color=2.0), make_grain("b", "base", color=3.0)]
+    config = SolverConfig(max_bills=25, diversity_cut=cut,
+                          solver_time_limit_seconds=30, request_deadline_seconds=30)
+    result = FermentableSolver(grains, [make_category("base")], max_unique_grains=2,
+                               config=config).generate(1.05, 5.5, 75, 0.0, 100.0)
+    bills = [b.percents for b in result.alternatives]
+    assert result.status == GenerationStatus.COMPLETE
+    assert 12 <= len(bills) <= 21
+    for i in range(len(bills)):
+        for j in range(i + 1, len(bills)):
+            assert _l1(bills[i], bills[j]) >= 10
+
+
+def test_support_and_split_cuts_return_equally_many_valid_bills(real_grains):
+    grains = _style_grains(real_grains)
+    results = [FermentableSolver(grains, STYLE_CATS, max_unique_grains=4,
+                                 config=SolverConfig(diversity_cut=cut)).generate(
+        SG, VOL, EFF, 6.0, 14.0) for cut in ("split", "support")]
+    for result in results:
+        assert result.status == GenerationStatus.COMPLETE
+        assert len(result.alternatives) == 5
+        bills = [b.percents for b in result.alternatives]
+        assert all(_l1(a, b) >= 10 for k, a in enumerate(bills) for b in bills[k + 1:])
+
+
+def test_unknown_diversity_cut_is_rejected():
+    grains = [make_grain("only", "base")]
+    solver = FermentableSolver(grains, [make_category("base")], max_unique_grains=1,
+                               config=SolverConfig(diversity_cut="nogood"))
+    with pytest.raises(ValueError):
+        solver.generate(1.05, 5.5, 75, 0.0, 100.0)
+
+
+@pytest.mark.parametrize("cut", ["split", "support"])
+def test_warm_started_generation_returns_valid_diverse_bills(real_grains, cut):
+    """Later solves start from a repaired shift of the previous bill; each start
+    must already satisfy the model and every cut, and the set stays valid."""
+    grains = _style_grains(real_grains)
+    solver = FermentableSolver(grains, STYLE_CATS, max_unique_grains=4,
+                               config=SolverConfig(diversity_cut=cut))
+    warm = []
+    real_solve = solver._solve
+
+    def spy(prob, time_limit=None, warm_start=False):
+        warm.append(warm_start)
+        return real_solve(prob, time_limit, warm_start=warm_start)
+    solver._solve = spy
+    result = solver.generate(SG, VOL, EFF, 6.0, 14.0)
+
+    assert result.status == GenerationStatus.COMPLETE
+    assert warm == [False, True, True, True, True]
+    lut = _lut(grains)
+    bills = [b.percents for b in result.alternatives]
+    for pct in bills:
+        assert sum(pct.values()) == 100
+        assert 6.0 - 1e-9 <= _srm_of(pct, lut) <= 14.0 + 1e-9
+    assert all(_l1(a, b) >= 10 for k, a in enumerate(bills) for b in bills[k + 1:])
+
+
+def test_warm_start_candidates_satisfy_every_constraint(real_grains):
+    from brewgen.backend.solver.fermentables import ColorContext
+    grains = _style_grains(real_grains)
+    solver = FermentableSolver(grains, STYLE_CATS, max_unique_grains=4)
+    ctx = ColorContext(SG, VOL, EFF, 6.0, 14.0)
+    bills = solver.generate(SG, VOL, EFF, 6.0, 14.0).alternatives
+    vectors = [[b.percents.get(g["slug"], 0) for g in solver.grains] for b in bills]
+    candidate = solver._next_start(vectors, ctx)
+    assert candidate is not None
+    assert solver._admits(candidate, solver._color_rows(ctx))
+    assert all(sum(abs(a - b) for a, b in zip(candidate, v)) >= 10 for v in vectors)
+    lut = {g["slug"]: g for g in solver.grains}
+    pct = {g["slug"]: v for g, v in zip(solver.grains, candidate) if v}
+    assert 6.0 - 1e-9 <= _srm_of(pct, lut) <= 14.0 + 1e-9
@@ -0,0 +1,52 @@
+"""GrainModel lookups are served from slug/name/category indexes; they must
+answer exactly as the linear scans they replaced."""
+
+from brewgen.backend.models import grain
+
+
+def _scan(grains, attr, key):
+    """The original list-scan lookup, as the reference."""
+    if type(key) is str:
+        result = [g for g in grains if getattr(g, attr) == key]
+        return result[0] if result else None
+    result = [g for k in key for g in grains if getattr(g, attr) == k]
+    return result or None
+
+
+def test_lookups_match_a_linear_scan():
+    model = grain.GrainModel()
+    grains = model.grain_list
+    slugs = [g.slug for g in grains]
+    names = [g.name for g in grains]
+    for slug in slugs + ["no-such-grain"]:
+        assert model.get_grain_by_slug(slug) is _scan(grains, "slug", slug)
+    for name in names + ["No Such Grain"]:
+        assert model.get_grain_by_name(name) is _scan(grains, "name", name)
+    picked = [slugs[5], slugs[0], "no-such-grain", slugs[5]]
+    assert model.get_grain_by_slug(picked) == _scan(grains, "slug", picked)
+    assert model.get_grain_by_name(["No Such Grain"]) is None
+
+
+def test_category_lookup_keeps_list_order_and_substring_match():
+    model = grain.GrainModel()
+    categories = model.get_all_categories()
+    assert sorted(categories) == sorted({g.category for g in model.grain_list})
+    for query in (categories[0], categories[:2], "base", "", []):
+        assert model.get_grain_by_category(query) == [
+            g for g in model.grain_list if g.category in query]
+
+
+def test_indexes_follow_assignment_and_add_grain():
+    model = grain.GrainModel()
+    first, second = model.grain_list[:2]
+    subset = grain.GrainList([first])
+    assert subset.get_grain_slugs() == [first.slug]
+    assert subset.get_grain_by_slug(second.slug) is None
+
+    subset.add_grain(second)
+    assert subset.get_grain_by_slug(second.slug) is second
+    assert subset.get_grain_by_name(second.name) is second
+    assert second in subset.get_grain_by_category(second.category)
+
+    by_slug = grain.GrainList(grain_slugs=[second.slug])
+    assert [g.slug for g in by_slug.grain_list] == [second.slug]
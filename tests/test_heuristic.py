@@ -0,0 +1,111 @@
+"""The seeded local-search heuristic that generation tries before the MILP:
+every bill it returns passes the exact constraint and distance checks, it is
+deterministic, and generation hands an unfilled set on to the MILP."""
+
+import pytest
+
+from conftest import make_grain, make_category
+from brewgen.backend.solver import color, heuristic
+from brewgen.backend.solver.fermentables import (
+    FermentableSolver, SolverConfig, ColorContext, GenerationStatus, HEURISTIC_SHARE)
+
+STYLE_CATS = [
+    make_category("base", 60, 100, unique_fermentable_count=2),
+    make_category("crystal", 0, 25, unique_fermentable_count=2),
+    make_category("roasted", 0, 15, unique_fermentable_count=1),
+    make_category("munich", 0, 40, unique_fermentable_count=1),
+]
+SG, VOL, EFF = 1.055, 5.5, 75
+HEURISTIC = SolverConfig(heuristic=True)
+
+
+def _style_solver(real_grains, bounds=None, config=HEURISTIC):
+    grains = [g for g in real_grains if g["category"] in {c["name"] for c in STYLE_CATS}]
+    return FermentableSolver(grains, STYLE_CATS, max_unique_grains=4,
+                             sensory_keywords=["sweet", "malty"],
+                             sensory_bounds=bounds, config=config)
+
+
+def _srm(solver, vector):
+    return color.morey_srm(color.mash_color_units(
+        [g["color"] for g in solver.grains], [g["ppg"] for g in solver.grains],
+        vector, SG, VOL, EFF))
+
+
+def test_heuristic_bills_satisfy_every_constraint(real_grains):
+    bounds = [{"name": "malty", "min": 1.0, "max": 3.0}]
+    solver = _style_solver(real_grains, bounds)
+    ctx = ColorContext(SG, VOL, EFF, 6.0, 14.0)
+    bills = heuristic.diverse_bills(solver, ctx, 5)
+    assert len(bills) == 5
+    for vector in bills:
+        assert solver._admits(vector, solver._color_rows(ctx))
+        assert 6.0 - 1e-9 <= _srm(solver, vector) <= 14.0 + 1e-9
+    for k, a in enumerate(bills):
+        for b in bills[k + 1:]:
+            assert sum(abs(p - q) for p, q in zip(a, b)) >= 10
+
+
+def test_heuristic_is_deterministic(real_grains):
+    ctx = ColorContext(SG, VOL, EFF, 6.0, 14.0)
+    first = heuristic.diverse_bills(_style_solver(real_grains), ctx, 5)
+    second = heuristic.diverse_bills(
+        _style_solver(list(reversed(real_grains))), ctx, 5)
+    assert first == second
+
+
+def test_heuristic_generation_skips_the_milp_on_an_easy_brief(real_grains, monkeypatch):
+    solver = _style_solver(real_grains)
+
+    def no_solve(*_args, **_kwargs):
+        raise AssertionError("an easy brief should not need a MILP solve")
+    monkeypatch.setattr(solver, "_solve", no_solve)
+    result = solver.generate(SG, VOL, EFF, 6.0, 14.0)
+    assert result.status == GenerationStatus.COMPLETE
+    assert len(result.alternatives) == 5
+
+
+def test_generation_hands_an_unfilled_set_to_the_milp(monkeypatch):
+    """When the heuristic stops short, the MILP completes the set with the
+    heuristic's bills already cut off."""
+    grains = [make_grain("a", "base", color=2.0), make_grain("b", "base", color=3.0),
+              make_grain("c", "crystal", color=40.0, max_percent=20)]
+    cats = [make_category("base", 80, 100), make_category("crystal", 0, 20)]
+    solver = FermentableSolver(grains, cats, max_unique_grains=3, config=HEURISTIC)
+    found = heuristic.diverse_bills(solver, ColorContext(SG, VOL, EFF, 0, 100), 2)
+    monkeypatch.setattr(heuristic, "diverse_bills", lambda *_args: found)
+    result = solver.generate(SG, VOL, EFF, 0.0, 100.0)
+
+    assert result.status == GenerationStatus.COMPLETE
+    assert len(result.alternatives) == 5
+    vectors = [[b.percents.get(g["slug"], 0) for g in solver.grains]
+               for b in result.alternatives]
+    assert vectors[:2] == found
+    for k, a in enumerate(vectors):
+        for b in vectors[k + 1:]:
+            assert sum(abs(p - q) for p, q in zip(a, b)) >= 10
+
+
+def test_heuristic_gives_up_cleanly_on_an_infeasible_color_band():
+    grains = [make_grain("pale", "base", color=1.5), make_grain("pale2", "base", color=2)]
+    solver = FermentableSolver(grains, [make_category("base")], 2, config=HEURISTIC)
+    assert heuristic.diverse_bills(solver, ColorContext(SG, VOL, EFF, 40, 60), 5) == []
+
+
+def test_heuristic_stops_at_its_deadline(real_grains, monkeypatch):
+    solver = _style_solver(real_grains)
+    ctx = ColorContext(SG, VOL, EFF, 6.0, 14.0)
+    reads = []
+
+    def clock():
+        reads.append(1)
+        return float(len(reads))
+    assert heuristic.diverse_bills(solver, ctx, 5, clock, deadline=0.0) == []
+    assert len(reads) == 1
+
+    # Generation grants it only a share of the request deadline.
+    stops = []
+    monkeypatch.setattr(heuristic, "diverse_bills",
+                        lambda *args: stops.append(args[4]) or [])
+    solver.generate(SG, VOL, EFF, 6.0, 14.0, clock=lambda: 100.0)
+    assert stops == [100.0 + HEURISTIC_SHARE * HEURISTIC.request_deadline_seconds]
@@ -157,6 +157,59 @@ def test_sensory_range_unknown_slug_is_invalid(client):
     assert resp.get_json()["outcome"] == "invalid"
 
 
+# -- capped batch range ------------------------------------------------------
+
+def test_batch_range_matches_focused_ranges(client):
+    names = KEYWORDS[:3]
+    body = _feasible_body(
+        descriptors=names,
+        sensory_model=[{"name": KEYWORDS[1], "min": 0, "max": 10}])
+    resp = client.post("/api/v1/grains/sensory-range/batch", json=body)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["status"] == "complete"
+    assert [r["name"] for r in data["ranges"]] == names
+
+    for entry in data["ranges"]:
+        single = dict(body, descriptor=entry["name"])
+        del single["descriptors"]
+        focused = client.post("/api/v1/grains/sensory-range", json=single).get_json()
+        assert entry == {"name": entry["name"], "status": "feasible",
+                         "min": focused["min"], "max": focused["max"]}
+
+
+@pytest.mark.parametrize("descriptors", [
+    [], ["not-a-real-descriptor"], [KEYWORDS[0], KEYWORDS[0]],
+    KEYWORDS[:envelope.MAX_BATCH_DESCRIPTORS + 1], KEYWORDS[0]])
+def test_batch_range_rejects_bad_descriptor_lists(client, descriptors):
+    resp = client.post("/api/v1/grains/sensory-range/batch",
+                       json=_feasible_body(descriptors=descriptors))
+    assert resp.status_code == 422
+    assert resp.get_json()["outcome"] == "invalid"
+
+
+def test_batch_range_reports_partial_when_budget_runs_out():
+    solver = views._build_fermentable_solver(_feasible_body())
+    # The shared clock jumps past the deadline once the first range is done.
+    now = [0.0]
+    focused = solver._focused_range
+
+    def first_then_expire(*args):
+        result = focused(*args)
+        now[0] = 1000.0
+        return result
+    solver._focused_range = first_then_expire
+    results = solver.sensory_range_batch(KEYWORDS[:3], clock=lambda: now[0])
+    assert [r.status.value for r in results] == \
+        ["feasible", "deadline_exceeded", "deadline_exceeded"]
+
+
+def test_batch_range_is_capped_on_the_solver():
+    solver = views._build_fermentable_solver(_feasible_body())
+    with pytest.raises(ValueError):
+        solver.sensory_range_batch(KEYWORDS[:SolverConfig().max_range_batch + 1])
+
+
 # -- full-brief feasibility --------------------------------------------------
 
 def test_feasibility_reports_feasible(client):
@@ -0,0 +1,40 @@
+"""The metrics registry's Prometheus text exposition. What the envelope and
+the solver record through it is covered in ``test_envelope.py``."""
+
+import pytest
+
+from brewgen.backend import metrics
+
+
+def test_exposition_format():
+    registry = metrics.Registry()
+    counter = registry.counter("demo_total", "A counter.", ("kind",))
+    histogram = registry.histogram("demo_seconds", "A histogram.", (0.1, 1))
+    registry.gauge("demo_level", "A gauge.", lambda: 2.5)
+    registry.gauge("demo_broken", "A failing gauge.", lambda: 1 / 0)
+    counter.inc(kind='a"b')
+    counter.inc(2, kind='a"b')
+    for value in (0.05, 0.5, 3):
+        histogram.observe(value)
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        registry.counter("demo_total", "Again.")
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_total A counter.",
+        "# TYPE demo_total counter",
+        'demo_total{kind="a\\"b"} 3',
+        "# HELP demo_seconds A histogram.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{le="0.1"} 1',
+        'demo_seconds_bucket{le="1"} 2',
+        'demo_seconds_bucket{le="+Inf"} 3',
+        "demo_seconds_sum 3.55",
+        "demo_seconds_count 3",
+        "# HELP demo_level A gauge.",
+        "# TYPE demo_level gauge",
+        "demo_level 2.5",
+        "# HELP demo_broken A failing gauge.",
+        "# TYPE demo_broken gauge",
+    ]
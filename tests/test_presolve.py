@@ -0,0 +1,155 @@
+"""The pure-Python presolve: briefs that interval reasoning proves infeasible
+are answered without a solver run (and, behind the envelope, without a solver
+slot), and presolve never rejects a brief the MILP would accept."""
+
+import random
+
+import pytest
+
+from conftest import make_grain, make_category
+from brewgen.backend import envelope, views
+from brewgen.backend.solver.fermentables import (
+    FermentableSolver, ColorContext, CheckStatus, GenerationStatus)
+
+
+def _no_solve(solver, monkeypatch):
+    def spy(*_args, **_kwargs):
+        raise AssertionError("presolve should have answered without a solve")
+    monkeypatch.setattr(solver, "_solve", spy)
+    return solver
+
+
+@pytest.mark.parametrize("grains, cats, max_unique", [
+    # Category minimums sum past 100.
+    ([make_grain("b1", "base"), make_grain("c1", "crystal")],
+     [make_category("base", 60, 100), make_category("crystal", 50, 100)], 4),
+    # The only crystal grain's minimum exceeds the category cap, so it is
+    # unusable and the crystal minimum cannot be met.
+    ([make_grain("b1", "base"), make_grain("c1", "crystal", min_percent=30)],
+     [make_category("base", 0, 100), make_category("crystal", 10, 20)], 4),
+    # Two crystal grains are needed to reach 15%, but the category allows one.
+    ([make_grain("b1", "base"), make_grain("c1", "crystal", max_percent=10),
+      make_grain("c2", "crystal", max_percent=10)],
+     [make_category("base", 0, 100),
+      make_category("crystal", 15, 25, unique_fermentable_count=1)], 4),
+    # Every category wants a grain but only one distinct grain is allowed.
+    ([make_grain("b1", "base"), make_grain("c1", "crystal")],
+     [make_category("base", 50, 100), make_category("crystal", 5, 100)], 1),
+    # The grains cannot reach 100% between them.
+    ([make_grain("b1", "base", max_percent=40), make_grain("b2", "base", max_percent=40)],
+     [make_category("base", 0, 100)], 4),
+])
+def test_structurally_infeasible_briefs_never_reach_the_solver(
+        monkeypatch, grains, cats, max_unique):
+    solver = _no_solve(FermentableSolver(grains, cats, max_unique), monkeypatch)
+    assert solver.proves_infeasible() is True
+    assert solver.is_valid() is False
+    assert solver.feasibility().status is CheckStatus.INFEASIBLE
+    assert solver.generate(1.05, 5.5, 75, 0, 255).status is GenerationStatus.INFEASIBLE
+
+
+def test_sensory_bound_outside_the_reachable_span_is_infeasible(monkeypatch):
+    grains = [make_grain("b1", "base", sensory={"sweet": 1.0}),
+              make_grain("b2", "base", max_percent=30, sensory={"sweet": 4.0})]
+    # At most 30% of the sweeter grain: sweetness tops out at 1.9.
+    bounds = [{"name": "sweet", "min": 2.0, "max": 5.0}]
+    solver = _no_solve(FermentableSolver(
+        grains, [make_category("base")], 2, sensory_keywords=["sweet", "malty"],
+        sensory_bounds=bounds), monkeypatch)
+    assert solver.proves_infeasible() is True
+    assert solver.sensory_range("malty").status is CheckStatus.INFEASIBLE
+    # A focused range on the bounded descriptor drops its own bound.
+    assert solver.proves_infeasible(exclude_sensory="sweet") is False
+
+
+def test_color_band_out_of_reach_is_infeasible(monkeypatch):
+    grains = [make_grain("pale", "base", color=2.0)]
+    solver = _no_solve(FermentableSolver(grains, [make_category("base")], 1),
+                       monkeypatch)
+    assert solver.proves_infeasible(ColorContext(1.05, 5.5, 75, 30.0, 40.0)) is True
+    assert solver.feasibility(ColorContext(1.05, 5.5, 75, 30.0, 40.0)).status \
+        is CheckStatus.INFEASIBLE
+
+
+def test_presolve_never_rejects_a_feasible_brief():
+    """Soundness over random briefs: whenever presolve claims a proof, the MILP
+    agrees, and tightened caps leave the MILP's answer unchanged."""
+    rng = random.Random(5)
+    keywords = ["sweet", "roast"]
+    for _ in range(40):
+        grains = [make_grain(
+            "g%d" % i, rng.choice(["base", "crystal"]), color=rng.uniform(1, 120),
+            min_percent=rng.choice([0, 0, 5, 20]),
+            max_percent=rng.choice([10, 30, 60, 100]),
+            sensory={k: rng.uniform(0, 5) for k in keywords}) for i in range(4)]
+        cats = [make_category("base", rng.choice([0, 50, 70]), 100),
+                make_category("crystal", 0, rng.choice([10, 25, 40]),
+                              rng.choice([None, 1]))]
+        lo = rng.uniform(0, 4)
+        bounds = [{"name": "sweet", "min": lo, "max": lo + rng.uniform(0, 1)}]
+        ctx = ColorContext(1.05, 5.5, 75, rng.uniform(2, 20), rng.uniform(20, 40))
+        solver = FermentableSolver(grains, cats, rng.choice([1, 2, 3]),
+                                   sensory_keywords=keywords, sensory_bounds=bounds)
+        if solver.proves_infeasible(ctx):
+            solver.proves_infeasible = lambda *args, **kwargs: False
+            assert solver.feasibility(ctx).status is CheckStatus.INFEASIBLE
+
+
+def test_envelope_rejects_a_proven_infeasible_brief_without_a_slot(monkeypatch):
+    grains = views.all_grains.get_grain_list()
+    base = [g["slug"] for g in grains if g["category"] == "base"][:2]
+    brief = {
+        "fermentable_list": [{"slug": s, "min_percent": 0, "max_percent": 40}
+                             for s in base],
+        "category_model": [{"name": "base", "min_percent": 0, "max_percent": 100}],
+        "max_unique_fermentables": 4,
+    }
+    calls = []
+    real = views.FermentableSolver.feasibility
+    monkeypatch.setattr(views.FermentableSolver, "feasibility",
+                        lambda self, *a, **kw: calls.append(1) or real(self, *a, **kw))
+    assert envelope.SLOTS.acquire(blocking=False) is True
+    assert envelope.SLOTS.acquire(blocking=False) is True
+    try:
+        resp = views.app.test_client().post("/api/v1/grains/feasibility", json=brief)
+    finally:
+        envelope.SLOTS.release()
+        envelope.SLOTS.release()
+    assert resp.status_code == 422
+    assert resp.get_json()["outcome"] == "infeasible"
+    assert calls == []
+
+
+def test_a_fractional_category_grain_count_is_floored(monkeypatch):
+    """The contract accepts a fractional ``unique_fermentable_count``; presolve
+    floors it, as the model's integer grain counts do, rather than failing."""
+    grains = views.all_grains.get_grain_list()
+    base = [g["slug"] for g in grains if g["category"] == "base"][:2]
+    crystal = [g["slug"] for g in grains if g["category"] == "crystal"][:2]
+    brief = {
+        "fermentable_list": [{"slug": s, "min_percent": 0, "max_percent": 100}
+                             for s in base]
+                            + [{"slug": s, "min_percent": 0, "max_percent": 20}
+                               for s in crystal],
+        "category_model": [
+            {"name": "base", "min_percent": 60, "max_percent": 100,
+             "unique_fermentable_count": 2},
+            {"name": "crystal", "min_percent": 0, "max_percent": 20,
+             "unique_fermentable_count": 1.5}],
+        "max_unique_fermentables": 4,
+        "beer_profile": {"min_color_srm": 2, "max_color_srm": 40,
+                         "original_sg": 1.055},
+    }
+    solver = views._build_fermentable_solver(brief)
+    assert not solver.proves_infeasible(None)
+    monkeypatch.setattr(envelope, "RATE_LIMITER",
+                        envelope.RateLimiter(per_minute=6000, burst=1000))
+    client = views.app.test_client()
+    for endpoint, extra in [
+            ("/api/v1/grains/feasibility", {}),
+            ("/api/v1/grains/recipes", {}),
+            ("/api/v1/grains/sensory-range",
+             {"descriptor": views.all_grains.get_sensory_keywords()[0]})]:
+        resp = client.post(endpoint, json=dict(brief, **extra))
+        assert resp.status_code == 200, (endpoint, resp.get_json())
+
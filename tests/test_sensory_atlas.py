@@ -0,0 +1,102 @@
+"""The precomputed per-style sensory range atlas: it is current with the shipped
+data, it matches what the solver computes, and a bare style seed is answered
+from it with no solver work."""
+
+import json
+import shutil
+
+import pytest
+
+from brewgen.backend import envelope, views
+from brewgen.backend.solver import atlas
+
+STYLES = views.all_styles.style_list
+
+
+def _seed(style_object, **extra):
+    brief = {
+        "fermentable_list": [
+            {"slug": g["slug"], "min_percent": g["min_percent"],
+             "max_percent": g["max_percent"]}
+            for g in style_object.get_grain_usage()],
+        "category_model": style_object.get_category_usage(),
+        "max_unique_fermentables": style_object.unique_fermentable_count or 4,
+    }
+    brief.update(extra)
+    return brief
+
+
+def test_committed_atlas_is_current_and_covers_every_style():
+    assert len(views.SENSORY_ATLAS) == len(STYLES)
+    for style_object in STYLES:
+        found, ranges = views.SENSORY_ATLAS.ranges(_seed(style_object))
+        assert found
+        assert ranges is None or set(ranges) == set(views.all_grains.get_sensory_keywords())
+
+
+@pytest.mark.parametrize("style_object", STYLES[:2], ids=lambda s: s.slug)
+def test_atlas_matches_the_solver(style_object):
+    _found, ranges = views.SENSORY_ATLAS.ranges(_seed(style_object))
+    solver = views._build_fermentable_solver(_seed(style_object))
+    for name in sorted(ranges)[:4]:
+        result = solver.sensory_range(name)
+        assert ranges[name] == [result.minimum, result.maximum]
+
+
+def test_seed_range_is_served_without_a_solver_or_slot(monkeypatch):
+    def spy(_data):
+        raise AssertionError("an atlas seed must not build a solver")
+    monkeypatch.setattr(views, "_build_fermentable_solver", spy)
+    style_object = STYLES[0]
+    _found, ranges = views.SENSORY_ATLAS.ranges(_seed(style_object))
+    name = sorted(ranges)[0]
+    client = views.app.test_client()
+    assert envelope.SLOTS.acquire(blocking=False) is True
+    assert envelope.SLOTS.acquire(blocking=False) is True
+    try:
+        single = client.post("/api/v1/grains/sensory-range",
+                             json=_seed(style_object, descriptor=name))
+        batch = client.post("/api/v1/grains/sensory-range/batch",
+                            json=_seed(style_object, descriptors=[name]))
+    finally:
+        envelope.SLOTS.release()
+        envelope.SLOTS.release()
+    assert single.status_code == 200
+    assert single.get_json() == {"status": "feasible", "name": name,
+                                 "min": ranges[name][0], "max": ranges[name][1]}
+    assert batch.get_json()["ranges"] == [{"name": name, "status": "feasible",
+                                           "min": ranges[name][0],
+                                           "max": ranges[name][1]}]
+
+
+def test_only_bare_seeds_match():
+    style_object = STYLES[0]
+    seed = _seed(style_object)
+    assert atlas.seed_key(seed) is not None
+    assert atlas.seed_key(dict(seed, sensory_model=[{"name": "bready", "min": 0,
+                                                     "max": 1}])) is None
+    assert atlas.seed_key(dict(seed, beer_profile={"min_color_srm": 3})) is None
+    changed = json.loads(json.dumps(seed))
+    changed["fermentable_list"][0]["max_percent"] -= 1
+    assert atlas.seed_key(changed) != atlas.seed_key(seed)
+    # Grain order and int/float spelling do not matter.
+    reordered = dict(seed, fermentable_list=[
+        dict(item, min_percent=float(item["min_percent"]))
+        for item in reversed(seed["fermentable_list"])])
+    assert atlas.seed_key(reordered) == atlas.seed_key(seed)
+
+
+def test_atlas_built_from_other_data_is_ignored(tmp_path):
+    for name in atlas.SOURCE_FILES:
+        shutil.copy(f"{atlas.DATA_DIR}/{name}", tmp_path / name)
+    assert len(atlas.load(data_dir=str(tmp_path))) == len(STYLES)
+    with open(tmp_path / "styles.json", "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert len(atlas.load(data_dir=str(tmp_path))) == 0
+
+
+def test_style_data_carries_the_seed_ranges():
+    style_object = STYLES[0]
+    resp = views.app.test_client().get("/api/v1/styles/%s" % style_object.slug)
+    assert resp.get_json()["sensory_ranges"] == \
+        views.SENSORY_ATLAS.for_style(style_object.slug)
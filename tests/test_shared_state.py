@@ -0,0 +1,143 @@
+"""The host-wide rate limiter and slot ceiling: separate instances and separate
+processes opening one directory must share one budget, keyed only by the
+daily-salted hash."""
+
+import multiprocessing
+import os
+
+import pytest
+
+from brewgen.backend import envelope, shared_state
+
+
+def _limiter(directory, clock, day=lambda: 0.0, **kwargs):
+    return shared_state.SharedRateLimiter(
+        str(directory), envelope.RATE_LIMIT_PER_MINUTE, envelope.RATE_LIMIT_BURST,
+        envelope.RATE_IDLE_EXPIRY_SECONDS, clock=lambda: clock["now"],
+        day_clock=day, **kwargs)
+
+
+def test_workers_share_one_budget_per_visitor(tmp_path):
+    clock = {"now": 1000.0}
+    first, second = _limiter(tmp_path, clock), _limiter(tmp_path, clock)
+    assert first.allow("203.0.113.1")
+    assert second.allow("203.0.113.1")
+    assert not first.allow("203.0.113.1")
+    assert not second.allow("203.0.113.1")
+    assert second.allow("203.0.113.9")  # another visitor is unaffected
+
+    # One token refills after ten seconds (six per minute), for either worker.
+    clock["now"] += 10.0
+    assert second.allow("203.0.113.1")
+    assert not first.allow("203.0.113.1")
+
+    # Past the idle expiry the visitor starts again from a full burst.
+    clock["now"] += envelope.RATE_IDLE_EXPIRY_SECONDS + 1
+    assert first.allow("203.0.113.1") and second.allow("203.0.113.1")
+    assert not first.allow("203.0.113.1")
+
+
+def test_the_table_holds_only_salted_hashes_and_rotates_daily(tmp_path):
+    clock, day = {"now": 0.0}, {"now": 0.0}
+    limiter = _limiter(tmp_path, clock, day=lambda: day["now"])
+    limiter.allow("203.0.113.1")
+    limiter.allow("203.0.113.1")
+    table = open(limiter.path, "rb").read()
+    assert b"203.0.113.1" not in table
+
+    day["now"] = 86_400.0
+    assert limiter.allow("203.0.113.1")  # yesterday's buckets are gone
+    assert open(limiter.path, "rb").read() != table
+
+
+def test_a_full_probe_window_fails_closed_without_dropping_budgets(tmp_path):
+    clock = {"now": 0.0}
+    limiter = _limiter(tmp_path, clock, slots=4, window=4)
+    visitors = ["10.0.0.%d" % i for i in range(4)]
+    for visitor in visitors:
+        assert limiter.allow(visitor)
+    # Every slot holds a partly spent bucket: a fifth visitor is refused and
+    # nobody's spent token is forgotten.
+    assert not limiter.allow("10.0.0.99")
+    for visitor in visitors:
+        assert limiter.allow(visitor)
+        assert not limiter.allow(visitor)
+
+    # Once a bucket refills to a full burst its slot can be handed over.
+    clock["now"] = 20.0
+    assert limiter.allow("10.0.0.99")
+
+
+def test_slots_are_shared_and_bounded(tmp_path):
+    first = shared_state.SharedSlots(str(tmp_path), 2)
+    second = shared_state.SharedSlots(str(tmp_path), 2)
+    assert first.acquire(blocking=False)
+    assert second.acquire(blocking=False)
+    assert not first.acquire(blocking=False)
+    assert not second.acquire(timeout=0.02)
+    first.release()
+    assert second.acquire(blocking=False)
+    second.release()
+    second.release()
+    with pytest.raises(ValueError):
+        second.release()
+
+
+def _hold_a_slot_and_exit(directory):
+    slots = shared_state.SharedSlots(directory, 1)
+    assert slots.acquire(blocking=False)
+    os._exit(0)  # exit without releasing
+
+
+def _spend(directory, now, results):
+    limiter = _limiter(directory, {"now": now})
+    results.put(sum(limiter.allow("203.0.113.1") for _ in range(5)))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(),
+                    reason="needs fork")
+def test_separate_processes_share_state(tmp_path):
+    context = multiprocessing.get_context("fork")
+    slots = shared_state.SharedSlots(str(tmp_path), 1)
+    # A slot held by a process that died is freed by the kernel.
+    child = context.Process(target=_hold_a_slot_and_exit, args=(str(tmp_path),))
+    child.start()
+    child.join()
+    assert slots.acquire(blocking=False)
+    slots.release()
+
+    results = context.Queue()
+    workers = [context.Process(target=_spend, args=(str(tmp_path), 1000.0, results))
+               for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert sum(results.get() for _ in workers) == envelope.RATE_LIMIT_BURST
+
+
+def test_new_state_follows_the_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("BREWGEN_SHARED_STATE_DIR", raising=False)
+    limiter, slots = envelope.new_state()
+    assert isinstance(limiter, envelope.RateLimiter)
+
+    monkeypatch.setenv("BREWGEN_SHARED_STATE_DIR", str(tmp_path / "state"))
+    limiter, slots = envelope.new_state()
+    assert isinstance(limiter, shared_state.SharedRateLimiter)
+    assert isinstance(slots, shared_state.SharedSlots)
+    assert limiter.allow("203.0.113.1")
+    assert oct(os.stat(tmp_path / "state").st_mode & 0o777) == "0o700"
+
+
+def test_occupancy_and_bucket_counts_for_metrics(tmp_path):
+    slots = shared_state.SharedSlots(str(tmp_path), 2, units_per_slot=4)
+    assert slots.in_use() == 0
+    assert slots.acquire(blocking=False)
+    assert slots.in_use() == 4
+    slots.release()
+
+    limiter = _limiter(tmp_path, {"now": 0.0}, slots=64)
+    assert limiter.bucket_count() == 0
+    for visitor in ("203.0.113.1", "203.0.113.2", "203.0.113.1"):
+        limiter.allow(visitor)
+    assert limiter.bucket_count() == 2
@@ -0,0 +1,152 @@
+"""StyleModel construction: one shared grain catalog, an indexed BJCP lookup,
+styles built lazily behind a bounded cache, memoized BJCP extraction and the
+single-pass keyword matcher."""
+
+import re
+
+import pytest
+
+from brewgen.backend.models import grain, style
+
+
+def test_style_model_loads_the_grain_catalog_once(monkeypatch):
+    loads = []
+    real_init = grain.GrainModel.__init__
+
+    def counting_init(self):
+        loads.append(1)
+        real_init(self)
+
+    monkeypatch.setattr(grain.GrainModel, "__init__", counting_init)
+    catalog = grain.GrainModel()
+    model = style.StyleModel(grain_model=catalog)
+    assert len(loads) == 1
+    assert model.grain_model is catalog
+    assert model.style_list
+
+    style.StyleModel()
+    assert len(loads) == 2
+
+
+def test_bjcp_fields_resolve_to_the_first_matching_subcategory():
+    model = style.StyleModel()
+    expected = {}
+    for bev_class in model.bjcp_data["styleguide"]["class"]:
+        if bev_class["type"] != "beer":
+            continue
+        for bjcp_category in bev_class["category"]:
+            for subcat in bjcp_category["subcategory"]:
+                expected.setdefault(subcat["name"].split(":")[-1].strip(),
+                                    (subcat.get("id"), bjcp_category.get("name")))
+    resolved = [s for s in model.style_list if s.id is not None]
+    assert resolved
+    for style_object in resolved:
+        assert (style_object.id, style_object.category) == expected[style_object.name]
+
+
+def test_styles_are_built_on_first_access_and_cached(monkeypatch):
+    built = []
+    real_init = style.Style.__init__
+
+    def counting_init(self, *args, **kwargs):
+        built.append(kwargs["name"])
+        real_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(style.Style, "__init__", counting_init)
+    model = style.StyleModel(cache_size=2)
+    slugs = model.get_style_slugs()
+    assert len(slugs) > 3
+    assert built == []
+
+    first = model.get_style_by_slug(slugs[0])
+    assert first.slug == slugs[0]
+    assert model.get_style_by_slug(slugs[0]) is first
+    assert len(built) == 1
+
+    # Two more styles push the least recently used one out of the cache.
+    model.get_style_by_slug(slugs[1])
+    model.get_style_by_slug(slugs[2])
+    rebuilt = model.get_style_by_slug(slugs[0])
+    assert rebuilt is not first
+    assert rebuilt.get_grain_usage() == first.get_grain_usage()
+    assert len(built) == 4
+
+    assert model.get_style_by_slug("no-such-style") is None
+
+
+def test_summaries_match_the_full_styles():
+    model = style.StyleModel()
+    summaries = model.get_style_summaries()
+    assert [s["slug"] for s in summaries] == model.get_style_slugs()
+    assert summaries == [{"name": s.name, "slug": s.slug, "category": s.category,
+                          "stats": s.stats} for s in model.style_list]
+
+
+def test_bjcp_sensory_is_extracted_once_per_style(monkeypatch):
+    model = style.StyleModel(cache_size=1)
+    slugs = model.get_style_slugs()
+    first = model.get_style_by_slug(slugs[0])
+    sentences = first.get_bjcp_sensory_sentences()
+    assert sentences
+
+    # Neither a repeat call nor a rebuild of the evicted style extracts again.
+    monkeypatch.setattr(style.Style, "_Style__extract_bjcp_sensory",
+                        lambda self: pytest.fail("BJCP text re-extracted"))
+    assert first.get_bjcp_sensory_sentences() is sentences
+    model.get_style_by_slug(slugs[1])
+    rebuilt = model.get_style_by_slug(slugs[0])
+    assert rebuilt is not first
+    assert rebuilt.get_bjcp_sensory_sentences() is sentences
+
+
+def test_similar_sentences_are_dropped_after_the_first():
+    sentences = [
+        "Moderate bready malt aroma.",
+        "Moderate bready malt flavor.",
+        "Moderate bready malt aroma.",
+        "Light caramel sweetness.",
+    ]
+    assert style._drop_similar(sentences) == [
+        "Moderate bready malt aroma.",
+        "Moderate bready malt aroma.",
+        "Light caramel sweetness.",
+    ]
+
+
+def _mentions_one_keyword_at_a_time(keywords, sentence):
+    """The original per-keyword search, as the reference."""
+    return {i for i, slug in enumerate(keywords)
+            if re.compile(r'\b({0}..?)\b'.format(slug.replace('_', ' ')),
+                          flags=re.IGNORECASE).search(sentence)}
+
+
+def test_keyword_matcher_agrees_with_per_keyword_search():
+    model = style.StyleModel()
+    keywords = model.grain_model.get_sensory_keywords()
+    matcher = style.keyword_matcher(keywords)
+    assert style.keyword_matcher(list(keywords)) is matcher
+
+    sentences = [
+        "Malty, bready and toasty", "MALTY", "maltyx", "a malt", "malt",
+        "dark toast or toast", "dark  toast", "dark_toast", "bready-sweet",
+        "raisin bread, raisin", "caramel-like, dark caramel notes", "",
+    ]
+    for bjcp_class in model.bjcp_data["styleguide"]["class"]:
+        for bjcp_category in bjcp_class["category"]:
+            for subcat in bjcp_category["subcategory"]:
+                for field in ("aroma", "flavor"):
+                    sentences.extend((subcat.get(field) or "").split("."))
+    for sentence in sentences:
+        assert matcher.mentions(sentence) == _mentions_one_keyword_at_a_time(
+            keywords, sentence), sentence
+
+
+def test_sentences_by_keyword_follows_keyword_order():
+    matcher = style.KeywordMatcher(["toast", "malty", "dark_toast"])
+    # A keyword needs a character after it, so one ending a sentence is missed.
+    text = "Dark toast notes.  Malty and toasty. Hoppy. Light toast"
+    assert matcher.sentences_by_keyword(text) == {
+        "toast": ["Dark toast notes.", "Malty and toasty."],
+        "malty": ["Malty and toasty."],
+        "dark_toast": ["Dark toast notes."],
+    }
@@ -101,3 +101,75 @@ def test_sensory_ranges_infeasible_model_returns_empty():
     solver = FermentableSolver(grains, cats, max_unique_grains=1,
                                sensory_keywords=["sweet"])
     assert solver.sensory_ranges() == []
+
+
+# -- shared-model reuse -----------------------------------------------------
+
+def test_reused_model_matches_fresh_models_per_solve():
+    """One model re-solved per brief must answer exactly like a fresh model per
+    solve, including a focused range whose own bound is relaxed and restored."""
+    from brewgen.backend.solver.fermentables import (
+        ColorContext, SolverConfig, CheckStatus)
+    grains = [
+        make_grain("sweet_malt", "base", color=3.0, sensory={"sweet": 4.0, "malty": 1.0}),
+        make_grain("plain_malt", "base", color=2.0, sensory={"sweet": 0.5, "malty": 3.0}),
+        make_grain("crys", "crystal", color=60.0, max_percent=20,
+                   sensory={"sweet": 2.0, "caramel": 5.0}),
+    ]
+    cats = [make_category("base", 70, 100), make_category("crystal", 0, 20)]
+    bounds = [{"name": "sweet", "min": 2.0, "max": 2.2},
+              {"name": "malty", "min": 0.0, "max": 2.5}]
+    keywords = ["sweet", "malty", "caramel"]
+    context = ColorContext(1.05, 5.5, 75, 2.0, 12.0)
+
+    def build(reuse):
+        return FermentableSolver(
+            grains, cats, max_unique_grains=3, sensory_keywords=keywords,
+            sensory_bounds=bounds, config=SolverConfig(reuse_model=reuse))
+
+    fresh, shared = build(False), build(True)
+    for ctx in (None, context):
+        for name in keywords:
+            expected = fresh.sensory_range(name, color_context=ctx)
+            actual = shared.sensory_range(name, color_context=ctx)
+            assert expected.status is CheckStatus.FEASIBLE
+            assert (actual.status, actual.minimum, actual.maximum) == \
+                (expected.status, expected.minimum, expected.maximum)
+        assert shared.feasibility(color_context=ctx).status == \
+            fresh.feasibility(color_context=ctx).status
+    assert shared.is_valid() is fresh.is_valid() is True
+    # The relaxed "sweet" bound is restored: the shared model still enforces it.
+    other = shared.sensory_range("malty")
+    assert other.status is CheckStatus.FEASIBLE
+    assert (other.minimum, other.maximum) == \
+        (fresh.sensory_range("malty").minimum, fresh.sensory_range("malty").maximum)
+
+
+def test_parallel_range_matches_sequential_range():
+    """Concurrent min/max solves on their own model copies must give the same
+    range as solving them one after the other, with and without color."""
+    from brewgen.backend.solver.fermentables import (
+        ColorContext, SolverConfig, CheckStatus)
+    grains = [
+        make_grain("sweet_malt", "base", color=3.0, sensory={"sweet": 4.0, "malty": 1.0}),
+        make_grain("plain_malt", "base", color=2.0, sensory={"sweet": 0.5, "malty": 3.0}),
+        make_grain("crys", "crystal", color=60.0, max_percent=20,
+                   sensory={"sweet": 2.0, "caramel": 5.0}),
+    ]
+    cats = [make_category("base", 70, 100), make_category("crystal", 0, 20)]
+    keywords = ["sweet", "malty", "caramel"]
+    context = ColorContext(1.05, 5.5, 75, 2.0, 12.0)
+
+    def build(parallel):
+        return FermentableSolver(
+            grains, cats, max_unique_grains=3, sensory_keywords=keywords,
+            config=SolverConfig(parallel_range=parallel))
+
+    sequential, parallel = build(False), build(True)
+    for ctx in (None, context):
+        for name in keywords:
+            expected = sequential.sensory_range(name, color_context=ctx)
+            actual = parallel.sensory_range(name, color_context=ctx)
+            assert expected.status is CheckStatus.FEASIBLE
+            assert (actual.status, actual.minimum, actual.maximum) == \
+                (expected.status, expected.minimum, expected.maximum)